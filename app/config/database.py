@@ -1,12 +1,61 @@
-from supabase import create_client, Client
 from .settings import settings
+from .http import http_client, pool_stats
+from .lazy import LazyProxy
 import os
 
 # Use SERVICE_ROLE_KEY for admin operations if available, otherwise use SUPABASE_KEY
 service_role_key = settings.SERVICE_ROLE_KEY or settings.SUPABASE_KEY
 
+def create_supabase_client(key: str):
+    # Imported here: the supabase package is a large share of import time
+    from supabase import create_client, ClientOptions
+
+    # No session ever lives on the shared clients (see new_auth_client)
+    options = ClientOptions(
+        httpx_client=http_client.resolve(),
+        auto_refresh_token=False,
+        persist_session=False
+    )
+    return create_client(settings.SUPABASE_URL, key, options=options)
+
+# Both clients are created on first use (or by the startup warm-up); they
+# otherwise behave exactly like supabase.Client.
+
 # Main client for regular operations
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+supabase = LazyProxy(lambda: create_supabase_client(settings.SUPABASE_KEY))
 
 # Admin client for admin operations
-supabase_admin: Client = create_client(settings.SUPABASE_URL, service_role_key)
\ No newline at end of file
+supabase_admin = LazyProxy(lambda: create_supabase_client(service_role_key))
+
+def new_auth_client():
+    """Create a GoTrue client whose session lives and dies with the client.
+
+    The `supabase` client keeps one auth session for the whole process and
+    swaps its PostgREST Authorization header on every sign-in, so user-facing
+    auth flows (sign in, sign up, refresh, OTP verification) must not run on
+    it. These clients are cheap to build, never persist or auto-refresh a
+    session, and share the connection pool in http.py.
+    """
+    from supabase_auth import SyncGoTrueClient
+
+    return SyncGoTrueClient(
+        url=f"{settings.SUPABASE_URL}/auth/v1",
+        headers={
+            "apiKey": settings.SUPABASE_KEY,
+            "Authorization": f"Bearer {settings.SUPABASE_KEY}",
+        },
+        persist_session=False,
+        auto_refresh_token=False,
+        http_client=http_client.resolve(),
+        flow_type="pkce",
+    )
+
+def check_supabase() -> dict:
+    """Readiness check: GoTrue's health endpoint answers without touching the database"""
+    response = http_client.get(
+        f"{settings.SUPABASE_URL}/auth/v1/health",
+        headers={"apiKey": settings.SUPABASE_KEY},
+        timeout=settings.HEALTH_CHECK_TIMEOUT_SECONDS
+    )
+    response.raise_for_status()
+    return {"pool": pool_stats()}
@@ -0,0 +1,163 @@
+import httpx
+import requests
+import time
+from .settings import settings
+from .lazy import LazyProxy
+from ..services.metrics_service import metrics, record_upstream
+
+def build_timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+        read=settings.HTTP_READ_TIMEOUT_SECONDS,
+        write=settings.HTTP_WRITE_TIMEOUT_SECONDS,
+        pool=settings.HTTP_POOL_TIMEOUT_SECONDS
+    )
+
+def build_transport() -> httpx.HTTPTransport:
+    # Transport-level retries only cover failed connection attempts, so they are safe for writes
+    return httpx.HTTPTransport(
+        http2=settings.HTTP2_ENABLED,
+        retries=settings.HTTP_RETRIES,
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS
+        )
+    )
+
+def describe_supabase_request(request: httpx.Request):
+    """Map a Supabase request to (upstream, operation) labels, e.g. ("postgrest", "GET articles")"""
+    parts = request.url.path.strip("/").split("/")
+    service = parts[0] if parts else ""
+    if service == "rest":
+        upstream = "postgrest"
+        target = "/".join(parts[2:4]) if len(parts) > 2 and parts[2] == "rpc" else (parts[2] if len(parts) > 2 else "")
+    elif service == "auth":
+        upstream = "gotrue"
+        target = "admin/users" if len(parts) > 2 and parts[2] == "admin" else "/".join(parts[2:3])
+    elif service == "storage":
+        upstream = "storage"
+        target = "/".join(parts[2:3])
+    else:
+        upstream = "supabase"
+        target = service
+    return upstream, f"{request.method} {target}"
+
+class TimedByteStream(httpx.SyncByteStream):
+    """Response body stream that reports the call once the body has been read"""
+
+    def __init__(self, stream: httpx.SyncByteStream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+
+    def __iter__(self):
+        for chunk in self._stream:
+            yield chunk
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            if self._on_close:
+                self._on_close()
+                self._on_close = None
+
+class InstrumentedTransport(httpx.BaseTransport):
+    """Records every Supabase call, body included, in the upstream metrics and the current request's timing"""
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self.transport = transport
+
+    @property
+    def pool(self):
+        # None when the wrapped transport has no pool (e.g. a test stand-in)
+        return getattr(self.transport, "_pool", None)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        upstream, operation = describe_supabase_request(request)
+        started = time.perf_counter()
+        try:
+            response = self.transport.handle_request(request)
+        except Exception:
+            record_upstream(upstream, operation, time.perf_counter() - started, "error")
+            raise
+
+        outcome = "ok" if response.status_code < 400 else str(response.status_code)
+
+        def finish():
+            record_upstream(upstream, operation, time.perf_counter() - started, outcome)
+
+        if isinstance(response.stream, httpx.ByteStream):
+            # Body is already in memory (e.g. a mocked transport); nothing left to time
+            finish()
+        else:
+            response.stream = TimedByteStream(response.stream, finish)
+        return response
+
+    def close(self) -> None:
+        self.transport.close()
+
+class SharedHttpClient(httpx.Client):
+    # GoTrue closes its client through the async-style name
+    def aclose(self) -> None:
+        self.close()
+
+def build_http_client() -> SharedHttpClient:
+    return SharedHttpClient(
+        transport=InstrumentedTransport(build_transport()),
+        timeout=build_timeout(),
+        follow_redirects=True
+    )
+
+# One connection pool for every Supabase call: PostgREST, Storage and GoTrue,
+# for both the anon and service-role clients and the per-request auth clients.
+# Built on first use so importing the app does not pay for TLS setup.
+http_client = LazyProxy(build_http_client)
+
+def configure_requests_session(session: requests.Session) -> None:
+    """Apply the shared pool size to a requests session (used for FCM).
+
+    The default adapter keeps 10 connections per host, so FCM multicasts
+    (one thread per message) keep opening and discarding connections.
+    Retry settings already mounted on the session are kept.
+    """
+    for prefix in ("https://", "http://"):
+        current = session.get_adapter(prefix)
+        session.mount(prefix, requests.adapters.HTTPAdapter(
+            pool_connections=settings.HTTP_POOL_MAX_KEEPALIVE,
+            pool_maxsize=settings.HTTP_POOL_MAX_CONNECTIONS,
+            max_retries=current.max_retries
+        ))
+
+def pool_stats() -> dict:
+    """Utilization of the shared Supabase connection pool"""
+    pool = http_client._transport.pool if http_client.initialized else None
+    connections = list(pool.connections) if pool else []
+    requests_in_pool = list(pool._requests) if pool else []
+    queued = sum(1 for request in requests_in_pool if request.is_queued())
+    return {
+        "max_connections": settings.HTTP_POOL_MAX_CONNECTIONS,
+        "connections": len(connections),
+        "idle_connections": sum(1 for connection in connections if connection.is_idle()),
+        "active_requests": len(requests_in_pool) - queued,
+        "queued_requests": queued,
+        "http2": settings.HTTP2_ENABLED
+    }
+
+metrics.gauge(
+    "supabase_http_pool",
+    "Shared Supabase connection pool usage",
+    ("state",),
+    lambda: {(key,): value for key, value in pool_stats().items() if key != "http2"}
+)
+
+def requests_pool_stats(session: requests.Session) -> dict:
+    """Connection counts for a requests session's urllib3 pools"""
+    adapter = session.get_adapter("https://")
+    pools = [adapter.poolmanager.pools[key] for key in adapter.poolmanager.pools.keys()]
+    return {
+        "max_connections": adapter._pool_maxsize,
+        "hosts": len(pools),
+        "connections_opened": sum(pool.num_connections for pool in pools),
+        "requests": sum(pool.num_requests for pool in pools)
+    }
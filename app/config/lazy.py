@@ -0,0 +1,31 @@
+from typing import Any, Callable
+import threading
+
+class LazyProxy:
+    """Stands in for an expensive object that is only built on first use.
+
+    Attribute access is forwarded to the real object, created by `factory`
+    exactly once even under concurrent first use. Use resolve() where the real
+    object itself is needed (e.g. to pass it to a library).
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        self._factory = factory
+        self._instance = None
+        self._lock = threading.Lock()
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+
+    def resolve(self) -> Any:
+        instance = self._instance
+        if instance is None:
+            with self._lock:
+                instance = self._instance
+                if instance is None:
+                    instance = self._instance = self._factory()
+        return instance
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.resolve(), name)
@@ -1,3 +1,4 @@
+import json
 import os
 from dotenv import load_dotenv
 load_dotenv()
@@ -12,5 +13,94 @@ class Settings:
         self.JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
         self.DATABASE_URL = os.getenv("DATABASE_URL", "")
         self.ENVIRONMENT = os.getenv("ENVIRONMENT", "development")
+        self.ROLE_REGISTRY_TTL_SECONDS = float(os.getenv("ROLE_REGISTRY_TTL_SECONDS", "300"))
+        # Invalidation is per process: other workers honor a logout, ban or role change only once these expire
+        self.AUTH_TOKEN_CACHE_TTL_SECONDS = float(os.getenv("AUTH_TOKEN_CACHE_TTL_SECONDS", "5"))
+        self.PROFILE_CACHE_TTL_SECONDS = float(os.getenv("PROFILE_CACHE_TTL_SECONDS", "5"))
+        self.SESSION_CACHE_MAX_ENTRIES = int(os.getenv("SESSION_CACHE_MAX_ENTRIES", "10000"))
+        self.TAXONOMY_CACHE_TTL_SECONDS = float(os.getenv("TAXONOMY_CACHE_TTL_SECONDS", "300"))
+        self.ARTICLE_BATCH_MAX_IDS = int(os.getenv("ARTICLE_BATCH_MAX_IDS", "100"))
+        self.FEED_CHANNELS_CACHE_TTL_SECONDS = float(os.getenv("FEED_CHANNELS_CACHE_TTL_SECONDS", "300"))
+        # Writes update only this worker's cache: others may show a stale is_bookmarked until it expires
+        self.BOOKMARK_CACHE_TTL_SECONDS = float(os.getenv("BOOKMARK_CACHE_TTL_SECONDS", "5"))
+        self.COUNTER_FLUSH_INTERVAL_SECONDS = float(os.getenv("COUNTER_FLUSH_INTERVAL_SECONDS", "10"))
+        self.COUNTER_FLUSH_BATCH_SIZE = int(os.getenv("COUNTER_FLUSH_BATCH_SIZE", "500"))
+        # Distinct counters buffered at most, e.g. while apply_counter_deltas is not deployed; more are dropped
+        self.COUNTER_MAX_PENDING = int(os.getenv("COUNTER_MAX_PENDING", "100000"))
+        self.COMMENT_WRITE_BEHIND_ENABLED = os.getenv("COMMENT_WRITE_BEHIND_ENABLED", "true").lower() == "true"
+        self.COMMENT_FLUSH_INTERVAL_SECONDS = float(os.getenv("COMMENT_FLUSH_INTERVAL_SECONDS", "0.5"))
+        self.COMMENT_FLUSH_BATCH_SIZE = int(os.getenv("COMMENT_FLUSH_BATCH_SIZE", "200"))
+        self.COMMENT_MAX_PENDING = int(os.getenv("COMMENT_MAX_PENDING", "10000"))
+        self.COMMENT_ARTICLE_CACHE_TTL_SECONDS = float(os.getenv("COMMENT_ARTICLE_CACHE_TTL_SECONDS", "300"))
+        self.COMMENT_RATE_PER_MINUTE = float(os.getenv("COMMENT_RATE_PER_MINUTE", "6"))
+        self.COMMENT_BURST = float(os.getenv("COMMENT_BURST", "10"))
+        # Token buckets live in this process unless RATE_LIMIT_BACKEND=redis (needs the redis package)
+        self.RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+        self.RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "")
+        self.RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+        # Per-IP / per-user route limits (see rate_limit_service.ROUTE_RATE_LIMITS) and load shedding
+        self.RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+        self.RATE_LIMITS = json.loads(os.getenv("RATE_LIMITS", "{}"))
+        # Reverse proxies in front of the app that append to X-Forwarded-For (0: use the socket peer)
+        self.TRUSTED_PROXY_HOPS = int(os.getenv("TRUSTED_PROXY_HOPS", "0"))
+        self.LOAD_SHED_MAX_IN_FLIGHT = int(os.getenv("LOAD_SHED_MAX_IN_FLIGHT", "200"))
+        self.LOAD_SHED_RETRY_AFTER_SECONDS = int(os.getenv("LOAD_SHED_RETRY_AFTER_SECONDS", "5"))
+        self.EVENT_MAX_CONNECTIONS = int(os.getenv("EVENT_MAX_CONNECTIONS", "20000"))
+        self.EVENT_MAX_CONNECTIONS_PER_CLIENT = int(os.getenv("EVENT_MAX_CONNECTIONS_PER_CLIENT", "10"))
+        self.EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+        self.EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "25"))
+        self.EVENT_RETRY_MILLISECONDS = int(os.getenv("EVENT_RETRY_MILLISECONDS", "5000"))
+        self.IDEMPOTENCY_ENABLED = os.getenv("IDEMPOTENCY_ENABLED", "true").lower() == "true"
+        self.IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+        self.IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+        # Largest request body accepted, and response stored, for an Idempotency-Key request
+        self.IDEMPOTENCY_MAX_BODY_BYTES = int(os.getenv("IDEMPOTENCY_MAX_BODY_BYTES", "65536"))
+        self.RANKING_HALF_LIFE_HOURS = float(os.getenv("RANKING_HALF_LIFE_HOURS", "6"))
+        self.RANKING_FLUSH_INTERVAL_SECONDS = float(os.getenv("RANKING_FLUSH_INTERVAL_SECONDS", "10"))
+        self.RANKING_RELOAD_INTERVAL_SECONDS = float(os.getenv("RANKING_RELOAD_INTERVAL_SECONDS", "900"))
+        self.RANKING_MAX_ARTICLES = int(os.getenv("RANKING_MAX_ARTICLES", "2000"))
+        self.RANKING_TOP_SIZE = int(os.getenv("RANKING_TOP_SIZE", "100"))
+        self.RELATED_MAX_ARTICLES = int(os.getenv("RELATED_MAX_ARTICLES", "3000"))
+        self.RELATED_MAX_TERMS = int(os.getenv("RELATED_MAX_TERMS", "2048"))
+        self.RELATED_TOP_SIZE = int(os.getenv("RELATED_TOP_SIZE", "10"))
+        self.RELATED_REBUILD_INTERVAL_SECONDS = float(os.getenv("RELATED_REBUILD_INTERVAL_SECONDS", "3600"))
+        self.HEALTH_CHECK_INTERVAL_SECONDS = float(os.getenv("HEALTH_CHECK_INTERVAL_SECONDS", "5"))
+        self.HEALTH_CHECK_TIMEOUT_SECONDS = float(os.getenv("HEALTH_CHECK_TIMEOUT_SECONDS", "2"))
+        self.SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "False").lower() == "true"
+        self.WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "True").lower() == "true"
+        self.BACKGROUND_WORKERS = int(os.getenv("BACKGROUND_WORKERS", "2"))
+        self.BACKGROUND_QUEUE_SIZE = int(os.getenv("BACKGROUND_QUEUE_SIZE", "1000"))
+        self.BACKGROUND_DRAIN_TIMEOUT_SECONDS = float(os.getenv("BACKGROUND_DRAIN_TIMEOUT_SECONDS", "10"))
+
+        # Upstream call budgets per route: off, log, or raise (respond 500; for tests)
+        self.UPSTREAM_CALL_BUDGET_MODE = os.getenv("UPSTREAM_CALL_BUDGET_MODE", "log").lower()
+        self.UPSTREAM_CALL_BUDGET_DEFAULT = int(os.getenv("UPSTREAM_CALL_BUDGET_DEFAULT", "10"))
+        self.UPSTREAM_CALL_BUDGETS = json.loads(os.getenv("UPSTREAM_CALL_BUDGETS", "{}"))
+        self.UPSTREAM_CALLS_HEADER_ENABLED = os.getenv("UPSTREAM_CALLS_HEADER_ENABLED", "False").lower() == "true"
+
+        # Outbound HTTP (Supabase and FCM)
+        self.HTTP_POOL_MAX_CONNECTIONS = int(os.getenv("HTTP_POOL_MAX_CONNECTIONS", "100"))
+        self.HTTP_POOL_MAX_KEEPALIVE = int(os.getenv("HTTP_POOL_MAX_KEEPALIVE", "20"))
+        self.HTTP_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "60"))
+        self.HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+        self.HTTP_READ_TIMEOUT_SECONDS = float(os.getenv("HTTP_READ_TIMEOUT_SECONDS", "30"))
+        self.HTTP_WRITE_TIMEOUT_SECONDS = float(os.getenv("HTTP_WRITE_TIMEOUT_SECONDS", "30"))
+        self.HTTP_POOL_TIMEOUT_SECONDS = float(os.getenv("HTTP_POOL_TIMEOUT_SECONDS", "5"))
+        self.HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "True").lower() == "true"
+        self.HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+
+        # Response compression
+        self.COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "True").lower() == "true"
+        self.COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+        self.COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+        self.COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+        self.COMPRESSION_CONTENT_TYPES = [
+            content_type.strip()
+            for content_type in os.getenv(
+                "COMPRESSION_CONTENT_TYPES",
+                "application/json,text/html,text/plain,text/css,application/javascript"
+            ).split(",")
+            if content_type.strip()
+        ]
 
 settings = Settings()
\ No newline at end of file
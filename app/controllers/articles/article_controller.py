@@ -1,18 +1,28 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import Optional
 from ...models.schemas import ArticleCreate, CommentCreate, StandardResponse
 from ...services.article_service import ArticleService
 from ...services.notification_service import notification_service
-from ...middleware.auth import require_admin, require_author, require_reader
+from ...services.task_service import task_runtime
+from ...services.ranking_service import ranking_service
+from ...services.related_service import related_service
+from ...services.bookmark_service import bookmark_service
+from ...services.comment_service import comment_limiter
+from ...services.event_service import event_broker
+from ...services.rate_limit_service import RateLimitExceeded
+from ...middleware.auth import require_admin, require_author, require_reader, get_optional_user
 from ...config.database import supabase
+from ...config.settings import settings
+from ..responses import FastJSONRoute
 
-router = APIRouter(prefix="/api/v1/articles", tags=["articles"])
+router = APIRouter(prefix="/api/v1/articles", tags=["articles"], route_class=FastJSONRoute)
 
 @router.get("/")
-async def get_articles(page: int = 1, limit: int = 10, category: Optional[int] = None):
-    """Public endpoint to get published articles"""
+async def get_articles(page: int = 1, limit: int = 10, category: Optional[int] = None, current_user = Depends(get_optional_user)):
+    """Public endpoint to get published articles (with is_bookmarked when signed in)"""
     try:
         articles = ArticleService.get_articles(page, limit, category)
+        bookmark_service.annotate(articles, current_user and current_user.id)
         return StandardResponse(
             success=True,
             data={"articles": articles, "page": page, "limit": limit},
@@ -22,10 +32,11 @@ async def get_articles(page: int = 1, limit: int = 10, category: Optional[int] =
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/search")
-async def search_articles(q: str, page: int = 1, limit: int = 10):
-    """Public endpoint to search published articles"""
+async def search_articles(q: str, page: int = 1, limit: int = 10, current_user = Depends(get_optional_user)):
+    """Public endpoint to search published articles (with is_bookmarked when signed in)"""
     try:
         articles = ArticleService.search_articles(q, page, limit)
+        bookmark_service.annotate(articles, current_user and current_user.id)
         return StandardResponse(
             success=True,
             data={"articles": articles, "page": page, "limit": limit},
@@ -47,16 +58,72 @@ async def get_my_articles(page: int = 1, limit: int = 10, current_user = Depends
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/batch")
+async def get_articles_batch(ids: str, current_user = Depends(get_optional_user)):
+    """Public endpoint to get many published articles by id (comma-separated) in one call.
+    Articles come back in the requested order; ids not found are listed in `missing`."""
+    try:
+        # Repeated ids are returned once
+        article_ids = list(dict.fromkeys(article_id.strip() for article_id in ids.split(",") if article_id.strip()))
+        if not article_ids:
+            raise HTTPException(status_code=400, detail="ids is required")
+        if len(article_ids) > settings.ARTICLE_BATCH_MAX_IDS:
+            raise HTTPException(status_code=400, detail=f"At most {settings.ARTICLE_BATCH_MAX_IDS} ids per request")
+
+        articles, missing = ArticleService.get_articles_by_ids(article_ids)
+        bookmark_service.annotate(articles, current_user and current_user.id)
+        return StandardResponse(
+            success=True,
+            data={"articles": articles, "missing": missing},
+            message="Articles retrieved"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/trending")
+async def get_trending_articles(
+    sort: str = "trending",
+    channel_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    limit: int = Query(20, ge=1, le=100)
+):
+    """Public endpoint: trending (time-decayed views) or most-read published articles,
+    globally or within a channel or category"""
+    try:
+        articles = ranking_service.top(sort, channel_id, category_id, limit)
+        # Rankings load off the request path; until then the list is empty
+        if not ranking_service.ready and ranking_service.request_reload():
+            task_runtime.enqueue("ranking_reload", ranking_service.reload)
+        return StandardResponse(
+            success=True,
+            data={"articles": articles, "sort": sort},
+            message="Trending articles retrieved"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/{article_id}")
-async def get_article(article_id: str):
-    """Public endpoint to get a specific published article"""
+async def get_article(article_id: str, related: int = Query(0, ge=0, le=20), current_user = Depends(get_optional_user)):
+    """Public endpoint to get a specific published article.
+    Pass related=N to include up to N related articles."""
     try:
         article = ArticleService.get_article(article_id)
         if not article:
             raise HTTPException(status_code=404, detail="Article not found")
+        bookmark_service.annotate([article], current_user and current_user.id)
+        data = {"article": article}
+        if related:
+            data["related"] = related_service.related(article["id"], related) or []
+            # The index is built off the request path; until then the block is empty
+            if not related_service.ready and related_service.request_build():
+                task_runtime.enqueue("related_rebuild", related_service.rebuild)
         return StandardResponse(
             success=True,
-            data={"article": article},
+            data=data,
             message="Article retrieved"
         )
     except Exception as e:
@@ -86,17 +153,19 @@ async def create_article(article_data: ArticleCreate, current_user = Depends(req
 
         article = ArticleService.create_article(article_data_dict, current_user.id)
 
-        # Send notification to admins when author creates an article
+        if article.get("status") == "published":
+            task_runtime.enqueue("related_add", related_service.add_article, article["id"])
+
+        # Notify admins when an author creates an article, off the request path
         if current_user.role == 'author':
             author_name = current_user.display_name or current_user.email
-            try:
-                notification_service.notify_admins_new_article(
-                    article_title=article["title"],
-                    author_name=author_name,
-                    article_id=article["id"]
-                )
-            except Exception:
-                pass
+            task_runtime.enqueue(
+                "notify_admins_new_article",
+                notification_service.notify_admins_new_article,
+                article_title=article["title"],
+                author_name=author_name,
+                article_id=article["id"]
+            )
 
         return StandardResponse(
             success=True,
@@ -121,12 +190,19 @@ async def get_comments(article_id: str):
 @router.post("/{article_id}/comments")
 async def add_comment(article_id: str, comment_data: CommentCreate, current_user = Depends(require_reader)):
     try:
+        # Awaited so a Redis-backed limiter does not block the event loop
+        await comment_limiter.check_async(current_user.id)
         comment = ArticleService.add_comment(article_id, comment_data, current_user.id)
+        event_broker.publish(f"article:{article_id}:comments", "comment", comment)
+        # With write-behind the comment is accepted, not yet stored (see CommentIngestor)
+        persisted = not settings.COMMENT_WRITE_BEHIND_ENABLED
         return StandardResponse(
             success=True,
-            data={"comment": comment},
-            message="Comment added"
+            data={"comment": comment, "persisted": persisted},
+            message="Comment added" if persisted else "Comment accepted"
         )
+    except RateLimitExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": e.retry_after_header})
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -149,44 +225,38 @@ async def remove_bookmark(article_id: str, current_user = Depends(require_reader
 @router.put("/{article_id}/status")
 async def update_article_status(article_id: str, status: str, current_user = Depends(require_admin)):
     try:
-        # Get article details before updating for notification
-        article_response = supabase.table("articles").select("*").eq("id", article_id).single().execute()
-        if not article_response.data:
+        article, changed = ArticleService.transition_article_status(article_id, status)
+        if not article:
             raise HTTPException(status_code=404, detail="Article not found")
 
-        article = article_response.data
-
-        # Update the article status
-        updated_article = ArticleService.update_article_status(article_id, status)
-
-        # Send notification to author AND admins if status changed
-        if article.get("user_id") and article.get("status") != status:
-            try:
-                author_response = supabase.table("profiles").select("display_name").eq("user_id", article["user_id"]).single().execute()
-                author_name = author_response.data.get("display_name", "Unknown Author") if author_response.data else "Unknown Author"
-
-                notification_service.notify_author_status_change(
-                    article_title=article["title"],
-                    status=status,
-                    author_user_id=article["user_id"],
-                    article_id=article_id
-                )
+        if changed and status == "published":
+            task_runtime.enqueue("related_add", related_service.add_article, article_id)
 
-                notification_service.notify_admins_status_change(
-                    article_title=article["title"],
-                    status=status,
-                    author_name=author_name,
-                    article_id=article_id
-                )
+        if changed and article.get("user_id"):
+            event_broker.publish(f"user:{article['user_id']}:articles", "status", {
+                "article_id": article_id,
+                "title": article.get("title"),
+                "status": status
+            })
 
-            except Exception:
-                pass
+        # Notify author AND admins only when the status actually changed, off the request path
+        if changed and article.get("user_id"):
+            task_runtime.enqueue(
+                "notify_status_change",
+                notification_service.notify_status_change,
+                article_title=article["title"],
+                status=status,
+                author_user_id=article["user_id"],
+                article_id=article_id
+            )
 
         return StandardResponse(
             success=True,
-            data={"article": updated_article},
-            message=f"Article status updated to {status}"
+            data={"article": article},
+            message=f"Article status updated to {status}" if changed else f"Article status already {status}"
         )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -202,14 +272,6 @@ async def get_all_articles_admin(page: int = 1, limit: int = 10, current_user =
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.put("/{article_id}/status")
-async def update_article_status(article_id: str, status: str, current_user = Depends(require_admin)):
-    try:
-        ArticleService.update_article_status(article_id, status)
-        return StandardResponse(success=True, message=f"Article status updated to {status}")
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
-
 @router.get("/admin/pending")
 async def get_pending_articles(current_user = Depends(require_admin)):
     try:
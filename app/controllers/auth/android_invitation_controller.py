@@ -2,8 +2,10 @@ from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 from typing import Optional
 from app.config.database import supabase, supabase_admin
+from app.services.auth_service import AuthService
+from app.controllers.responses import FastJSONRoute
 
-router = APIRouter(prefix="/api/v1/auth", tags=["android-auth"])
+router = APIRouter(prefix="/api/v1/auth", tags=["android-auth"], route_class=FastJSONRoute)
 
 class VerifyInviteRequest(BaseModel):
     token_hash: str
@@ -17,10 +19,7 @@ async def verify_invite(request: VerifyInviteRequest):
     """Verify invitation token for Android app"""
     try:
         # Verify the invitation token
-        response = supabase.auth.verify_otp({
-            'token_hash': request.token_hash,
-            'type': 'invite'
-        })
+        response = AuthService.verify_invite(request.token_hash)
 
         if response.user is None:
             raise HTTPException(
@@ -76,10 +75,7 @@ async def setup_password(request: SetupPasswordRequest):
         # First verify the token to get user info
         print("Verifying token and getting user info...")
         try:
-            verify_response = supabase.auth.verify_otp({
-                'token_hash': request.token_hash,
-                'type': 'invite'
-            })
+            verify_response = AuthService.verify_invite(request.token_hash)
         except Exception as e:
             print(f"Token verification failed: {str(e)}")
             raise HTTPException(
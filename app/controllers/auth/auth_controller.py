@@ -1,12 +1,16 @@
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPAuthorizationCredentials
 from ...models.schemas import UserRegister, UserLogin, UserProfile, AuthorInvite, UserInvite, UserResponse, StandardResponse, LogoutRequest, GoogleSignInRequest
 from ...services.auth_service import AuthService
-from ...services.role_service import RoleService
-from ...middleware.auth import get_current_user, require_admin, require_author, require_any_auth
+from ...services.role_service import RoleService, role_registry
+from ...middleware.auth import get_current_user, require_admin, require_author, require_any_auth, security, AUTH_PROFILE_COLUMNS
+from ...services.session_cache import session_cache
 from ...config.database import supabase_admin, supabase
+from ..responses import FastJSONRoute
 import secrets
 
-router = APIRouter(prefix="/api/v1/auth", tags=["auth"])
+router = APIRouter(prefix="/api/v1/auth", tags=["auth"], route_class=FastJSONRoute)
 
 @router.post("/register")
 async def register(user_data: UserRegister):
@@ -16,7 +20,7 @@ async def register(user_data: UserRegister):
         if user_data.display_name:
             user_metadata["display_name"] = user_data.display_name
 
-        auth_response = supabase.auth.sign_up({
+        auth_response = AuthService.sign_up({
             "email": user_data.email,
             "password": user_data.password,
             "options": {
@@ -55,20 +59,27 @@ async def register(user_data: UserRegister):
 
 @router.post("/login")
 async def login(user_data: UserLogin):
+    # Sign-in (sync GoTrue client) and the profile query both block: run the whole login off the event loop
+    return await run_in_threadpool(_login, user_data)
+
+def _login(user_data: UserLogin):
     try:
         auth_response = AuthService.login(user_data)
         if auth_response.session:
-            # Check user's role from profiles table
+            # Prime the token cache so the client's first authenticated request is warm
+            session_cache.set_user(
+                auth_response.session.access_token,
+                auth_response.user,
+                auth_response.session.expires_at
+            )
+
+            # Profile and role name in one embedded query
             try:
-                profile_result = supabase.table("profiles").select("role_id, display_name, avatar_url").eq("user_id", auth_response.user.id).execute()
+                profile_result = supabase.table("profiles").select(AUTH_PROFILE_COLUMNS).eq("user_id", auth_response.user.id).execute()
                 if profile_result.data and len(profile_result.data) > 0:
                     profile = profile_result.data[0]
-                    # Get role name from roles table
-                    role_result = supabase.table("roles").select("name").eq("id", profile["role_id"]).execute()
-                    if role_result.data and len(role_result.data) > 0:
-                        user_role = role_result.data[0]["name"]
-                    else:
-                        user_role = "reader"
+                    session_cache.set_profile(auth_response.user.id, profile)
+                    user_role = (profile.get("roles") or {}).get("name") or "reader"
                     display_name = profile.get("display_name")
                     avatar_url = profile.get("avatar_url")
                 else:
@@ -103,14 +114,16 @@ async def login(user_data: UserLogin):
 @router.post("/logout")
 async def logout(
     logout_data: LogoutRequest,
-    current_user = Depends(get_current_user)
+    current_user = Depends(get_current_user),
+    credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     """
     Logout user and optionally set device token to guest mode
     """
     try:
-        # Logout from Supabase auth
-        AuthService.logout()
+        # Revoke only this session; other devices stay signed in
+        AuthService.logout(credentials.credentials)
+        session_cache.invalidate_token(credentials.credentials)
 
         # If fcm_token is provided, set user_id to null (guest mode)
         if logout_data.fcm_token:
@@ -154,6 +167,7 @@ async def update_profile(profile_data: UserProfile, current_user = Depends(get_c
         if update_data:
             update_data["updated_at"] = "now()"
             supabase.table("profiles").update(update_data).eq("user_id", current_user.id).execute()
+            session_cache.invalidate_user(current_user.id)
 
         return StandardResponse(success=True, message="Profile updated")
     except Exception as e:
@@ -163,10 +177,9 @@ async def update_profile(profile_data: UserProfile, current_user = Depends(get_c
 async def invite_user(invite_data: UserInvite, current_user = Depends(require_admin)):
     try:
         # Get role name from role_id
-        role_result = supabase.table("roles").select("name").eq("id", invite_data.role_id).execute()
-        if not role_result.data:
+        role_name = role_registry.get_role_name(invite_data.role_id)
+        if not role_name:
             raise HTTPException(status_code=400, detail="Invalid role_id")
-        role_name = role_result.data[0]["name"]
 
         # Use Supabase's built-in invitation system with admin client
         user_metadata = {
@@ -205,7 +218,7 @@ async def invite_user(invite_data: UserInvite, current_user = Depends(require_ad
 async def refresh_token(refresh_token: str):
     try:
         # Use Supabase to refresh the session
-        auth_response = supabase.auth.refresh_session(refresh_token)
+        auth_response = AuthService.refresh_token(refresh_token)
         if auth_response.session:
             return StandardResponse(
                 success=True,
@@ -235,18 +248,10 @@ async def google_signin(request: GoogleSignInRequest):
         if request.nonce:
             # Use nonce if provided (Credential Manager)
             print("Using nonce-based authentication (Credential Manager)")
-            auth_response = supabase.auth.sign_in_with_id_token({
-                "provider": "google",
-                "token": request.id_token,
-                "nonce": request.nonce
-            })
         else:
             # Don't use nonce (Legacy SDK)
             print("Using ID token authentication without nonce (Legacy SDK)")
-            auth_response = supabase.auth.sign_in_with_id_token({
-                "provider": "google",
-                "token": request.id_token
-            })
+        auth_response = AuthService.google_signin(request.id_token, request.nonce)
         
         print(f"Supabase auth successful")
         print(f"User ID: {auth_response.user.id}")
@@ -289,8 +294,7 @@ def get_or_create_user_from_supabase(supabase_user):
             profile = profile_result.data[0]
             
             # Get role name
-            role_result = supabase.table("roles").select("name").eq("id", profile["role_id"]).execute()
-            role_name = role_result.data[0]["name"] if role_result.data else "reader"
+            role_name = role_registry.get_role_name(profile["role_id"]) or "reader"
             
             return {
                 "id": supabase_user.id,
@@ -305,8 +309,7 @@ def get_or_create_user_from_supabase(supabase_user):
             avatar_url = supabase_user.user_metadata.get("avatar_url")
             
             # Get default reader role
-            role_result = supabase.table("roles").select("id").eq("name", "reader").execute()
-            role_id = role_result.data[0]["id"] if role_result.data else 1
+            role_id = role_registry.get_role_id("reader") or 1
             
             profile_data = {
                 "user_id": supabase_user.id,
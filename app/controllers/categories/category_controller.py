@@ -1,12 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header
+from typing import Optional
 from ...models.schemas import StandardResponse
 from ...services.category_service import CategoryService
 from ...services.channel_service import ChannelService
 from ...services.article_service import ArticleService
+from ...services.taxonomy_service import taxonomy_service
 from ...middleware.auth import require_admin, require_any_auth
 from pydantic import BaseModel
+from ..responses import FastJSONRoute
 
-router = APIRouter(prefix="/api/v1/categories", tags=["categories"])
+router = APIRouter(prefix="/api/v1/categories", tags=["categories"], route_class=FastJSONRoute)
 
 class CategoryCreate(BaseModel):
     name: str
@@ -22,40 +25,38 @@ class ChannelCreate(BaseModel):
     logo_url: str = None
 
 @router.get("/")
-async def get_categories():
+async def get_categories(if_none_match: Optional[str] = Header(None), accept_encoding: Optional[str] = Header(None)):
     """Public endpoint to get all categories"""
     try:
-        categories = CategoryService.get_categories()
-        return StandardResponse(
-            success=True,
-            data={"categories": categories},
-            message="Categories retrieved"
-        )
+        return taxonomy_service.response("categories", if_none_match, accept_encoding)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/{category_id}")
-async def get_category_articles(category_id: int, page: int = 1, limit: int = 10):
-    """Public endpoint to get articles in a specific category"""
+@router.get("/tree")
+async def get_category_tree(if_none_match: Optional[str] = Header(None), accept_encoding: Optional[str] = Header(None)):
+    """Public endpoint to get categories nested by parent_id"""
     try:
-        articles = ArticleService.get_articles(page, limit, category_id)
-        return StandardResponse(
-            success=True,
-            data={"articles": articles, "page": page, "limit": limit},
-            message="Category articles retrieved"
-        )
+        return taxonomy_service.response("category_tree", if_none_match, accept_encoding)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/channels")
-async def get_channels():
-    """Public endpoint to get all active channels"""
+async def get_channels(if_none_match: Optional[str] = Header(None), accept_encoding: Optional[str] = Header(None)):
+    """Public endpoint to get all channels"""
+    try:
+        return taxonomy_service.response("channels", if_none_match, accept_encoding)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/{category_id}")
+async def get_category_articles(category_id: int, page: int = 1, limit: int = 10):
+    """Public endpoint to get articles in a specific category or any of its subcategories"""
     try:
-        channels = ArticleService.get_channels()
+        articles = ArticleService.get_articles(page, limit, category_id)
         return StandardResponse(
             success=True,
-            data={"channels": channels},
-            message="Channels retrieved"
+            data={"articles": articles, "page": page, "limit": limit},
+            message="Category articles retrieved"
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
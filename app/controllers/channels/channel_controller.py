@@ -1,8 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Header
+from typing import Optional
 from ...models.schemas import StandardResponse
 from ...services.channel_service import ChannelService
+from ...services.taxonomy_service import taxonomy_service
 from ...middleware.auth import get_current_user
 from pydantic import BaseModel
+from ..responses import FastJSONRoute
 
 class ChannelCreate(BaseModel):
     name: str
@@ -11,7 +14,7 @@ class ChannelCreate(BaseModel):
     rss_url: str = None
     logo_url: str = None
 
-router = APIRouter(prefix="/api/v1/channels", tags=["channels"])
+router = APIRouter(prefix="/api/v1/channels", tags=["channels"], route_class=FastJSONRoute)
 
 @router.post("/admin/create")
 async def create_channel(
@@ -36,7 +39,9 @@ async def create_channel(
             message="Channel created successfully"
         )
     except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))@router.get("/admin/list")
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/admin/list")
 async def list_channels(current_user = Depends(get_current_user)):
     try:
         if current_user.role != 'admin':
@@ -97,14 +102,9 @@ async def delete_channel(channel_id: int, current_user = Depends(get_current_use
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/public/list")
-async def get_public_channels():
+async def get_public_channels(if_none_match: Optional[str] = Header(None), accept_encoding: Optional[str] = Header(None)):
     try:
-        channels = ChannelService.get_active_channels()
-        return StandardResponse(
-            success=True,
-            data={"channels": channels},
-            message="Active channels retrieved successfully"
-        )
+        return taxonomy_service.response("active_channels", if_none_match, accept_encoding)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -126,10 +126,10 @@ async def follow_channel(channel_id: int, current_user = Depends(get_current_use
         if current_user.role != 'reader':
             raise HTTPException(status_code=403, detail="Reader role required")
         
-        ChannelService.follow_channel(channel_id, current_user.id)
+        followed = ChannelService.follow_channel(channel_id, current_user.id)
         return StandardResponse(
             success=True,
-            message="Channel followed successfully"
+            message="Channel followed successfully" if followed else "Already following this channel"
         )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
+from ...services.event_service import event_broker, ConnectionLimitExceeded, Subscription
+from ...middleware.auth import require_any_auth
+from ...middleware.rate_limit import client_ip
+from ..responses import FastJSONRoute
+
+router = APIRouter(prefix="/api/v1/events", tags=["events"], route_class=FastJSONRoute)
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    # Stop nginx and similar proxies from buffering the stream
+    "X-Accel-Buffering": "no",
+}
+
+class EventStreamResponse(StreamingResponse):
+    """Streams a subscription and releases it however the response ends.
+
+    The subscription is taken before the response so the limits can answer
+    503; the stream's own cleanup only runs once its body has started, so a
+    client gone before then would otherwise keep its slot and queue.
+    """
+
+    def __init__(self, subscription: Subscription):
+        super().__init__(event_broker.stream(subscription), media_type="text/event-stream", headers=SSE_HEADERS)
+        self.subscription = subscription
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            event_broker.unsubscribe(self.subscription)
+
+def open_stream(topic: str, client: str) -> EventStreamResponse:
+    try:
+        subscription = event_broker.subscribe(topic, client)
+    except ConnectionLimitExceeded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    return EventStreamResponse(subscription)
+
+@router.get("/articles/{article_id}/comments")
+async def stream_comments(article_id: str, request: Request):
+    """Server-sent events: a `comment` event for each new comment on the article"""
+    # Behind proxies (see TRUSTED_PROXY_HOPS) the socket peer is the proxy, shared by every viewer
+    return open_stream(f"article:{article_id}:comments", f"ip:{client_ip(request.scope)}")
+
+@router.get("/me/articles")
+async def stream_my_article_status(current_user = Depends(require_any_auth)):
+    """Server-sent events: a `status` event whenever one of your articles changes status"""
+    return open_stream(f"user:{current_user.id}:articles", f"user:{current_user.id}")
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Optional
+from ...models.schemas import StandardResponse
+from ...services.feed_service import feed_service
+from ...services.bookmark_service import bookmark_service
+from ...middleware.auth import require_any_auth
+from ..responses import FastJSONRoute
+
+router = APIRouter(prefix="/api/v1/feed", tags=["feed"], route_class=FastJSONRoute)
+
+@router.get("/")
+async def get_feed(
+    limit: int = Query(20, ge=1, le=50),
+    cursor: Optional[str] = None,
+    current_user = Depends(require_any_auth)
+):
+    """Published articles from followed and subscribed channels, newest first.
+    Pass the returned next_cursor to get the following page."""
+    try:
+        feed = feed_service.get_feed(current_user.id, limit, cursor)
+        bookmark_service.annotate(feed["articles"], current_user.id)
+        return StandardResponse(
+            success=True,
+            data=feed,
+            message="Feed retrieved successfully"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -2,8 +2,9 @@ from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
 from app.models.schemas import StandardResponse
 from app.services.media_service import MediaService
 from app.middleware.auth import get_current_user, require_author_or_reader
+from app.controllers.responses import FastJSONRoute
 
-router = APIRouter(prefix="/api/v1/media", tags=["media"])
+router = APIRouter(prefix="/api/v1/media", tags=["media"], route_class=FastJSONRoute)
 
 @router.post("/upload")
 async def upload_file(
@@ -3,8 +3,9 @@ from typing import Optional, List, Dict
 from ...models.schemas import DeviceTokenRegister, SendNotificationRequest, StandardResponse
 from ...middleware.auth import get_current_user
 from ...config.database import supabase
+from ..responses import FastJSONRoute
 
-router = APIRouter(prefix="/api/v1/notifications", tags=["notifications"])
+router = APIRouter(prefix="/api/v1/notifications", tags=["notifications"], route_class=FastJSONRoute)
 
 @router.post("/set-token")
 async def set_device_token(token_data: DeviceTokenRegister):
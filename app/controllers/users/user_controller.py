@@ -1,23 +1,43 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from ...models.schemas import StandardResponse
 from ...services.article_service import ArticleService
 from ...services.user_service import UserService
+from ...services.bookmark_service import bookmark_service
+from ...config.settings import settings
 from ...middleware.auth import get_current_user, require_admin
+from ..responses import FastJSONRoute
 
-router = APIRouter(prefix="/api/v1/users", tags=["users"])
+router = APIRouter(prefix="/api/v1/users", tags=["users"], route_class=FastJSONRoute)
 
 @router.get("/me/bookmarks")
-async def get_user_bookmarks(current_user = Depends(get_current_user)):
+async def get_user_bookmarks(page: int = Query(1, ge=1), limit: int = Query(20, ge=1, le=100), current_user = Depends(get_current_user)):
     try:
-        bookmarks = ArticleService.get_user_bookmarks(current_user.id)
+        bookmarks = ArticleService.get_user_bookmarks(current_user.id, page, limit)
         return StandardResponse(
             success=True,
-            data={"bookmarks": bookmarks},
+            data={"bookmarks": bookmarks, "page": page, "limit": limit},
             message="Bookmarks retrieved"
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/me/bookmarks/check")
+async def check_bookmarks(ids: str, current_user = Depends(get_current_user)):
+    """Which of the given article ids (comma-separated) the current user has bookmarked"""
+    try:
+        article_ids = list(dict.fromkeys(article_id.strip() for article_id in ids.split(",") if article_id.strip()))
+        if len(article_ids) > settings.ARTICLE_BATCH_MAX_IDS:
+            raise HTTPException(status_code=400, detail=f"At most {settings.ARTICLE_BATCH_MAX_IDS} ids per request")
+        return StandardResponse(
+            success=True,
+            data={"bookmarked": bookmark_service.check(current_user.id, article_ids)},
+            message="Bookmark state retrieved"
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 
 @router.get("/admin/all-profiles")
 async def get_all_user_profiles(role: str = None, current_user = Depends(require_admin)):
@@ -1,13 +1,74 @@
+from contextlib import asynccontextmanager
+import asyncio
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.config.settings import settings
+from app.services.role_service import role_registry
+from app.services.taxonomy_service import taxonomy_service
+from app.config.database import check_supabase, supabase_admin
+from app.services.health_service import health_service
+from app.services.task_service import task_runtime
+from app.services.ranking_service import ranking_service
+from app.services.related_service import related_service
+from app.services.counter_service import counter_service
+from app.services.comment_service import comment_ingestor
+from app.services.event_service import event_broker
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.idempotency import IdempotencyMiddleware, IdempotencyStore
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.services.rate_limit_service import RouteRateLimits
+from app.controllers.responses import FastJSONResponse
+from app.services.metrics_service import metrics
+
+async def warm_up(name: str, step) -> None:
+    # Everything warmed here also initializes lazily, so a failed step is not fatal
+    try:
+        await run_in_threadpool(step)
+    except Exception as e:
+        print(f"Warm-up step {name} failed: {str(e)}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.WARMUP_ON_STARTUP:
+        from app.services.notification_service import NotificationService
+
+        await asyncio.gather(
+            warm_up("supabase_admin", supabase_admin.resolve),
+            warm_up("firebase", NotificationService.ensure_initialized),
+            warm_up("role_registry", role_registry.refresh),
+            warm_up("taxonomy", taxonomy_service.refresh),
+            warm_up("related_index", related_service.rebuild),
+            warm_up("rankings", ranking_service.reload),
+        )
+    await task_runtime.start()
+    try:
+        yield
+    finally:
+        # Open event streams would otherwise hold shutdown until they time out
+        event_broker.close_all()
+        await task_runtime.stop()
 
 app = FastAPI(
     title="News API",
     description="A news management API built with FastAPI and Supabase",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
+if settings.IDEMPOTENCY_ENABLED:
+    # Innermost, so replayed responses still get CORS, compression and metrics
+    app.add_middleware(
+        IdempotencyMiddleware,
+        store=IdempotencyStore(settings.IDEMPOTENCY_TTL_SECONDS, settings.IDEMPOTENCY_MAX_ENTRIES),
+        max_body_bytes=settings.IDEMPOTENCY_MAX_BODY_BYTES
+    )
+if settings.RATE_LIMIT_ENABLED:
+    # Inside CORS, so browsers can read 429/503 responses
+    app.add_middleware(RateLimitMiddleware, limits=RouteRateLimits.from_settings())
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
@@ -15,6 +76,13 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        content_types=settings.COMPRESSION_CONTENT_TYPES
+    )
+app.add_middleware(MetricsMiddleware)
 
 from app.controllers.auth.auth_controller import router as auth_router
 from app.controllers.auth.android_invitation_controller import router as android_invitation_router
@@ -24,6 +92,8 @@ from app.controllers.categories.category_controller import router as category_ro
 from app.controllers.channels.channel_controller import router as channel_router
 from app.controllers.media.media_controller import router as media_router
 from app.controllers.notifications.notification_controller import router as notification_router
+from app.controllers.feed.feed_controller import router as feed_router
+from app.controllers.events.event_controller import router as event_router
 
 app.include_router(auth_router)
 app.include_router(android_invitation_router)
@@ -33,15 +103,47 @@ app.include_router(category_router)
 app.include_router(channel_router)
 app.include_router(media_router)
 app.include_router(notification_router)
+app.include_router(feed_router)
+app.include_router(event_router)
 
 @app.get("/")
 async def root():
     return {"message": "News API is running"}
 
+from app.services.notification_service import notification_service
+
+health_service.register("supabase", check_supabase)
+health_service.register("firebase", notification_service.check_health, critical=False)
+health_service.register("background_tasks", task_runtime.check_health, critical=False)
+
+# Refresh shared caches ahead of expiry so request paths rarely reload them inline
+task_runtime.register_periodic("role_registry_refresh", role_registry.refresh, settings.ROLE_REGISTRY_TTL_SECONDS / 2)
+task_runtime.register_periodic("taxonomy_refresh", taxonomy_service.refresh, settings.TAXONOMY_CACHE_TTL_SECONDS / 2)
+# Buffered article views: rankings and the view_count write-behind (flushed once more on shutdown)
+task_runtime.register_periodic("ranking_flush", ranking_service.flush, settings.RANKING_FLUSH_INTERVAL_SECONDS, run_on_shutdown=True)
+task_runtime.register_periodic("ranking_reload", ranking_service.reload, settings.RANKING_RELOAD_INTERVAL_SECONDS)
+task_runtime.register_periodic("related_rebuild", related_service.rebuild, settings.RELATED_REBUILD_INTERVAL_SECONDS)
+# Before counter_flush, so comment_count corrections from dropped comments go out with it
+task_runtime.register_periodic("comment_flush", comment_ingestor.flush, settings.COMMENT_FLUSH_INTERVAL_SECONDS, run_on_shutdown=True)
+task_runtime.register_periodic("counter_flush", counter_service.flush, settings.COUNTER_FLUSH_INTERVAL_SECONDS, run_on_shutdown=True)
+
 @app.get("/health")
+@app.get("/health/live")
 async def health_check():
+    """Liveness: the process is up and serving; never touches dependencies"""
     return {"status": "healthy", "version": "1.0.0"}
 
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness: cached dependency checks, re-run at most every HEALTH_CHECK_INTERVAL_SECONDS"""
+    readiness = await run_in_threadpool(health_service.readiness)
+    status_code = 503 if readiness["status"] == "unavailable" else 200
+    return JSONResponse(status_code=status_code, content={**readiness, "version": "1.0.0"})
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
@@ -1,8 +1,15 @@
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from typing import Optional
 from ..config.database import supabase
+from ..services.session_cache import session_cache
+from ..services.metrics_service import phase
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+# Profile columns (with the embedded role) that CustomUser is built from
+AUTH_PROFILE_COLUMNS = "role_id, roles!inner(name), display_name, avatar_url, channel_id"
 
 class CustomUser:
     def __init__(self, supabase_user, profile_data):
@@ -13,17 +20,22 @@ class CustomUser:
         self.avatar_url = profile_data.get('avatar_url')
         self.channel_id = profile_data.get('channel_id')
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    try:
-        token = credentials.credentials
+def authenticate(token: str) -> CustomUser:
+    """Resolve a bearer token to a CustomUser, using the session cache where possible"""
+    auth_user = session_cache.get_user(token)
+    if auth_user is None:
         user = supabase.auth.get_user(token)
         if not user.user:
             raise HTTPException(status_code=401, detail="Invalid token")
+        auth_user = user.user
+        session_cache.set_user(token, auth_user)
 
+    profile_data = session_cache.get_profile(auth_user.id)
+    if profile_data is None:
         # Get role and profile data from profiles table (joining with roles table)
         profile_response = supabase.table("profiles")\
-                    .select("role_id, roles!inner(name), display_name, avatar_url, channel_id")\
-                    .eq("user_id", user.user.id)\
+                    .select(AUTH_PROFILE_COLUMNS)\
+                    .eq("user_id", auth_user.id)\
                     .single()\
                     .execute()
 
@@ -31,12 +43,27 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             raise HTTPException(status_code=403, detail="User profile not found. Access denied.")
 
         profile_data = profile_response.data
-        custom_user = CustomUser(user.user, profile_data)
+        session_cache.set_profile(auth_user.id, profile_data)
+
+    return CustomUser(auth_user, profile_data)
 
-        return custom_user
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    try:
+        with phase("auth"):
+            return authenticate(credentials.credentials)
     except Exception as e:
         raise HTTPException(status_code=401, detail=f"Authentication failed: {str(e)}")
 
+async def get_optional_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)):
+    """Current user for public endpoints that personalize their response; None for guests or bad tokens"""
+    if credentials is None:
+        return None
+    try:
+        with phase("auth"):
+            return authenticate(credentials.credentials)
+    except Exception:
+        return None
+
 async def get_current_user_with_role(required_role: str):
     async def role_dependency(current_user = Depends(get_current_user)):
         if current_user.role != required_role:
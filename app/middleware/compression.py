@@ -0,0 +1,124 @@
+from ..config.settings import settings
+from ..services.metrics_service import metrics
+from typing import Iterable, List, Optional
+import gzip
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+compression_bytes = metrics.counter(
+    "http_response_compression_bytes_total",
+    "Response body bytes before and after compression",
+    ("encoding", "stage")
+)
+
+def available_encodings() -> List[str]:
+    """Encodings this process can produce, most preferred first"""
+    return ["br", "gzip"] if brotli is not None else ["gzip"]
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best encoding the client accepts (q=0 means refused), or None"""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    for encoding in available_encodings():
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+def is_compressible(content_type: Optional[str], content_types: Iterable[str]) -> bool:
+    if not content_type:
+        return False
+    media_type = content_type.split(";")[0].strip().lower()
+    return media_type in content_types
+
+class CompressionMiddleware:
+    """Compresses complete response bodies with brotli or gzip.
+
+    Only responses whose media type is in the allowlist and whose body is at
+    least `minimum_size` bytes are compressed. Responses that already carry a
+    Content-Encoding (e.g. precompressed taxonomy bodies) and streamed
+    responses pass through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int, content_types: Iterable[str]):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.content_types = frozenset(content_type.lower() for content_type in content_types)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = None
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept_encoding)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        state = {"start": None, "passthrough": False}
+
+        async def send_compressed(message):
+            if state["passthrough"]:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = {name.lower(): value for name, value in message.get("headers", [])}
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                if b"content-encoding" in headers or not is_compressible(content_type, self.content_types):
+                    state["passthrough"] = True
+                    await send(message)
+                else:
+                    state["start"] = message
+                return
+
+            if message["type"] == "http.response.body":
+                start = state["start"]
+                state["passthrough"] = True
+                body = message.get("body", b"")
+                if message.get("more_body", False) or start is None:
+                    # Streamed responses are sent as produced
+                    if start is not None:
+                        await send(start)
+                    await send(message)
+                    return
+
+                headers = [(name, value) for name, value in start.get("headers", []) if name.lower() != b"content-length"]
+                headers.append((b"vary", b"Accept-Encoding"))
+                if len(body) >= self.minimum_size:
+                    compressed = compress(body, encoding)
+                    compression_bytes.inc(encoding, "original", amount=len(body))
+                    compression_bytes.inc(encoding, "compressed", amount=len(compressed))
+                    body = compressed
+                    headers.append((b"content-encoding", encoding.encode()))
+                headers.append((b"content-length", str(len(body)).encode()))
+                await send({**start, "headers": headers})
+                await send({**message, "body": body})
+                return
+
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
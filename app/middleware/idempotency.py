@@ -0,0 +1,156 @@
+from ..services.metrics_service import metrics
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import json
+import threading
+import time
+
+IDEMPOTENT_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+# Transient refusals: a retry with the same key must run again, not replay them
+RETRYABLE_STATUSES = {409, 429}
+
+idempotency_requests = metrics.counter(
+    "idempotency_requests_total",
+    "Write requests carrying an Idempotency-Key, by how they were handled",
+    ("outcome",)
+)
+
+class IdempotencyStore:
+    """Remembers the response to each (caller, method, path, Idempotency-Key).
+
+    Entries are either in flight (the first request is still running) or
+    completed with a stored response; both expire after the TTL and the
+    least recently used are evicted beyond max_entries.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[str, Optional[Dict[str, Any]], float]]" = OrderedDict()
+
+    def begin(self, key: str, fingerprint: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Claim a key. Returns ("new", None), ("replay", response), ("in_flight", None) or ("mismatch", None)"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._entries[key] = (fingerprint, None, now + self._ttl)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self._max_entries:
+                    self._entries.popitem(last=False)
+                return "new", None
+            stored_fingerprint, response, _ = entry
+            if stored_fingerprint != fingerprint:
+                return "mismatch", None
+            if response is None:
+                return "in_flight", None
+            return "replay", response
+
+    def complete(self, key: str, fingerprint: str, response: Dict[str, Any]) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._entries[key] = (fingerprint, response, time.monotonic() + self._ttl)
+
+    def release(self, key: str) -> None:
+        """Forget a key whose request failed, so the client can retry it"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+def _json_response(status: int, detail: str) -> Tuple[int, list, bytes]:
+    body = json.dumps({"detail": detail}).encode()
+    return status, [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())], body
+
+class IdempotencyMiddleware:
+    """Makes write requests safe to retry with an Idempotency-Key header.
+
+    The first POST/PUT/PATCH/DELETE with a given key (per caller, i.e.
+    Authorization header, and path) runs normally; its response is stored
+    unless it is a 5xx, 409 or 429, so a transient failure or a rate limit
+    can be retried. Repeats with the same key get the stored response back
+    with Idempotent-Replayed: true instead of running again. A repeat while
+    the first is still running gets 409, and reusing a key with a different
+    body gets 422. The body is held in memory to fingerprint it, so keyed
+    requests with bodies over max_body_bytes get 413.
+    """
+
+    def __init__(self, app, store: IdempotencyStore, max_body_bytes: int):
+        self.app = app
+        self.store = store
+        self.max_body_bytes = max_body_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in IDEMPOTENT_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers", []))
+        idempotency_key = headers.get(b"idempotency-key")
+        if not idempotency_key:
+            await self.app(scope, receive, send)
+            return
+
+        # The whole body is needed for the fingerprint; replay it to the app afterwards
+        body = b""
+        while True:
+            message = await receive()
+            body += message.get("body", b"")
+            if len(body) > self.max_body_bytes:
+                idempotency_requests.inc("too_large")
+                status, response_headers, response_body = _json_response(413, "Request body too large for an Idempotency-Key request")
+                await send({"type": "http.response.start", "status": status, "headers": response_headers})
+                await send({"type": "http.response.body", "body": response_body})
+                return
+            if not message.get("more_body", False):
+                break
+
+        caller = hashlib.sha256(headers.get(b"authorization", b"")).hexdigest()
+        key = f"{caller}:{scope['method']}:{scope['path']}:{idempotency_key.decode('latin-1')}"
+        fingerprint = hashlib.sha256(scope.get("query_string", b"") + b"\0" + body).hexdigest()
+
+        outcome, stored = self.store.begin(key, fingerprint)
+        idempotency_requests.inc(outcome)
+        if outcome != "new":
+            if outcome == "replay":
+                status, response_headers, response_body = stored["status"], stored["headers"] + [(b"idempotent-replayed", b"true")], stored["body"]
+            elif outcome == "in_flight":
+                status, response_headers, response_body = _json_response(409, "A request with this Idempotency-Key is still in progress")
+            else:
+                status, response_headers, response_body = _json_response(422, "Idempotency-Key was already used with a different request")
+            await send({"type": "http.response.start", "status": status, "headers": response_headers})
+            await send({"type": "http.response.body", "body": response_body})
+            return
+
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if body_sent:
+                return await receive()
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        response = {"status": 500, "headers": [], "body": b""}
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                response["body"] += message.get("body", b"")
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except Exception:
+            self.store.release(key)
+            raise
+
+        if response["status"] >= 500 or response["status"] in RETRYABLE_STATUSES or len(response["body"]) > self.max_body_bytes:
+            self.store.release(key)
+        else:
+            self.store.complete(key, fingerprint, response)
@@ -0,0 +1,79 @@
+from ..config.settings import settings
+from ..services.metrics_service import RequestTiming, current_request, request_duration
+from ..services.query_budget import check_budget
+import json
+import time
+
+class MetricsMiddleware:
+    """Records per-route latency and, optionally, a Server-Timing header.
+
+    Each request gets a RequestTiming in a context variable; upstream calls
+    and named phases made while serving it add their durations there.
+    Routes are labelled by their path template so ids do not explode the
+    label set.
+
+    The same timing counts upstream calls. When the response starts, the
+    count is checked against the route's budget (see query_budget); in
+    "raise" mode an overrun replaces the response with a 500 so tests fail.
+    X-Upstream-Calls reports the counts when enabled.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        token = current_request.set(timing)
+        status = {"code": 500, "replaced": False, "stream": False}
+
+        async def send_with_timing(message):
+            if status["replaced"]:
+                return
+            if message["type"] == "http.response.start":
+                route = scope.get("route")
+                overrun = None
+                if route is not None:
+                    overrun = check_budget(scope["method"], route.path, timing.upstream_calls)
+                if overrun and settings.UPSTREAM_CALL_BUDGET_MODE == "raise":
+                    status["replaced"] = True
+                    status["code"] = 500
+                    body = json.dumps({"detail": f"Upstream call budget exceeded: {overrun}"}).encode()
+                    await send({
+                        "type": "http.response.start",
+                        "status": 500,
+                        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+                    })
+                    await send({"type": "http.response.body", "body": body})
+                    return
+
+                status["code"] = message["status"]
+                headers = list(message.get("headers", []))
+                status["stream"] = any(
+                    name == b"content-type" and value.startswith(b"text/event-stream") for name, value in headers
+                )
+                if settings.SERVER_TIMING_ENABLED:
+                    headers.append((b"server-timing", timing.server_timing().encode()))
+                if settings.UPSTREAM_CALLS_HEADER_ENABLED:
+                    breakdown = "".join(f", {upstream}={count}" for upstream, count in sorted(timing.upstream_calls.items()))
+                    headers.append((b"x-upstream-calls", f"total={timing.total_calls()}{breakdown}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            # Event streams stay open for hours; their duration is not request latency
+            if not status["stream"]:
+                request_duration.observe(
+                    time.perf_counter() - timing.started_at,
+                    scope["method"],
+                    route_path,
+                    str(status["code"])
+                )
+            current_request.reset(token)
@@ -0,0 +1,132 @@
+from ..config.settings import settings
+from ..services.metrics_service import metrics
+from ..services.rate_limit_service import RateLimitExceeded, RouteRateLimits
+from typing import Optional
+import hashlib
+import json
+import threading
+
+# Not shed: probes and scrapes must keep working under load, and event
+# streams are long-lived and capped by the event broker instead
+SHED_EXEMPT_PREFIXES = ("/health", "/metrics", "/api/v1/events/")
+
+requests_shed = metrics.counter(
+    "load_shed_total",
+    "Requests rejected with 503 because too many were already in flight",
+    ()
+)
+
+class InFlightRequests:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.count = 0
+
+        metrics.gauge(
+            "http_requests_in_flight",
+            "Requests currently being served, excluding shed-exempt paths",
+            (),
+            lambda: {(): self.count}
+        )
+
+    def try_enter(self, limit: int) -> bool:
+        """Count a request in unless `limit` (0 = unlimited) are already in flight"""
+        with self._lock:
+            if limit and self.count >= limit:
+                return False
+            self.count += 1
+            return True
+
+    def leave(self) -> None:
+        with self._lock:
+            self.count -= 1
+
+# Create singleton instance
+in_flight = InFlightRequests()
+
+def client_ip(scope) -> str:
+    """The caller's address, TRUSTED_PROXY_HOPS entries from the right of X-Forwarded-For.
+
+    Proxies append to the header, so entries left of the ones our own
+    proxies added are whatever the client sent and cannot be trusted.
+    """
+    hops = settings.TRUSTED_PROXY_HOPS
+    if hops > 0:
+        forwarded = [
+            value.strip()
+            for name, header in scope.get("headers", [])
+            if name == b"x-forwarded-for"
+            for value in header.decode("latin-1").split(",")
+            if value.strip()
+        ]
+        if forwarded:
+            # Fewer entries than hops: every entry came from a trusted proxy
+            return forwarded[-min(hops, len(forwarded))]
+    client = scope.get("client")
+    return client[0] if client else "unknown"
+
+async def _reject(send, status: int, detail: str, retry_after: str) -> None:
+    body = json.dumps({"detail": detail}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", retry_after.encode())
+        ]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+class RateLimitMiddleware:
+    """Load shedding plus per-IP and per-user token buckets per route.
+
+    Beyond LOAD_SHED_MAX_IN_FLIGHT concurrent requests, new ones get 503
+    with Retry-After straight away rather than queueing behind the rest.
+    Routes in ROUTE_RATE_LIMITS / RATE_LIMITS then get 429 with
+    Retry-After once the caller's IP or bearer token runs out of tokens.
+    The user key is a hash of the token, not a verified identity, so the
+    IP bucket still bounds callers that rotate tokens; the IP comes from
+    client_ip(). Buckets are shared across workers when
+    RATE_LIMIT_BACKEND=redis.
+    """
+
+    def __init__(self, app, limits: RouteRateLimits):
+        self.app = app
+        self.limits = limits
+
+    @staticmethod
+    def user_key(headers) -> Optional[str]:
+        authorization = headers.get(b"authorization", b"")
+        if not authorization.lower().startswith(b"bearer "):
+            return None
+        return hashlib.sha256(authorization[7:].strip()).hexdigest()[:32]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        if path.startswith(SHED_EXEMPT_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+
+        if not in_flight.try_enter(settings.LOAD_SHED_MAX_IN_FLIGHT):
+            requests_shed.inc()
+            await _reject(send, 503, "Server is busy, retry later", str(settings.LOAD_SHED_RETRY_AFTER_SECONDS))
+            return
+        try:
+            rule = self.limits.match(scope["method"], path)
+            if rule is not None:
+                headers = dict(scope.get("headers", []))
+                keys = {"ip": client_ip(scope), "user": self.user_key(headers)}
+                try:
+                    for kind, limiter in rule.limiters.items():
+                        if keys.get(kind):
+                            await limiter.check_async(keys[kind])
+                except RateLimitExceeded as e:
+                    await _reject(send, 429, str(e), e.retry_after_header)
+                    return
+            await self.app(scope, receive, send)
+        finally:
+            in_flight.leave()
@@ -1,5 +1,25 @@
 from ..config.database import supabase
+from ..config.settings import settings
 from ..models.schemas import ArticleCreate, CommentCreate
+from .taxonomy_service import taxonomy_service
+from .feed_service import feed_service
+from .ranking_service import ranking_service, CARD_COLUMNS
+from .bookmark_service import bookmark_service
+from .counter_service import counter_service
+from .related_service import related_service
+from .comment_service import comment_ingestor
+from .metrics_service import phase
+from typing import List
+import uuid
+
+# Moderation state machine: current status -> statuses it may move to
+ARTICLE_STATUS_TRANSITIONS = {
+    "draft": {"pending_review", "approved", "published", "rejected"},
+    "pending_review": {"draft", "approved", "published", "rejected"},
+    "approved": {"pending_review", "published", "rejected"},
+    "published": {"draft", "rejected"},
+    "rejected": {"draft", "pending_review", "approved", "published"},
+}
 
 class ArticleService:
     @staticmethod
@@ -7,25 +27,24 @@ class ArticleService:
         try:
             offset = (page - 1) * limit
             
+            columns = "*, article_categories(*), channels(*)"
             if category:
-                # First get article_ids that belong to the category
-                category_articles = supabase.table("article_categories").select("article_id").eq("category_id", category).execute()
-                article_ids = [item["article_id"] for item in category_articles.data]
-                
-                if not article_ids:
-                    return []
-                
-                # Then get articles with those IDs
-                response = supabase.table("articles").select(
-                    "*, article_categories(*), channels(*)"
-                ).eq("status", "published").in_("id", article_ids).order("created_at", desc=True).range(offset, offset + limit - 1).execute()
-            else:
-                # Get all published articles
-                response = supabase.table("articles").select(
-                    "*, article_categories(*), channels(*)"
-                ).eq("status", "published").order("created_at", desc=True).range(offset, offset + limit - 1).execute()
-            
-            return response.data
+                # Extra inner-joined embed used only for filtering, so article_categories stays complete
+                columns += ", category_filter:article_categories!inner(category_id)"
+
+            query = supabase.table("articles").select(columns).eq("status", "published")
+
+            if category:
+                # Match the category or any of its descendants in the same query
+                category_ids = taxonomy_service.snapshot().category_with_descendants(category)
+                query = query.in_("category_filter.category_id", category_ids)
+
+            response = query.order("created_at", desc=True).range(offset, offset + limit - 1).execute()
+
+            if category:
+                for article in response.data:
+                    article.pop("category_filter", None)
+            return counter_service.overlay("articles", response.data)
         except Exception as e:
             raise e
 
@@ -37,12 +56,49 @@ class ArticleService:
             ).eq("id", article_id).single().execute()
 
             if response.data:
-                supabase.table("articles").update({"view_count": (response.data["view_count"] or 0) + 1}).eq("id", article_id).execute()
+                # Buffered; view_count is written behind by the ranking flush
+                ranking_service.record_view(response.data)
+                counter_service.overlay("articles", [response.data])
 
             return response.data
         except Exception as e:
             raise e
 
+    @staticmethod
+    def get_articles_by_ids(article_ids: List[str]):
+        """Fetch many published articles in one query, in the requested order.
+
+        Returns (articles, missing_ids); repeated ids are returned once, and ids
+        that are malformed, unknown or not published are reported as missing.
+        Views are not counted.
+        """
+        try:
+            requested = list(dict.fromkeys(article_ids))
+            normalized = {}
+            for article_id in requested:
+                try:
+                    normalized[article_id] = str(uuid.UUID(article_id))
+                except ValueError:
+                    pass
+
+            found = {}
+            if normalized:
+                response = supabase.table("articles").select(
+                    "*, article_categories(*), channels(*)"
+                ).in_("id", sorted(set(normalized.values()))).eq("status", "published").execute()
+                found = {str(article["id"]): article for article in counter_service.overlay("articles", response.data)}
+
+            articles, missing = [], []
+            for article_id in requested:
+                article = found.get(normalized.get(article_id))
+                if article is None:
+                    missing.append(article_id)
+                else:
+                    articles.append(article)
+            return articles, missing
+        except Exception as e:
+            raise e
+
     @staticmethod
     def get_user_profile(user_id: str):
         try:
@@ -113,6 +169,8 @@ class ArticleService:
             response = supabase.table("articles").update({
                 "status": "rejected"
             }).eq("id", article_id).execute()
+            ranking_service.discard(article_id)
+            related_service.discard(article_id)
             return response.data[0] if response.data else None
         except Exception as e:
             raise e
@@ -131,31 +189,36 @@ class ArticleService:
     @staticmethod
     def get_comments(article_id: str):
         try:
+            # Taken before the query: a row flushed in between shows up in one or both
+            pending = comment_ingestor.pending_for(article_id)
+
             # Get comments with basic data
             response = supabase.table("comments").select(
                 "id, user_id, article_id, body, created_at"
             ).eq("article_id", article_id).order("created_at", desc=True).execute()
 
-            comments = response.data
+            stored_ids = {comment['id'] for comment in response.data}
+            comments = [comment for comment in pending if comment['id'] not in stored_ids] + response.data
             if comments:
-                # Get user IDs from comments
-                user_ids = list(set([comment['user_id'] for comment in comments]))
+                with phase("enrich_profiles"):
+                    # Get user IDs from comments
+                    user_ids = list(set([comment['user_id'] for comment in comments]))
 
-                # Fetch profiles for these users
-                profiles_response = supabase.table("profiles").select(
-                    "user_id, display_name, avatar_url"
-                ).in_("user_id", user_ids).execute()
+                    # Fetch profiles for these users
+                    profiles_response = supabase.table("profiles").select(
+                        "user_id, display_name, avatar_url"
+                    ).in_("user_id", user_ids).execute()
 
-                # Create a lookup map for profiles
-                profiles_map = {profile['user_id']: profile for profile in profiles_response.data}
+                    # Create a lookup map for profiles
+                    profiles_map = {profile['user_id']: profile for profile in profiles_response.data}
 
-                # Attach profile info to each comment
-                for comment in comments:
-                    user_id = comment['user_id']
-                    if user_id in profiles_map:
-                        comment['profile'] = profiles_map[user_id]
-                    else:
-                        comment['profile'] = {'user_id': user_id, 'display_name': 'Anonymous', 'avatar_url': None}
+                    # Attach profile info to each comment
+                    for comment in comments:
+                        user_id = comment['user_id']
+                        if user_id in profiles_map:
+                            comment['profile'] = profiles_map[user_id]
+                        else:
+                            comment['profile'] = {'user_id': user_id, 'display_name': 'Anonymous', 'avatar_url': None}
 
             return comments
         except Exception as e:
@@ -163,23 +226,31 @@ class ArticleService:
 
     @staticmethod
     def add_comment(article_id: str, comment_data: CommentCreate, user_id: str):
+        """Add a comment; the caller applies comment_limiter first"""
         try:
+            if settings.COMMENT_WRITE_BEHIND_ENABLED:
+                return comment_ingestor.submit(article_id, user_id, comment_data.content)
+
             response = supabase.table("comments").insert({
                 "article_id": article_id,
                 "user_id": user_id,
                 "body": comment_data.content
             }).execute()
+            counter_service.increment("articles", article_id, "comment_count")
             return response.data[0]
         except Exception as e:
             raise e
 
     @staticmethod
     def bookmark_article(article_id: str, user_id: str):
+        """Bookmark an article; bookmarking it again is a no-op"""
         try:
-            response = supabase.table("bookmarks").insert({
+            response = supabase.table("bookmarks").upsert({
                 "article_id": article_id,
                 "user_id": user_id
-            }).execute()
+            }, on_conflict="user_id,article_id", ignore_duplicates=True).execute()
+            bookmark_service.added(user_id, article_id)
+            counter_service.increment("articles", article_id, "bookmark_count", len(response.data))
             return response.data
         except Exception as e:
             raise e
@@ -188,16 +259,20 @@ class ArticleService:
     def remove_bookmark(article_id: str, user_id: str):
         try:
             response = supabase.table("bookmarks").delete().eq("article_id", article_id).eq("user_id", user_id).execute()
+            bookmark_service.removed(user_id, article_id)
+            counter_service.increment("articles", article_id, "bookmark_count", -len(response.data))
             return response.data
         except Exception as e:
             raise e
 
     @staticmethod
-    def get_user_bookmarks(user_id: str):
+    def get_user_bookmarks(user_id: str, page: int = 1, limit: int = 20):
+        """A page of the user's bookmarks (every bookmark column), newest first, with article cards instead of full articles"""
         try:
+            offset = (page - 1) * limit
             response = supabase.table("bookmarks").select(
-                "*, articles(*)"
-            ).eq("user_id", user_id).execute()
+                f"*, articles({CARD_COLUMNS})"
+            ).eq("user_id", user_id).order("created_at", desc=True).range(offset, offset + limit - 1).execute()
             return response.data
         except Exception as e:
             raise e
@@ -205,8 +280,7 @@ class ArticleService:
     @staticmethod
     def get_channels():
         try:
-            response = supabase.table("channels").select("*").execute()
-            return response.data
+            return taxonomy_service.snapshot().channels
         except Exception as e:
             raise e
 
@@ -224,37 +298,52 @@ class ArticleService:
 
             # If we have articles, fetch author information
             if articles:
-                # Get all unique user_ids from articles
-                user_ids = list(set([article['user_id'] for article in articles if article.get('user_id')]))
-
-                if user_ids:
-                    # Fetch profiles for these users
-                    profiles_response = supabase.table("profiles").select(
-                        "user_id, display_name, avatar_url"
-                    ).in_("user_id", user_ids).execute()
-
-                    # Create a lookup map for profiles
-                    profiles_map = {profile['user_id']: profile for profile in profiles_response.data}
-
-                    # Attach author info to each article
-                    for article in articles:
-                        user_id = article.get('user_id')
-                        if user_id and user_id in profiles_map:
-                            article['author'] = profiles_map[user_id]
-                        else:
-                            article['author'] = {
-                                'user_id': user_id,
-                                'display_name': 'Unknown Author',
-                                'avatar_url': None
-                            }
+                with phase("enrich_profiles"):
+                    # Get all unique user_ids from articles
+                    user_ids = list(set([article['user_id'] for article in articles if article.get('user_id')]))
+
+                    if user_ids:
+                        # Fetch profiles for these users
+                        profiles_response = supabase.table("profiles").select(
+                            "user_id, display_name, avatar_url"
+                        ).in_("user_id", user_ids).execute()
+
+                        # Create a lookup map for profiles
+                        profiles_map = {profile['user_id']: profile for profile in profiles_response.data}
+
+                        # Attach author info to each article
+                        for article in articles:
+                            user_id = article.get('user_id')
+                            if user_id and user_id in profiles_map:
+                                article['author'] = profiles_map[user_id]
+                            else:
+                                article['author'] = {
+                                    'user_id': user_id,
+                                    'display_name': 'Unknown Author',
+                                    'avatar_url': None
+                                }
 
             return articles
         except Exception as e:
             raise e
 
     @staticmethod
-    def update_article_status(article_id: str, status: str):
+    def transition_article_status(article_id: str, status: str):
+        """Move an article to a new status, enforcing ARTICLE_STATUS_TRANSITIONS.
+
+        The update only matches rows whose current status may move to `status`,
+        so a real transition costs a single query. Returns (article, changed);
+        article is None when the id does not exist.
+        """
         try:
+            if status not in ARTICLE_STATUS_TRANSITIONS:
+                raise Exception(f"Invalid status '{status}'")
+
+            allowed_from = [
+                current for current, targets in ARTICLE_STATUS_TRANSITIONS.items()
+                if status in targets
+            ]
+
             update_data = {
                 "status": status,
                 "updated_at": "now()"
@@ -264,10 +353,27 @@ class ArticleService:
             if status == "published":
                 update_data["published_at"] = "now()"
 
-            response = supabase.table("articles").update(update_data).eq("id", article_id).execute()
-            if not response.data:
-                raise Exception("Article not found")
-            return response.data[0]
+            response = supabase.table("articles").update(update_data)\
+                .eq("id", article_id)\
+                .in_("status", allowed_from)\
+                .execute()
+            if response.data:
+                if status != "published":
+                    ranking_service.discard(article_id)
+                    related_service.discard(article_id)
+                return response.data[0], True
+
+            # Nothing updated: work out whether the article is missing, already
+            # in the requested status, or the transition is not allowed
+            current = supabase.table("articles").select("*").eq("id", article_id).execute()
+            if not current.data:
+                return None, False
+
+            article = current.data[0]
+            if article.get("status") == status:
+                return article, False
+
+            raise Exception(f"Cannot change article status from '{article.get('status')}' to '{status}'")
         except Exception as e:
             raise e
 
@@ -278,17 +384,20 @@ class ArticleService:
             response = supabase.table("articles").select(
                 "*, article_categories(*), channels(*)"
             ).ilike("title", f"%{query}%").eq("status", "published").order("created_at", desc=True).range(offset, offset + limit - 1).execute()
-            return response.data
+            return counter_service.overlay("articles", response.data)
         except Exception as e:
             raise e
 
     @staticmethod
     def subscribe_channel(channel_id: int, user_id: str):
+        """Subscribe to a channel; subscribing again is a no-op"""
         try:
-            response = supabase.table("channel_subscriptions").insert({
+            response = supabase.table("channel_subscriptions").upsert({
                 "channel_id": channel_id,
                 "user_id": user_id
-            }).execute()
+            }, on_conflict="user_id,channel_id", ignore_duplicates=True).execute()
+            feed_service.invalidate(user_id)
+            counter_service.increment("channels", channel_id, "subscriber_count", len(response.data))
             return response.data
         except Exception as e:
             raise e
@@ -297,6 +406,8 @@ class ArticleService:
     def unsubscribe_channel(channel_id: int, user_id: str):
         try:
             response = supabase.table("channel_subscriptions").delete().eq("channel_id", channel_id).eq("user_id", user_id).execute()
+            feed_service.invalidate(user_id)
+            counter_service.increment("channels", channel_id, "subscriber_count", -len(response.data))
             return response.data
         except Exception as e:
             raise e
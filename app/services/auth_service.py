@@ -1,11 +1,18 @@
-from ..config.database import supabase
+from ..config.database import supabase, new_auth_client
 from ..models.schemas import UserRegister, UserLogin
+from typing import Optional
 
 class AuthService:
+    """User-facing auth flows.
+
+    Each call runs on its own client from new_auth_client(), so concurrent
+    requests never share or overwrite a session.
+    """
+
     @staticmethod
     def register(user_data: UserRegister):
         try:
-            auth_response = supabase.auth.sign_up({
+            auth_response = new_auth_client().sign_up({
                 "email": user_data.email,
                 "password": user_data.password,
                 "options": {
@@ -36,10 +43,17 @@ class AuthService:
         except Exception as e:
             raise e
 
+    @staticmethod
+    def sign_up(credentials: dict):
+        try:
+            return new_auth_client().sign_up(credentials)
+        except Exception as e:
+            raise e
+
     @staticmethod
     def login(user_data: UserLogin):
         try:
-            auth_response = supabase.auth.sign_in_with_password({
+            auth_response = new_auth_client().sign_in_with_password({
                 "email": user_data.email,
                 "password": user_data.password
             })
@@ -48,13 +62,44 @@ class AuthService:
             raise e
 
     @staticmethod
-    def logout():
+    def logout(access_token: str):
+        """Revoke the refresh token of the session that `access_token` belongs to"""
         try:
-            supabase.auth.sign_out()
+            new_auth_client().admin.sign_out(access_token, "local")
             return True
         except Exception as e:
             raise e
 
+    @staticmethod
+    def refresh_token(refresh_token: str):
+        try:
+            return new_auth_client().refresh_session(refresh_token)
+        except Exception as e:
+            raise e
+
+    @staticmethod
+    def google_signin(id_token: str, nonce: Optional[str] = None):
+        try:
+            credentials = {
+                "provider": "google",
+                "token": id_token
+            }
+            if nonce:
+                credentials["nonce"] = nonce
+            return new_auth_client().sign_in_with_id_token(credentials)
+        except Exception as e:
+            raise e
+
+    @staticmethod
+    def verify_invite(token_hash: str):
+        try:
+            return new_auth_client().verify_otp({
+                'token_hash': token_hash,
+                'type': 'invite'
+            })
+        except Exception as e:
+            raise e
+
     @staticmethod
     def get_current_user(token: str):
         try:
@@ -68,4 +113,4 @@ class AuthService:
         try:
             return supabase.auth.update_user({"data": profile_data})
         except Exception as e:
-            raise e
\ No newline at end of file
+            raise e
@@ -0,0 +1,95 @@
+from ..config.database import supabase
+from ..config.settings import settings
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+import threading
+import time
+
+# Bookmark states remembered per user; the oldest are forgotten beyond this
+MAX_STATES_PER_USER = 2000
+
+class BookmarkService:
+    """Per-user bookmark-state lookups.
+
+    Whether a user has bookmarked an article is looked up only for the
+    articles being rendered, with one `in` query for those not yet known,
+    so users with any number of bookmarks get exact answers. Answers are
+    cached per user for BOOKMARK_CACHE_TTL_SECONDS and kept current by this
+    process's own bookmark and unbookmark calls, so checking a page that
+    was seen recently costs no query. Other workers do not see those calls,
+    so the TTL is kept short enough to bound their staleness to seconds.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._states: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def _known(self, user_id: str) -> Dict[str, bool]:
+        with self._lock:
+            entry = self._states.get(user_id)
+            if entry is None or entry[1] <= time.monotonic():
+                return {}
+            self._states.move_to_end(user_id)
+            return dict(entry[0])
+
+    def _store(self, user_id: str, states: Dict[str, bool]) -> None:
+        if self._ttl <= 0:
+            return
+        with self._lock:
+            entry = self._states.get(user_id)
+            if entry is None or entry[1] <= time.monotonic():
+                entry = ({}, time.monotonic() + self._ttl)
+            known, expires_at = entry
+            known = {**known, **states}
+            if len(known) > MAX_STATES_PER_USER:
+                known = dict(list(known.items())[-MAX_STATES_PER_USER:])
+            self._states[user_id] = (known, expires_at)
+            self._states.move_to_end(user_id)
+            while len(self._states) > self._max_entries:
+                self._states.popitem(last=False)
+
+    def _update(self, user_id: str, article_id: str, bookmarked: bool) -> None:
+        with self._lock:
+            entry = self._states.get(user_id)
+            if entry is None:
+                return
+            known, expires_at = entry
+            self._states[user_id] = ({**known, str(article_id): bookmarked}, expires_at)
+
+    def added(self, user_id: str, article_id: str) -> None:
+        self._update(user_id, article_id, True)
+
+    def removed(self, user_id: str, article_id: str) -> None:
+        self._update(user_id, article_id, False)
+
+    def check(self, user_id: str, article_ids: Iterable[str]) -> Dict[str, bool]:
+        """Map each article id to whether the user has bookmarked it"""
+        article_ids = [str(article_id) for article_id in article_ids]
+        known = self._known(user_id)
+        missing = [article_id for article_id in dict.fromkeys(article_ids) if article_id not in known]
+        if missing:
+            response = supabase.table("bookmarks").select("article_id")\
+                .eq("user_id", user_id)\
+                .in_("article_id", missing)\
+                .execute()
+            found = {str(row["article_id"]) for row in response.data}
+            states = {article_id: article_id in found for article_id in missing}
+            self._store(user_id, states)
+            known.update(states)
+        return {article_id: known[article_id] for article_id in article_ids}
+
+    def annotate(self, articles: List[Dict[str, Any]], user_id: Optional[str]) -> List[Dict[str, Any]]:
+        """Set is_bookmarked on each article for an authenticated user (no-op for guests)"""
+        if user_id and articles:
+            states = self.check(user_id, [article["id"] for article in articles])
+            for article in articles:
+                article["is_bookmarked"] = states[str(article["id"])]
+        return articles
+
+# Create singleton instance
+bookmark_service = BookmarkService(
+    ttl=settings.BOOKMARK_CACHE_TTL_SECONDS,
+    max_entries=settings.SESSION_CACHE_MAX_ENTRIES
+)
@@ -1,6 +1,7 @@
 from typing import List, Dict, Any, Optional
 from ..config.database import supabase
 from ..models.schemas import CategoryCreate, CategoryUpdate
+from .taxonomy_service import taxonomy_service
 
 class CategoryService:
     @staticmethod
@@ -17,6 +18,7 @@ class CategoryService:
             }).execute()
 
             if response.data:
+                taxonomy_service.invalidate()
                 return response.data[0]
             else:
                 raise Exception("Failed to create category")
@@ -73,6 +75,7 @@ class CategoryService:
                 .execute()
 
             if response.data:
+                taxonomy_service.invalidate()
                 return response.data[0]
             else:
                 raise Exception("Failed to update category")
@@ -99,6 +102,7 @@ class CategoryService:
                 .execute()
 
             if not hasattr(response, 'error'):
+                taxonomy_service.invalidate()
                 return True
             else:
                 raise Exception("Failed to delete category")
@@ -1,4 +1,7 @@
 from ..config.database import supabase
+from .taxonomy_service import taxonomy_service
+from .feed_service import feed_service
+from .counter_service import counter_service
 from typing import List, Dict, Any
 
 class ChannelService:
@@ -16,6 +19,7 @@ class ChannelService:
             }
 
             response = supabase.table("channels").insert(channel_data).execute()
+            taxonomy_service.invalidate()
             return response.data[0] if response.data else None
         except Exception as e:
             raise e
@@ -25,16 +29,15 @@ class ChannelService:
         """Get all channels (admin only)"""
         try:
             response = supabase.table("channels").select("*").order("created_at", desc=True).execute()
-            return response.data
+            return counter_service.overlay("channels", response.data)
         except Exception as e:
             raise e
 
     @staticmethod
     def get_active_channels() -> List[Dict[str, Any]]:
-        """Get all active channels (public)"""
+        """Get all active channels (public), served from the taxonomy snapshot"""
         try:
-            response = supabase.table("channels").select("*").eq("is_active", True).order("name").execute()
-            return response.data
+            return taxonomy_service.snapshot().active_channels
         except Exception as e:
             raise e
 
@@ -62,6 +65,7 @@ class ChannelService:
                 update_data["is_active"] = is_active
 
             response = supabase.table("channels").update(update_data).eq("id", channel_id).execute()
+            taxonomy_service.invalidate()
             return response.data[0] if response.data else None
         except Exception as e:
             raise e
@@ -76,6 +80,7 @@ class ChannelService:
                 raise Exception("Cannot delete channel with existing articles")
 
             supabase.table("channels").delete().eq("id", channel_id).execute()
+            taxonomy_service.invalidate()
         except Exception as e:
             raise e
 
@@ -90,19 +95,16 @@ class ChannelService:
 
     @staticmethod
     def follow_channel(channel_id: int, user_id: str) -> bool:
-        """Follow a channel (reader only)"""
+        """Follow a channel (reader only); following again is a no-op.
+        Returns True if the follow is new."""
         try:
-            # Check if already following
-            existing = supabase.table("channel_followers").select("channel_id, user_id").eq("channel_id", channel_id).eq("user_id", user_id).execute()
-            if existing.data:
-                raise Exception("Already following this channel")
-
-            # Add follow relationship
-            supabase.table("channel_followers").insert({
+            response = supabase.table("channel_followers").upsert({
                 "channel_id": channel_id,
                 "user_id": user_id
-            }).execute()
-            return True
+            }, on_conflict="user_id,channel_id", ignore_duplicates=True).execute()
+            feed_service.invalidate(user_id)
+            counter_service.increment("channels", channel_id, "follower_count", len(response.data))
+            return bool(response.data)
         except Exception as e:
             raise e
 
@@ -111,7 +113,9 @@ class ChannelService:
         """Unfollow a channel (reader only)"""
         try:
             # Remove follow relationship
-            supabase.table("channel_followers").delete().eq("channel_id", channel_id).eq("user_id", user_id).execute()
+            response = supabase.table("channel_followers").delete().eq("channel_id", channel_id).eq("user_id", user_id).execute()
+            feed_service.invalidate(user_id)
+            counter_service.increment("channels", channel_id, "follower_count", -len(response.data))
             return True
         except Exception as e:
             raise e
@@ -145,6 +149,6 @@ class ChannelService:
                     channel_data["followed_at"] = item.get("followed_at")
                     followed_channels.append(channel_data)
 
-            return followed_channels
+            return counter_service.overlay("channels", followed_channels)
         except Exception as e:
             raise e
\ No newline at end of file
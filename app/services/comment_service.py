@@ -0,0 +1,171 @@
+from postgrest.exceptions import APIError
+from ..config.database import supabase
+from ..config.settings import settings
+from .counter_service import counter_service
+from .event_service import event_broker
+from .metrics_service import metrics
+from .rate_limit_service import RateLimitExceeded, TokenBucketLimiter
+from .task_service import task_runtime
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+import threading
+import time
+import uuid
+
+comments_dropped = metrics.counter(
+    "comments_dropped_total",
+    "Accepted comments the database rejected when they were written",
+    ()
+)
+comment_flush_failures = metrics.counter(
+    "comment_flush_failures_total",
+    "Comment inserts that failed and were retried later",
+    ()
+)
+
+# Per-user limit on new comments: COMMENT_BURST at once, then COMMENT_RATE_PER_MINUTE
+comment_limiter = TokenBucketLimiter(
+    "comments",
+    rate=settings.COMMENT_RATE_PER_MINUTE / 60,
+    burst=settings.COMMENT_BURST
+)
+
+class CommentIngestor:
+    """Write-behind ingestion for new comments.
+
+    submit() validates the article, gives the comment its id and created_at
+    and returns it at once; rows are buffered and a periodic flush writes
+    them COMMENT_FLUSH_BATCH_SIZE at a time as one multi-row upsert on id,
+    so retrying a batch that was in fact written is harmless. A batch the
+    database rejects is retried row by row and only the offending rows are
+    dropped, with a comment_removed event; a transport failure keeps the
+    batch for the next flush. get_comments() merges the rows not yet
+    written so they are visible immediately in this process.
+
+    Accepted is not durable: a crash loses up to
+    COMMENT_FLUSH_INTERVAL_SECONDS of accepted comments.
+    """
+
+    def __init__(self, batch_size: int, max_pending: int, article_ttl: float):
+        self._batch_size = batch_size
+        self._max_pending = max_pending
+        self._article_ttl = article_ttl
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: List[Dict[str, Any]] = []
+        # Taken by the running flush; still shown until written or dropped
+        self._writing: List[Dict[str, Any]] = []
+        self._articles: "OrderedDict[str, float]" = OrderedDict()
+
+        metrics.gauge(
+            "comment_pending_rows",
+            "Accepted comments waiting for the next flush",
+            (),
+            lambda: {(): len(self._pending) + len(self._writing)}
+        )
+
+    def _check_article(self, article_id: str) -> None:
+        """Raise ValueError unless the article exists (cached, so a busy thread costs one query per TTL)"""
+        now = time.monotonic()
+        with self._lock:
+            expires_at = self._articles.get(article_id)
+            if expires_at is not None and expires_at > now:
+                return
+        try:
+            uuid.UUID(article_id)
+        except ValueError:
+            raise ValueError("Article not found")
+        response = supabase.table("articles").select("id").eq("id", article_id).limit(1).execute()
+        if not response.data:
+            raise ValueError("Article not found")
+        with self._lock:
+            self._articles[article_id] = now + self._article_ttl
+            self._articles.move_to_end(article_id)
+            while len(self._articles) > settings.SESSION_CACHE_MAX_ENTRIES:
+                self._articles.popitem(last=False)
+
+    def submit(self, article_id: str, user_id: str, body: str) -> Dict[str, Any]:
+        """Accept a comment and return it as it will be stored"""
+        if len(self._pending) >= self._max_pending:
+            raise RateLimitExceeded("Too many comments are waiting to be saved, retry shortly", settings.COMMENT_FLUSH_INTERVAL_SECONDS)
+        self._check_article(article_id)
+        row = {
+            "id": str(uuid.uuid4()),
+            "article_id": article_id,
+            "user_id": user_id,
+            "body": body,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+        with self._lock:
+            self._pending.append(row)
+            full = len(self._pending) >= self._batch_size
+        counter_service.increment("articles", article_id, "comment_count")
+        if full:
+            task_runtime.enqueue("comment_flush", self.flush)
+        return dict(row)
+
+    def pending_for(self, article_id: str) -> List[Dict[str, Any]]:
+        """Comments on an article not yet written, newest first"""
+        with self._lock:
+            rows = [dict(row) for row in self._writing + self._pending if row["article_id"] == article_id]
+        return rows[::-1]
+
+    def flush(self) -> None:
+        """Write every buffered comment; rows that could not be written yet stay buffered"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+                self._writing = list(pending)
+            try:
+                for start in range(0, len(pending), self._batch_size):
+                    batch = pending[start:start + self._batch_size]
+                    try:
+                        self._write(batch)
+                    except Exception as e:
+                        comment_flush_failures.inc()
+                        print(f"Comment flush failed, will retry: {str(e)}")
+                        with self._lock:
+                            self._pending[:0] = [row for row in pending[start:] if row in self._writing]
+                        return
+                    with self._lock:
+                        written = {row["id"] for row in batch}
+                        self._writing = [row for row in self._writing if row["id"] not in written]
+            finally:
+                with self._lock:
+                    self._writing = []
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            supabase.table("comments").upsert(batch, on_conflict="id", ignore_duplicates=True).execute()
+            return
+        except APIError:
+            if len(batch) == 1:
+                self._drop(batch[0])
+                return
+        # One bad row (e.g. its article was deleted since) fails the whole statement
+        for row in batch:
+            try:
+                supabase.table("comments").upsert(row, on_conflict="id", ignore_duplicates=True).execute()
+            except APIError:
+                self._drop(row)
+
+    def _drop(self, row: Dict[str, Any]) -> None:
+        """Forget an accepted comment the database rejected and tell live viewers"""
+        with self._lock:
+            self._writing = [pending for pending in self._writing if pending["id"] != row["id"]]
+        comments_dropped.inc()
+        counter_service.increment("articles", row["article_id"], "comment_count", -1)
+        event_broker.publish(
+            f"article:{row['article_id']}:comments",
+            "comment_removed",
+            {"id": row["id"], "article_id": row["article_id"]}
+        )
+        print(f"Dropped comment {row['id']} on article {row['article_id']}: rejected by the database")
+
+# Create singleton instance
+comment_ingestor = CommentIngestor(
+    batch_size=settings.COMMENT_FLUSH_BATCH_SIZE,
+    max_pending=settings.COMMENT_MAX_PENDING,
+    article_ttl=settings.COMMENT_ARTICLE_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,152 @@
+from postgrest.exceptions import APIError
+from ..config.database import supabase_admin
+from ..config.settings import settings
+from .metrics_service import metrics
+from .taxonomy_service import taxonomy_service
+from collections import Counter
+from typing import Any, Dict, List, Tuple
+import threading
+import uuid
+
+# Denormalized counter columns (see migrations/add_denormalized_counters.sql)
+COUNTER_COLUMNS = {
+    "articles": ("comment_count", "bookmark_count", "view_count"),
+    "channels": ("follower_count", "subscriber_count"),
+}
+
+counter_deltas_dropped = metrics.counter(
+    "counter_deltas_dropped_total",
+    "Counter increments dropped because COUNTER_MAX_PENDING counters were already buffered",
+    ()
+)
+counter_flush_failures = metrics.counter(
+    "counter_flush_failures_total",
+    "Counter delta flushes that failed and were retried later",
+    ()
+)
+
+def _rejected(error: Exception) -> bool:
+    """True only when PostgREST or Postgres refused the batch, so nothing was applied.
+
+    PGRST1xx/PGRST2xx are request and schema errors raised before the
+    function runs; SQLSTATE classes 22 (data exception) and 23 (integrity
+    violation) abort its transaction. Anything else, a 502/504 from the
+    gateway or a statement timeout included, may follow a commit.
+    """
+    if not isinstance(error, APIError):
+        return False
+    code = str(error.code or "")
+    return code.startswith(("PGRST1", "PGRST2", "22", "23"))
+
+class CounterService:
+    """Write-behind increments for the denormalized counters in COUNTER_COLUMNS.
+
+    Writes that add or remove a comment, bookmark, follow or subscription
+    call increment(); deltas are summed in memory and a periodic flush
+    applies them in batches of COUNTER_FLUSH_BATCH_SIZE through the
+    apply_counter_deltas RPC, one atomic statement per batch. Each batch
+    carries a flush id the RPC records, so a batch whose response was lost
+    is retried under the same id and applied at most once. Responses
+    overlay the still-pending deltas so a user sees their own change.
+    At most max_pending distinct counters are buffered; increments to
+    further ones are dropped, so an undeployed RPC cannot grow memory
+    without bound.
+    """
+
+    def __init__(self, batch_size: int, max_pending: int):
+        self._batch_size = batch_size
+        self._max_pending = max_pending
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: Counter = Counter()
+        # (flush_id, batch) sent without a definite answer; never merged back into _pending
+        self._unconfirmed: List[Tuple[str, List[Dict[str, Any]]]] = []
+
+        metrics.gauge(
+            "counter_pending_deltas",
+            "Counter deltas waiting for the next flush",
+            (),
+            lambda: {(): len(self._pending) + sum(len(batch) for _, batch in self._unconfirmed)}
+        )
+
+    def increment(self, table: str, row_id: Any, column: str, delta: int = 1) -> None:
+        if column not in COUNTER_COLUMNS.get(table, ()):
+            raise ValueError(f"Unknown counter {table}.{column}")
+        if delta:
+            key = (table, str(row_id), column)
+            with self._lock:
+                if key not in self._pending and len(self._pending) >= self._max_pending:
+                    counter_deltas_dropped.inc()
+                    return
+                self._pending[key] += delta
+
+    def overlay(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Add pending deltas to the counter columns of freshly read rows"""
+        if not (self._pending or self._unconfirmed) or not rows:
+            return rows
+        with self._lock:
+            pending = Counter(self._pending)
+            for _, batch in self._unconfirmed:
+                for delta in batch:
+                    pending[(delta["table"], delta["id"], delta["column"])] += delta["delta"]
+        for row in rows:
+            for column in COUNTER_COLUMNS[table]:
+                delta = pending.get((table, str(row.get("id")), column))
+                if delta:
+                    row[column] = max((row.get(column) or 0) + delta, 0)
+        return rows
+
+    def flush(self) -> None:
+        """Apply every pending delta; batches that could not be written are kept for the next flush"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, Counter()
+                unconfirmed, self._unconfirmed = self._unconfirmed, []
+            deltas = [
+                {"table": table, "id": row_id, "column": column, "delta": delta}
+                for (table, row_id, column), delta in pending.items() if delta
+            ]
+            batches = unconfirmed + [
+                (str(uuid.uuid4()), deltas[start:start + self._batch_size])
+                for start in range(0, len(deltas), self._batch_size)
+            ]
+
+            channels_changed = False
+            for index, (flush_id, batch) in enumerate(batches):
+                try:
+                    supabase_admin.rpc("apply_counter_deltas", {"deltas": batch, "flush_id": flush_id}).execute()
+                except Exception as e:
+                    counter_flush_failures.inc()
+                    rejected = _rejected(e)
+                    if rejected and e.code == "PGRST202":
+                        print("Counter flush skipped, deltas stay buffered up to COUNTER_MAX_PENDING: apply_counter_deltas is not deployed (run migrations/add_denormalized_counters.sql)")
+                    else:
+                        print(f"Counter flush failed, will retry: {str(e)}")
+                    self._requeue(batches, index, len(unconfirmed), rejected)
+                    break
+                channels_changed = channels_changed or any(delta["table"] == "channels" for delta in batch)
+
+            if channels_changed:
+                # Channel lists are served from the taxonomy snapshot
+                taxonomy_service.invalidate()
+
+    def _requeue(self, batches: List[Tuple[str, List[Dict[str, Any]]]], failed: int, unconfirmed: int, rejected: bool) -> None:
+        """Keep batches[failed:] for the next flush.
+
+        A batch that may have been applied (sent before, or lost in transit
+        now) keeps its flush id; the rest merge back into the pending deltas.
+        """
+        with self._lock:
+            for index in range(failed, len(batches)):
+                flush_id, batch = batches[index]
+                if index < unconfirmed or (index == failed and not rejected):
+                    self._unconfirmed.append((flush_id, batch))
+                else:
+                    for delta in batch:
+                        self._pending[(delta["table"], delta["id"], delta["column"])] += delta["delta"]
+
+# Create singleton instance
+counter_service = CounterService(
+    batch_size=settings.COUNTER_FLUSH_BATCH_SIZE,
+    max_pending=settings.COUNTER_MAX_PENDING
+)
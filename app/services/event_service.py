@@ -0,0 +1,162 @@
+from ..config.settings import settings
+from .metrics_service import metrics
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, Optional, Set
+import asyncio
+import itertools
+import orjson
+import threading
+
+events_published = metrics.counter(
+    "events_published_total",
+    "Events published to in-process subscribers",
+    ("event",)
+)
+subscriptions_dropped = metrics.counter(
+    "event_subscriptions_dropped_total",
+    "Event streams closed by the server",
+    ("reason",)
+)
+
+class ConnectionLimitExceeded(Exception):
+    pass
+
+# Queued in place of an event to tell a stream to end
+_CLOSE = object()
+
+class Subscription:
+    def __init__(self, topic: str, client: str, queue_size: int):
+        self.topic = topic
+        self.client = client
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+class EventBroker:
+    """In-process pub/sub behind the server-sent event streams.
+
+    Topics are strings such as "article:<id>:comments" or
+    "user:<id>:articles". publish() may be called from the event loop or
+    from threadpool code. Every subscription has a bounded queue; a
+    subscriber that falls EVENT_QUEUE_SIZE events behind is disconnected
+    with a "reset" event (so it refetches) instead of letting its queue grow.
+    Connections are capped per worker and per client. Events only reach
+    subscribers connected to the same worker process.
+    """
+
+    def __init__(self, max_connections: int, max_per_client: int, queue_size: int, heartbeat: float):
+        self._max_connections = max_connections
+        self._max_per_client = max_per_client
+        self._queue_size = queue_size
+        self._heartbeat = heartbeat
+        self._lock = threading.Lock()
+        self._topics: Dict[str, Set[Subscription]] = defaultdict(set)
+        self._clients: Dict[str, int] = defaultdict(int)
+        self._count = 0
+        self._ids = itertools.count(1)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+        metrics.gauge(
+            "event_stream_connections",
+            "Open server-sent event streams",
+            (),
+            lambda: {(): self._count}
+        )
+
+    @property
+    def connections(self) -> int:
+        return self._count
+
+    def subscribe(self, topic: str, client: str) -> Subscription:
+        """Open a subscription; raises ConnectionLimitExceeded when the worker or client is at its limit"""
+        with self._lock:
+            if self._count >= self._max_connections:
+                raise ConnectionLimitExceeded("Too many open event streams, retry later")
+            if self._clients[client] >= self._max_per_client:
+                raise ConnectionLimitExceeded("Too many open event streams for this client")
+            self._loop = asyncio.get_running_loop()
+            subscription = Subscription(topic, client, self._queue_size)
+            self._topics[topic].add(subscription)
+            self._clients[client] += 1
+            self._count += 1
+            return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscribers = self._topics.get(subscription.topic)
+            if subscribers is None or subscription not in subscribers:
+                return
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._topics[subscription.topic]
+            self._clients[subscription.client] -= 1
+            if self._clients[subscription.client] <= 0:
+                del self._clients[subscription.client]
+            self._count -= 1
+
+    def publish(self, topic: str, event: str, data: Any) -> None:
+        """Send an event to every subscriber of a topic"""
+        if topic not in self._topics or self._loop is None:
+            return
+        message = {"id": next(self._ids), "event": event, "data": data}
+        events_published.inc(event)
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._deliver(topic, message)
+        else:
+            self._loop.call_soon_threadsafe(self._deliver, topic, message)
+
+    def _deliver(self, topic: str, message: Dict[str, Any]) -> None:
+        with self._lock:
+            subscribers = list(self._topics.get(topic, ()))
+        for subscription in subscribers:
+            if subscription.overflowed:
+                continue
+            if subscription.queue.qsize() >= self._queue_size - 1:
+                # Keep the last slot for the close marker
+                subscription.overflowed = True
+                subscription.queue.put_nowait(_CLOSE)
+                subscriptions_dropped.inc("slow_consumer")
+                continue
+            subscription.queue.put_nowait(message)
+
+    def close_all(self) -> None:
+        """End every open stream, e.g. at shutdown"""
+        with self._lock:
+            subscribers = [subscription for topic in self._topics.values() for subscription in topic]
+        for subscription in subscribers:
+            if not subscription.overflowed:
+                subscription.overflowed = True
+                try:
+                    subscription.queue.put_nowait(_CLOSE)
+                except asyncio.QueueFull:
+                    pass
+                subscriptions_dropped.inc("shutdown")
+
+    async def stream(self, subscription: Subscription) -> AsyncIterator[bytes]:
+        """Server-sent event frames for a subscription, with keep-alive comments while idle"""
+        try:
+            yield f"retry: {settings.EVENT_RETRY_MILLISECONDS}\n\n".encode()
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), timeout=self._heartbeat)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+                    continue
+                if message is _CLOSE:
+                    yield b"event: reset\ndata: {}\n\n"
+                    return
+                data = orjson.dumps(message["data"], default=str)
+                yield b"id: %d\nevent: %s\ndata: %s\n\n" % (message["id"], message["event"].encode(), data)
+        finally:
+            self.unsubscribe(subscription)
+
+# Create singleton instance
+event_broker = EventBroker(
+    max_connections=settings.EVENT_MAX_CONNECTIONS,
+    max_per_client=settings.EVENT_MAX_CONNECTIONS_PER_CLIENT,
+    queue_size=settings.EVENT_QUEUE_SIZE,
+    heartbeat=settings.EVENT_HEARTBEAT_SECONDS
+)
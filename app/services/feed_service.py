@@ -0,0 +1,101 @@
+from ..config.database import supabase
+from ..config.settings import settings
+from .metrics_service import phase
+from .counter_service import counter_service
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Optional, Tuple
+from datetime import datetime
+import base64
+import json
+import threading
+import time
+import uuid
+
+FEED_COLUMNS = "*, article_categories(*), channels(*)"
+
+def encode_cursor(article: Dict[str, Any]) -> str:
+    """Opaque cursor pointing just past `article` in (created_at, id) order"""
+    raw = json.dumps([article["created_at"], str(article["id"])], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, article_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        # Both values are spliced into a PostgREST filter, so only accept well-formed ones
+        datetime.fromisoformat(created_at)
+        return created_at, str(uuid.UUID(article_id))
+    except Exception:
+        raise ValueError("Invalid feed cursor")
+
+class FeedService:
+    """Merged article feed across the channels a user follows or subscribes to.
+
+    The channel set (channel_followers + channel_subscriptions) is cached per
+    user for FEED_CHANNELS_CACHE_TTL_SECONDS and dropped whenever the user
+    follows, unfollows, subscribes or unsubscribes, so a feed page is a single
+    articles query on a warm cache. Pages are keyset-paginated on
+    (created_at, id), which stays stable while new articles are published.
+    """
+
+    def __init__(self, ttl: float, max_entries: int):
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._channels: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def channel_ids(self, user_id: str) -> FrozenSet[int]:
+        """Ids of every channel the user follows or subscribes to"""
+        with self._lock:
+            entry = self._channels.get(user_id)
+            if entry is not None and entry[1] > time.monotonic():
+                self._channels.move_to_end(user_id)
+                return entry[0]
+
+        with phase("feed_channels"):
+            followed = supabase.table("channel_followers").select("channel_id").eq("user_id", user_id).execute()
+            subscribed = supabase.table("channel_subscriptions").select("channel_id").eq("user_id", user_id).execute()
+        ids = frozenset(row["channel_id"] for row in followed.data + subscribed.data)
+
+        if self._ttl > 0:
+            with self._lock:
+                self._channels[user_id] = (ids, time.monotonic() + self._ttl)
+                self._channels.move_to_end(user_id)
+                while len(self._channels) > self._max_entries:
+                    self._channels.popitem(last=False)
+        return ids
+
+    def invalidate(self, user_id: str) -> None:
+        """Forget a user's channel set after a follow or subscription change"""
+        with self._lock:
+            self._channels.pop(user_id, None)
+
+    def get_feed(self, user_id: str, limit: int = 20, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """One page of published articles from the user's channels, newest first"""
+        try:
+            channel_ids = self.channel_ids(user_id)
+            if not channel_ids:
+                return {"articles": [], "next_cursor": None}
+
+            query = supabase.table("articles").select(FEED_COLUMNS)\
+                .eq("status", "published")\
+                .in_("channel_id", sorted(channel_ids))
+            if cursor:
+                created_at, article_id = decode_cursor(cursor)
+                query = query.or_(
+                    f"created_at.lt.{created_at},and(created_at.eq.{created_at},id.lt.{article_id})"
+                )
+            # One extra row tells us whether another page exists
+            response = query.order("created_at", desc=True).order("id", desc=True).limit(limit + 1).execute()
+
+            articles = counter_service.overlay("articles", response.data[:limit])
+            next_cursor = encode_cursor(articles[-1]) if len(response.data) > limit else None
+            return {"articles": articles, "next_cursor": next_cursor}
+        except Exception as e:
+            raise e
+
+# Create singleton instance
+feed_service = FeedService(
+    ttl=settings.FEED_CHANNELS_CACHE_TTL_SECONDS,
+    max_entries=settings.SESSION_CACHE_MAX_ENTRIES
+)
@@ -0,0 +1,74 @@
+from ..config.settings import settings
+from typing import Callable, Dict, Any, Optional
+import threading
+import time
+
+class HealthCheck:
+    """One readiness dependency check with a cached last result.
+
+    `check` returns a dict of details and raises when the dependency is not
+    usable. A critical failure makes the worker unready; a non-critical one
+    only marks it degraded.
+    """
+
+    def __init__(self, name: str, check: Callable[[], Dict[str, Any]], critical: bool = True):
+        self.name = name
+        self.check = check
+        self.critical = critical
+        self._lock = threading.Lock()
+        self._result: Optional[Dict[str, Any]] = None
+        self._checked_at = 0.0
+
+    def result(self, max_age: float) -> Dict[str, Any]:
+        """Return the cached result, re-running the check if it is older than max_age.
+
+        Only one caller runs the check at a time; concurrent callers get the
+        previous result instead of piling onto a slow dependency.
+        """
+        if self._result is None or time.monotonic() - self._checked_at > max_age:
+            if self._lock.acquire(blocking=self._result is None):
+                try:
+                    if self._result is None or time.monotonic() - self._checked_at > max_age:
+                        self._result = self._run()
+                        self._checked_at = time.monotonic()
+                finally:
+                    self._lock.release()
+        return {**self._result, "age_ms": round((time.monotonic() - self._checked_at) * 1000, 1)}
+
+    def _run(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            details = self.check() or {}
+            status = "ok"
+        except Exception as e:
+            details = {"error": str(e)}
+            status = "fail"
+        return {
+            "status": status,
+            "critical": self.critical,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            **details
+        }
+
+class HealthService:
+    def __init__(self, max_age: float):
+        self._max_age = max_age
+        self._checks: Dict[str, HealthCheck] = {}
+
+    def register(self, name: str, check: Callable[[], Dict[str, Any]], critical: bool = True) -> None:
+        self._checks[name] = HealthCheck(name, check, critical)
+
+    def readiness(self) -> Dict[str, Any]:
+        """Run (or reuse) every check and summarize them as ok, degraded or unavailable"""
+        results = {name: check.result(self._max_age) for name, check in self._checks.items()}
+        failed = [result for result in results.values() if result["status"] != "ok"]
+        if any(result["critical"] for result in failed):
+            status = "unavailable"
+        elif failed:
+            status = "degraded"
+        else:
+            status = "ok"
+        return {"status": status, "checks": results}
+
+# Create singleton instance
+health_service = HealthService(max_age=settings.HEALTH_CHECK_INTERVAL_SECONDS)
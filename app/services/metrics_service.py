@@ -0,0 +1,203 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import threading
+import time
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter:
+    def __init__(self, name: str, description: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+class Gauge:
+    """Gauge whose samples are read from a callback at scrape time"""
+
+    def __init__(self, name: str, description: str, labelnames: Iterable[str], callback: Callable[[], Dict[Tuple, float]]):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self._callback = callback
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} gauge"]
+        try:
+            samples = self._callback() or {}
+        except Exception:
+            samples = {}
+        for labels, value in sorted(samples.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+class Histogram:
+    def __init__(self, name: str, description: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+            series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return int(series[len(self.buckets)]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                for index, bound in enumerate(self.buckets):
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, ('le', repr(bound)))} {series[index]}")
+                total = series[len(self.buckets)]
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, ('le', '+Inf'))} {total}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-1]}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {total}")
+        return lines
+
+class MetricsRegistry:
+    """Process-local metrics rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, description: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, description, labelnames))
+
+    def histogram(self, name: str, description: str, labelnames: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, description, labelnames, buckets))
+
+    def gauge(self, name: str, description: str, labelnames: Iterable[str], callback: Callable[[], Dict[Tuple, float]]) -> Gauge:
+        return self._register(Gauge(name, description, labelnames, callback))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+class RequestTiming:
+    """Time spent per phase/upstream, and upstream calls made, while serving one request"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+        self.upstream_calls: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        self.durations[name] = self.durations.get(name, 0.0) + seconds
+
+    def count_call(self, upstream: str) -> None:
+        # Threadpool work started by the request shares this object
+        with self._lock:
+            self.upstream_calls[upstream] = self.upstream_calls.get(upstream, 0) + 1
+
+    def total_calls(self) -> int:
+        return sum(self.upstream_calls.values())
+
+    def server_timing(self) -> str:
+        entries = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.durations.items()]
+        entries.append(f"total;dur={(time.perf_counter() - self.started_at) * 1000:.1f}")
+        return ", ".join(entries)
+
+metrics = MetricsRegistry()
+
+request_duration = metrics.histogram(
+    "http_request_duration_seconds",
+    "Time to serve an HTTP request",
+    ("method", "route", "status")
+)
+upstream_duration = metrics.histogram(
+    "upstream_request_duration_seconds",
+    "Time spent in calls to Supabase and FCM",
+    ("upstream", "operation", "outcome")
+)
+phase_duration = metrics.histogram(
+    "request_phase_duration_seconds",
+    "Time spent in named phases of request handling",
+    ("phase",)
+)
+
+current_request: ContextVar[Optional[RequestTiming]] = ContextVar("current_request", default=None)
+
+def record_upstream(upstream: str, operation: str, seconds: float, outcome: str = "ok") -> None:
+    """Record one upstream call against the histograms and the current request"""
+    upstream_duration.observe(seconds, upstream, operation, outcome)
+    timing = current_request.get()
+    if timing is not None:
+        timing.add(upstream, seconds)
+        timing.count_call(upstream)
+
+@contextmanager
+def upstream_span(upstream: str, operation: str):
+    """Time a call to an upstream service"""
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        record_upstream(upstream, operation, time.perf_counter() - started, outcome)
+
+@contextmanager
+def phase(name: str):
+    """Time a phase of request handling (e.g. auth) that may span several upstream calls"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        phase_duration.observe(seconds, name)
+        timing = current_request.get()
+        if timing is not None:
+            timing.add(name, seconds)
@@ -1,24 +1,47 @@
-import firebase_admin
-from firebase_admin import credentials, messaging
 from typing import List, Optional, Dict, Any
 from ..config.database import supabase
+from ..config.http import configure_requests_session, requests_pool_stats
+from ..config.settings import settings
+from .metrics_service import upstream_span
+from .role_service import role_registry
 import json
 import os
+import threading
 
 class NotificationService:
     _instance = None
     _app = None
+    _init_error = None
+    _initialized = False
+    _init_lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
-            cls._initialize_firebase()
         return cls._instance
 
+    @classmethod
+    def ensure_initialized(cls):
+        """Initialize Firebase on first use (or during startup warm-up) and return the app"""
+        if not cls._initialized:
+            with cls._init_lock:
+                if not cls._initialized:
+                    cls._initialize_firebase()
+                    cls._initialized = True
+        return cls._app
+
+    @property
+    def app(self):
+        return self.ensure_initialized()
+
     @classmethod
     def _initialize_firebase(cls):
         """Initialize Firebase Admin SDK with HTTP v1"""
         try:
+            # Imported here so the SDK is only loaded when notifications are used
+            import firebase_admin
+            from firebase_admin import credentials
+
             if not firebase_admin._apps:
                 current_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
                 service_account_path = os.path.join(current_dir, '..', 'firebase-service-account.json')
@@ -28,6 +51,7 @@ class NotificationService:
                     options = {
                         'projectId': cred.project_id,
                         'messagingSenderId': '702340089040',
+                        'httpTimeout': settings.HTTP_READ_TIMEOUT_SECONDS,
                     }
                     cls._app = firebase_admin.initialize_app(cred, options=options, name='news-api')
                 elif os.getenv('FIREBASE_SERVICE_ACCOUNT_JSON'):
@@ -36,12 +60,37 @@ class NotificationService:
                     options = {
                         'projectId': cred.project_id,
                         'messagingSenderId': '702340089040',
+                        'httpTimeout': settings.HTTP_READ_TIMEOUT_SECONDS,
                     }
                     cls._app = firebase_admin.initialize_app(cred, options=options, name='news-api')
                 else:
                     cls._app = None
-        except Exception:
+                    cls._init_error = "No Firebase service account configured"
+
+            if cls._app:
+                configure_requests_session(cls._messaging_session())
+        except Exception as e:
             cls._app = None
+            cls._init_error = str(e)
+
+    @classmethod
+    def _messaging_session(cls):
+        from firebase_admin import messaging
+
+        # firebase_admin has no public hook for its HTTP session; reach into the messaging service
+        return messaging._get_messaging_service(cls._app)._client.session
+
+    def check_health(self) -> Dict[str, Any]:
+        """Readiness check: raises if Firebase could not be initialized"""
+        if not self.app:
+            raise Exception(f"Firebase not initialized: {self._init_error}")
+        return {"transport": self.transport_stats()}
+
+    def transport_stats(self) -> Optional[Dict[str, Any]]:
+        """Connection pool usage of the FCM client, or None if Firebase is not initialized"""
+        if not self.app:
+            return None
+        return requests_pool_stats(self._messaging_session())
 
     def get_fcm_tokens_for_user(self, user_id: str) -> List[str]:
         """Get all FCM tokens for a specific user"""
@@ -63,7 +112,7 @@ class NotificationService:
         try:
             admin_result = supabase.table("profiles")\
                 .select("user_id")\
-                .eq("role_id", 1)\
+                .eq("role_id", role_registry.get_role_id("admin") or 1)\
                 .execute()
 
             if not admin_result.data:
@@ -92,9 +141,11 @@ class NotificationService:
         image_url: Optional[str] = None
     ) -> Dict[str, Any]:
         """Send notification to multiple FCM tokens using HTTP v1 multicast"""
-        if not self._app or not fcm_tokens:
+        if not fcm_tokens or not self.app:
             return {"success": False, "message": "Firebase not initialized or no tokens"}
 
+        from firebase_admin import messaging
+
         MAX_TOKENS_PER_REQUEST = 500
         tokens_batches = [fcm_tokens[i:i + MAX_TOKENS_PER_REQUEST]
                          for i in range(0, len(fcm_tokens), MAX_TOKENS_PER_REQUEST)]
@@ -130,7 +181,8 @@ class NotificationService:
                     )
                 )
 
-                response = messaging.send_each_for_multicast(message, app=self._app)
+                with upstream_span("fcm", "send_each_for_multicast"):
+                    response = messaging.send_each_for_multicast(message, app=self.app)
 
                 total_success += response.success_count
                 total_failure += response.failure_count
@@ -154,11 +206,13 @@ class NotificationService:
 
     def _remove_invalid_tokens(self, tokens: List[str]):
         """Remove invalid FCM tokens from database"""
+        # One delete per chunk rather than per token; chunks keep the query string short
+        CHUNK_SIZE = 100
         try:
-            for token in tokens:
+            for i in range(0, len(tokens), CHUNK_SIZE):
                 supabase.table("users_devices")\
                     .delete()\
-                    .eq("fcm_token", token)\
+                    .in_("fcm_token", tokens[i:i + CHUNK_SIZE])\
                     .execute()
         except Exception:
             pass
@@ -211,6 +265,24 @@ class NotificationService:
             }
         )
 
+    def notify_status_change(self, article_title: str, status: str, author_user_id: str, article_id: str):
+        """Notify the author and all admins of a status change (run as a background job)"""
+        author_response = supabase.table("profiles").select("display_name").eq("user_id", author_user_id).single().execute()
+        author_name = author_response.data.get("display_name", "Unknown Author") if author_response.data else "Unknown Author"
+
+        self.notify_author_status_change(
+            article_title=article_title,
+            status=status,
+            author_user_id=author_user_id,
+            article_id=article_id
+        )
+        self.notify_admins_status_change(
+            article_title=article_title,
+            status=status,
+            author_name=author_name,
+            article_id=article_id
+        )
+
     def notify_admins_status_change(self, article_title: str, status: str, author_name: str, article_id: str):
         """Send notification to all admins when article status changes"""
         admin_tokens = self.get_admin_fcm_tokens()
@@ -0,0 +1,62 @@
+from ..config.settings import settings
+from .metrics_service import metrics
+from typing import Dict, Optional
+
+# Upstream calls (Supabase + FCM) a route may make, worst case, with cold
+# auth, role and bookmark caches; public routes assume a signed-in caller.
+# Keyed by "METHOD route template". Routes not listed get
+# UPSTREAM_CALL_BUDGET_DEFAULT; UPSTREAM_CALL_BUDGETS (JSON) overrides.
+ROUTE_CALL_BUDGETS: Dict[str, int] = {
+    "GET /api/v1/articles/": 6,
+    "GET /api/v1/articles/search": 4,
+    "GET /api/v1/articles/my-articles": 3,
+    "GET /api/v1/articles/batch": 4,
+    "GET /api/v1/articles/trending": 3,
+    "GET /api/v1/articles/{article_id}": 4,
+    "GET /api/v1/articles/{article_id}/comments": 2,
+    "POST /api/v1/articles/{article_id}/comments": 3,
+    "POST /api/v1/articles/{article_id}/bookmark": 3,
+    "DELETE /api/v1/articles/{article_id}/bookmark": 3,
+    "PUT /api/v1/articles/{article_id}/status": 4,
+    "GET /api/v1/articles/admin/all": 4,
+    "GET /api/v1/articles/admin/pending": 3,
+    "GET /api/v1/auth/me": 2,
+    "POST /api/v1/auth/login": 2,
+    "GET /api/v1/users/me/bookmarks": 3,
+    "GET /api/v1/users/me/bookmarks/check": 3,
+    "GET /api/v1/users/admin/all-profiles": 5,
+    "GET /api/v1/categories/": 2,
+    "GET /api/v1/categories/tree": 2,
+    "GET /api/v1/categories/channels": 2,
+    "GET /api/v1/channels/public/list": 2,
+    "GET /api/v1/channels/followed": 3,
+    "GET /api/v1/channels/admin/list": 3,
+    "GET /api/v1/feed/": 6,
+}
+
+budget_exceeded = metrics.counter(
+    "upstream_call_budget_exceeded_total",
+    "Requests that made more upstream calls than their route's budget",
+    ("method", "route")
+)
+
+def budget_for(method: str, route: str) -> Optional[int]:
+    """Call budget for a route, or None when budgets are off"""
+    if settings.UPSTREAM_CALL_BUDGET_MODE == "off":
+        return None
+    key = f"{method} {route}"
+    if key in settings.UPSTREAM_CALL_BUDGETS:
+        return settings.UPSTREAM_CALL_BUDGETS[key]
+    return ROUTE_CALL_BUDGETS.get(key, settings.UPSTREAM_CALL_BUDGET_DEFAULT)
+
+def check_budget(method: str, route: str, calls: Dict[str, int]) -> Optional[str]:
+    """Return a description of the overrun if the request exceeded its budget, else None"""
+    budget = budget_for(method, route)
+    total = sum(calls.values())
+    if budget is None or total <= budget:
+        return None
+    budget_exceeded.inc(method, route)
+    breakdown = ", ".join(f"{upstream}={count}" for upstream, count in sorted(calls.items()))
+    message = f"{method} {route} made {total} upstream calls (budget {budget}): {breakdown}"
+    print(f"Upstream call budget exceeded: {message}")
+    return message
@@ -0,0 +1,257 @@
+from ..config.database import supabase
+from ..config.settings import settings
+from .counter_service import counter_service
+from .metrics_service import metrics
+from .task_service import task_runtime
+from .taxonomy_service import taxonomy_service
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+import math
+import threading
+import time
+
+CARD_COLUMNS = "id, title, slug, summary, hero_image_url, channel_id, created_at, published_at, view_count"
+RANKING_SORTS = ("trending", "most_read")
+
+# Scores are stored as views * 2^((t - epoch) / half_life); once the exponent
+# gets this large the epoch moves forward so the floats stay finite
+MAX_SCORE_EXPONENT = 512.0
+
+views_recorded = metrics.counter(
+    "article_views_recorded_total",
+    "Article views buffered for the rankings and view_count write-behind",
+    ()
+)
+
+Scope = Tuple[str, Any]
+
+def _timestamp(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+class RankingSnapshot:
+    """Immutable top-N article ids per (sort, scope) plus the cards to render them"""
+
+    def __init__(self, rankings: Dict[Tuple[str, str, Any], List[Any]], cards: Dict[Any, Dict[str, Any]]):
+        self.built_at = time.time()
+        self.rankings = rankings
+        self.cards = cards
+
+    def top(self, sort: str, scope: Scope, limit: int, exclude: Set[Any]) -> List[Dict[str, Any]]:
+        ids = self.rankings.get((sort, *scope), [])
+        if exclude:
+            ids = [article_id for article_id in ids if article_id not in exclude]
+        return [self.cards[article_id] for article_id in ids[:limit]]
+
+class RankingService:
+    """Trending and most-read article rankings served from memory.
+
+    Article views are only counted in memory on the request path. A periodic
+    flush applies the buffered views to time-decayed trending scores, hands
+    them to counter_service for the atomic articles.view_count write-behind,
+    and rebuilds the top lists for every scope: global, per channel and per
+    category (descendants included). The most-viewed published articles are
+    reloaded from Supabase every RANKING_RELOAD_INTERVAL_SECONDS to pick up
+    new articles and metadata; an article's views before it was first seen
+    count as of its publish time. Loads and rebuilds never run on the
+    request path: a cold worker serves empty rankings until the first load.
+    """
+
+    def __init__(self, half_life_hours: float, max_articles: int, top_size: int):
+        self._half_life = half_life_hours * 3600
+        self._max_articles = max_articles
+        self._top_size = top_size
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._pending: Counter = Counter()
+        # Discarded since the last rebuild; filtered out of the current snapshot
+        self._discarded: Set[Any] = set()
+        self._cards: Dict[Any, Dict[str, Any]] = {}
+        self._categories: Dict[Any, Tuple[Any, ...]] = {}
+        self._scores: Dict[Any, float] = {}
+        self._epoch = time.time()
+        self._snapshot: Optional[RankingSnapshot] = None
+        self._reload_requested = False
+        # Set by the first successful reload; flushes and rebuilds before it only see partial scores
+        self._loaded = False
+
+    def _weight(self, at: float) -> float:
+        return math.pow(2.0, (at - self._epoch) / self._half_life)
+
+    def _rebase(self, now: float) -> None:
+        if (now - self._epoch) / self._half_life < MAX_SCORE_EXPONENT:
+            return
+        factor = math.pow(2.0, -(now - self._epoch) / self._half_life)
+        self._scores = {article_id: score * factor for article_id, score in self._scores.items()}
+        self._epoch = now
+
+    def record_view(self, article: Dict[str, Any]) -> None:
+        """Count one view of a fetched article; only published articles are ranked"""
+        if article.get("status") != "published":
+            return
+        article_id = article["id"]
+        with self._lock:
+            self._pending[article_id] += 1
+            if article_id not in self._cards:
+                self._remember(article)
+        views_recorded.inc()
+
+    def discard(self, article_id: Any) -> None:
+        """Drop an article from the rankings, e.g. when it is unpublished"""
+        with self._lock:
+            self._cards.pop(article_id, None)
+            self._categories.pop(article_id, None)
+            self._scores.pop(article_id, None)
+            self._pending.pop(article_id, None)
+            self._discarded.add(article_id)
+        task_runtime.enqueue("ranking_rebuild", self.rebuild)
+
+    def _remember(self, article: Dict[str, Any]) -> None:
+        card = {column.strip(): article.get(column.strip()) for column in CARD_COLUMNS.split(",")}
+        self._cards[article["id"]] = card
+        self._categories[article["id"]] = tuple(
+            link["category_id"] for link in article.get("article_categories") or []
+        )
+
+    def reload(self) -> None:
+        """Load the most-viewed published articles and rebuild the rankings"""
+        try:
+            self._reload()
+        except Exception:
+            # Let the next cold request claim another load
+            with self._lock:
+                self._reload_requested = False
+            raise
+
+    def _reload(self) -> None:
+        with self._refresh_lock:
+            response = supabase.table("articles")\
+                .select(f"{CARD_COLUMNS}, article_categories(category_id)")\
+                .eq("status", "published")\
+                .order("view_count", desc=True)\
+                .limit(self._max_articles)\
+                .execute()
+            # Views flushed here but not yet written to view_count
+            articles = counter_service.overlay("articles", response.data or [])
+            now = time.time()
+            with self._lock:
+                self._rebase(now)
+                for article in articles:
+                    article_id = article["id"]
+                    if article_id not in self._scores:
+                        published = _timestamp(article.get("published_at")) or _timestamp(article.get("created_at")) or now
+                        self._scores[article_id] = (article.get("view_count") or 0) * self._weight(min(published, now))
+                    self._remember({**article, "status": "published"})
+            self._rebuild()
+            self._loaded = True
+
+    def flush(self) -> None:
+        """Apply buffered views to the scores, write them to view_count and rebuild the rankings"""
+        with self._refresh_lock:
+            now = time.time()
+            with self._lock:
+                pending, self._pending = self._pending, Counter()
+                self._rebase(now)
+                weight = self._weight(now)
+                for article_id, views in pending.items():
+                    self._scores[article_id] = self._scores.get(article_id, 0.0) + views * weight
+                    card = self._cards.get(article_id)
+                    if card is not None:
+                        card["view_count"] = (card.get("view_count") or 0) + views
+            # view_count is written behind by the counter flush, one atomic increment per article
+            for article_id, views in pending.items():
+                counter_service.increment("articles", article_id, "view_count", views)
+            self._rebuild()
+
+    def rebuild(self) -> None:
+        """Rebuild the top lists from the current scores"""
+        with self._refresh_lock:
+            self._rebuild()
+
+    def _rebuild(self) -> None:
+        with self._lock:
+            discarded = set(self._discarded)
+            # Bound memory: keep only the highest-scoring articles
+            if len(self._scores) > self._max_articles:
+                keep = sorted(self._scores, key=self._scores.get, reverse=True)[:self._max_articles]
+                self._scores = {article_id: self._scores[article_id] for article_id in keep}
+                kept = set(keep) | set(self._pending)
+                self._cards = {article_id: card for article_id, card in self._cards.items() if article_id in kept}
+                self._categories = {article_id: self._categories.get(article_id, ()) for article_id in self._cards}
+            scores = dict(self._scores)
+            cards = {article_id: dict(card) for article_id, card in self._cards.items()}
+            categories = dict(self._categories)
+
+        # A category ranking includes its subcategories' articles
+        ancestors: Dict[Any, set] = defaultdict(set)
+        for category_id, descendants in taxonomy_service.snapshot().descendants.items():
+            for descendant_id in descendants:
+                ancestors[descendant_id].add(category_id)
+
+        scopes: Dict[Any, List[Scope]] = {}
+        for article_id, card in cards.items():
+            article_scopes = [("global", None), ("channel", card.get("channel_id"))]
+            category_ids = set()
+            for category_id in categories.get(article_id, ()):
+                category_ids |= ancestors.get(category_id, {category_id})
+            article_scopes += [("category", category_id) for category_id in category_ids]
+            scopes[article_id] = article_scopes
+
+        sort_keys = {
+            "trending": lambda article_id: scores.get(article_id, 0.0),
+            "most_read": lambda article_id: cards[article_id].get("view_count") or 0,
+        }
+        rankings: Dict[Tuple[str, str, Any], List[Any]] = {}
+        for sort, key in sort_keys.items():
+            for article_id in sorted(cards, key=key, reverse=True):
+                if sort == "trending" and scores.get(article_id, 0.0) <= 0:
+                    continue
+                for scope in scopes[article_id]:
+                    ranked = rankings.setdefault((sort, *scope), [])
+                    if len(ranked) < self._top_size:
+                        ranked.append(article_id)
+
+        self._snapshot = RankingSnapshot(rankings, cards)
+        with self._lock:
+            self._discarded -= discarded
+
+    @property
+    def ready(self) -> bool:
+        return self._loaded
+
+    def request_reload(self) -> bool:
+        """Claim the first load when the rankings are cold; True if the caller should start it"""
+        with self._lock:
+            if self._loaded or self._reload_requested:
+                return False
+            self._reload_requested = True
+            return True
+
+    def top(self, sort: str = "trending", channel_id: Optional[int] = None,
+            category_id: Optional[int] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """Highest-ranked published articles, globally or within one channel or category"""
+        if sort not in RANKING_SORTS:
+            raise ValueError(f"Invalid sort '{sort}'")
+        if channel_id is not None and category_id is not None:
+            raise ValueError("Filter by channel_id or category_id, not both")
+        if not self._loaded:
+            return []
+        if channel_id is not None:
+            scope = ("channel", channel_id)
+        elif category_id is not None:
+            scope = ("category", category_id)
+        else:
+            scope = ("global", None)
+        return self._snapshot.top(sort, scope, limit, self._discarded)
+
+# Create singleton instance
+ranking_service = RankingService(
+    half_life_hours=settings.RANKING_HALF_LIFE_HOURS,
+    max_articles=settings.RANKING_MAX_ARTICLES,
+    top_size=settings.RANKING_TOP_SIZE
+)
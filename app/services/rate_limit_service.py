@@ -0,0 +1,200 @@
+from ..config.settings import settings
+from .metrics_service import metrics
+from collections import OrderedDict
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Dict, List, Optional, Tuple
+import math
+import threading
+import time
+
+rate_limited = metrics.counter(
+    "rate_limited_total",
+    "Requests rejected by a rate limiter",
+    ("limiter",)
+)
+rate_limit_errors = metrics.counter(
+    "rate_limit_backend_errors_total",
+    "Rate limiter backend failures (the request was allowed)",
+    ("limiter",)
+)
+
+class RateLimitExceeded(Exception):
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+    @property
+    def retry_after_header(self) -> str:
+        return str(max(1, math.ceil(self.retry_after)))
+
+class MemoryBucketBackend:
+    """Token buckets held in this process (least recently used evicted past max_keys)"""
+
+    # take() never waits on I/O, so async callers may call it directly
+    blocking = False
+
+    def __init__(self, max_keys: int):
+        self._max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def take(self, key: str, rate: float, burst: float, cost: float) -> float:
+        """Take `cost` tokens; returns 0 if allowed, else seconds until enough tokens refill"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self._max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+# Same algorithm as MemoryBucketBackend.take, run atomically inside Redis
+REDIS_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or burst
+local updated = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+class RedisBucketBackend:
+    """Token buckets shared by every worker through Redis (needs the redis package)"""
+
+    blocking = True
+
+    def __init__(self, url: str):
+        import redis
+
+        self._client = redis.Redis.from_url(url, socket_timeout=0.2, socket_connect_timeout=0.2)
+        self._script = self._client.register_script(REDIS_TOKEN_BUCKET)
+
+    def take(self, key: str, rate: float, burst: float, cost: float) -> float:
+        return float(self._script(keys=[f"ratelimit:{key}"], args=[rate, burst, cost, time.time()]))
+
+def create_backend():
+    if settings.RATE_LIMIT_BACKEND == "redis" and settings.RATE_LIMIT_REDIS_URL:
+        try:
+            return RedisBucketBackend(settings.RATE_LIMIT_REDIS_URL)
+        except ImportError:
+            print("RATE_LIMIT_BACKEND=redis but the redis package is not installed; using in-process rate limits")
+    return MemoryBucketBackend(settings.RATE_LIMIT_MAX_KEYS)
+
+class TokenBucketLimiter:
+    """Allows `burst` requests at once per key, refilled at `rate` per second.
+
+    A backend failure lets the request through: rate limiting must not take
+    the API down with it.
+    """
+
+    def __init__(self, name: str, rate: float, burst: float, backend=None):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self._backend = backend
+
+    @property
+    def backend(self):
+        return self._backend or rate_limit_backend
+
+    def check(self, key: str, cost: float = 1) -> None:
+        """Raise RateLimitExceeded if `key` is out of tokens"""
+        if self.rate <= 0:
+            return
+        try:
+            wait = self.backend.take(f"{self.name}:{key}", self.rate, self.burst, cost)
+        except Exception as e:
+            rate_limit_errors.inc(self.name)
+            print(f"Rate limiter {self.name} backend failed: {str(e)}")
+            return
+        if wait > 0:
+            rate_limited.inc(self.name)
+            raise RateLimitExceeded("Too many requests, slow down", wait)
+
+    async def check_async(self, key: str, cost: float = 1) -> None:
+        """check() for the event loop: a network backend runs in the threadpool"""
+        if self.rate > 0 and self.backend.blocking:
+            await run_in_threadpool(self.check, key, cost)
+        else:
+            self.check(key, cost)
+
+# Per-route request limits, keyed by "METHOD path" where a {segment} in the
+# path matches any value: {"ip": (per_minute, burst), "user": (per_minute, burst)}.
+# "user" buckets are keyed by the bearer token, so they only apply to
+# requests carrying one; a "*" entry would apply to every unlisted route.
+# RATE_LIMITS (JSON) overrides entries; null removes one.
+ROUTE_RATE_LIMITS: Dict[str, Dict[str, Tuple[float, float]]] = {
+    "POST /api/v1/auth/login": {"ip": (10, 10)},
+    "POST /api/v1/auth/register": {"ip": (5, 5)},
+    "POST /api/v1/auth/refresh": {"ip": (30, 10)},
+    "POST /api/v1/auth/google": {"ip": (10, 10)},
+    "GET /api/v1/articles/search": {"ip": (120, 30), "user": (60, 20)},
+    "POST /api/v1/notifications/set-token": {"ip": (30, 10), "user": (10, 5)},
+    "POST /api/v1/notifications/send": {"ip": (60, 20), "user": (30, 10)},
+}
+
+class RouteRateLimit:
+    def __init__(self, key: str, limits: Dict[str, Tuple[float, float]]):
+        self.key = key
+        self.method, _, path = key.partition(" ")
+        self.segments = path.strip("/").split("/") if path else []
+        self.limiters = {
+            kind: TokenBucketLimiter(f"{key} {kind}", rate=per_minute / 60, burst=burst)
+            for kind, (per_minute, burst) in limits.items()
+        }
+
+    def matches(self, method: str, segments: List[str]) -> bool:
+        if method != self.method or len(segments) != len(self.segments):
+            return False
+        return all(
+            pattern == segment or (pattern.startswith("{") and pattern.endswith("}"))
+            for pattern, segment in zip(self.segments, segments)
+        )
+
+class RouteRateLimits:
+    """ROUTE_RATE_LIMITS merged with RATE_LIMITS, matched against request paths"""
+
+    def __init__(self, config: Dict[str, Any]):
+        self.default = None
+        self.rules: List[RouteRateLimit] = []
+        for key, limits in config.items():
+            if not limits:
+                continue
+            if key == "*":
+                self.default = RouteRateLimit("*", limits)
+            else:
+                self.rules.append(RouteRateLimit(key, limits))
+        # Literal paths win over templated ones
+        self.rules.sort(key=lambda rule: sum(segment.startswith("{") for segment in rule.segments))
+
+    def match(self, method: str, path: str) -> Optional[RouteRateLimit]:
+        segments = path.strip("/").split("/")
+        for rule in self.rules:
+            if rule.matches(method, segments):
+                return rule
+        return self.default
+
+    @classmethod
+    def from_settings(cls) -> "RouteRateLimits":
+        return cls({**ROUTE_RATE_LIMITS, **settings.RATE_LIMITS})
+
+# Shared by every limiter unless one is given its own backend
+rate_limit_backend = create_backend()
@@ -0,0 +1,286 @@
+from ..config.database import supabase
+from ..config.settings import settings
+from .ranking_service import CARD_COLUMNS
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+import math
+import re
+import threading
+import time
+import numpy as np
+
+# How much each signal contributes to the relatedness score
+TEXT_WEIGHT = 0.6
+CATEGORY_WEIGHT = 0.3
+CHANNEL_WEIGHT = 0.1
+
+# Rows of the similarity matrix computed at once during a full build
+BUILD_BLOCK_SIZE = 256
+
+TOKEN_PATTERN = re.compile(r"\w\w+", re.UNICODE)
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if not token.isdigit()]
+
+# prepare() result: position, own neighbours, (existing position, score) it joins
+Prepared = Tuple[int, List[Tuple[float, Any]], List[Tuple[int, float]]]
+
+def _card(article: Dict[str, Any]) -> Dict[str, Any]:
+    return {column.strip(): article.get(column.strip()) for column in CARD_COLUMNS.split(",")}
+
+class RelatedIndex:
+    """Related-articles index over published articles.
+
+    Each article is a TF-IDF vector of its title and summary (L2-normalized
+    float32 rows of `vectors`). Relatedness combines cosine text similarity,
+    Jaccard overlap of categories and a same-channel bonus; the top
+    RELATED_TOP_SIZE neighbours of every article are computed up front.
+
+    Articles published after the build are added in two steps: prepare()
+    scores one against the index, growing the arrays (capacity doubles, so
+    adds do not copy them each time) without touching anything lookup()
+    reads; insert() then makes it visible. Only insert() needs to exclude
+    readers, and prepare() calls must not overlap.
+    """
+
+    def __init__(self, articles: List[Dict[str, Any]], max_terms: int, top_size: int):
+        self.built_at = time.time()
+        self.top_size = top_size
+        self.ids: List[Any] = [article["id"] for article in articles]
+        self.positions: Dict[Any, int] = {article_id: i for i, article_id in enumerate(self.ids)}
+        self.cards: Dict[Any, Dict[str, Any]] = {article["id"]: _card(article) for article in articles}
+        self.removed: set = set()
+
+        documents = [tokenize(f"{article.get('title') or ''} {article.get('summary') or ''}") for article in articles]
+        document_frequency = Counter(term for tokens in documents for term in set(tokens))
+        terms = [term for term, _ in document_frequency.most_common(max_terms)]
+        self.vocabulary: Dict[str, int] = {term: i for i, term in enumerate(terms)}
+        count = max(len(articles), 1)
+        self.idf = np.array(
+            [math.log((1 + count) / (1 + document_frequency[term])) + 1 for term in terms],
+            dtype=np.float32
+        )
+        # Backing arrays may hold spare rows past _size; use the views below
+        self._size = len(articles)
+        self._vectors = np.vstack([self._vector(tokens) for tokens in documents]) if documents \
+            else np.zeros((0, len(terms)), dtype=np.float32)
+
+        self.categories: Dict[Any, int] = {}
+        self._category_matrix = np.zeros((len(articles), 0), dtype=np.float32)
+        self._channels = np.zeros(len(articles), dtype=np.int64)
+        self.channel_codes: Dict[Any, int] = {}
+        for position, article in enumerate(articles):
+            self._set_metadata(position, article)
+
+        self.related: List[List[Tuple[float, Any]]] = [[] for _ in articles]
+        for start in range(0, len(articles), BUILD_BLOCK_SIZE):
+            rows = np.arange(start, min(start + BUILD_BLOCK_SIZE, len(articles)))
+            scores = self._scores(rows)
+            for offset, position in enumerate(rows):
+                self.related[position] = self._top(scores[offset], exclude=position)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[:self._size]
+
+    @property
+    def category_matrix(self) -> np.ndarray:
+        return self._category_matrix[:self._size]
+
+    @property
+    def channels(self) -> np.ndarray:
+        return self._channels[:self._size]
+
+    def _grow(self) -> int:
+        """Append an empty row to the arrays and return its position"""
+        if self._size == self._vectors.shape[0]:
+            capacity = max(2 * self._size, 16)
+            for name in ("_vectors", "_category_matrix", "_channels"):
+                current = getattr(self, name)
+                grown = np.zeros((capacity, *current.shape[1:]), dtype=current.dtype)
+                grown[:self._size] = current[:self._size]
+                setattr(self, name, grown)
+        self._size += 1
+        return self._size - 1
+
+    def _vector(self, tokens: List[str]) -> np.ndarray:
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for term, frequency in Counter(tokens).items():
+            index = self.vocabulary.get(term)
+            if index is not None:
+                vector[index] = 1 + math.log(frequency)
+        vector *= self.idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _set_metadata(self, position: int, article: Dict[str, Any]) -> None:
+        channel_id = article.get("channel_id")
+        self._channels[position] = self.channel_codes.setdefault(channel_id, len(self.channel_codes) + 1) \
+            if channel_id is not None else 0
+        for link in article.get("article_categories") or []:
+            column = self.categories.setdefault(link["category_id"], len(self.categories))
+            if column >= self._category_matrix.shape[1]:
+                grown = np.zeros((self._category_matrix.shape[0], column + 1), dtype=np.float32)
+                grown[:, :self._category_matrix.shape[1]] = self._category_matrix
+                self._category_matrix = grown
+            self._category_matrix[position, column] = 1.0
+
+    def _scores(self, rows: np.ndarray) -> np.ndarray:
+        """Relatedness of each article in `rows` to every article in the index"""
+        text = self.vectors[rows] @ self.vectors.T
+        shared = self.category_matrix[rows] @ self.category_matrix.T
+        sizes = self.category_matrix.sum(axis=1)
+        union = sizes[rows][:, None] + sizes[None, :] - shared
+        categories = np.divide(shared, union, out=np.zeros_like(shared), where=union > 0)
+        channel = (self.channels[rows][:, None] == self.channels[None, :]) & (self.channels[rows][:, None] > 0)
+        return TEXT_WEIGHT * text + CATEGORY_WEIGHT * categories + CHANNEL_WEIGHT * channel
+
+    def _top(self, scores: np.ndarray, exclude: int) -> List[Tuple[float, Any]]:
+        scores = scores.copy()
+        scores[exclude] = -1.0
+        count = min(self.top_size, len(scores) - 1)
+        if count <= 0:
+            return []
+        best = np.argpartition(-scores, count - 1)[:count]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(float(scores[i]), self.ids[i]) for i in best if scores[i] > 0]
+
+    def prepare(self, article: Dict[str, Any]) -> Optional[Prepared]:
+        """Score a newly published article against the existing vocabulary and IDF.
+
+        Returns its position, its neighbours and the existing articles whose
+        neighbours it joins, for insert(); None if it is already indexed.
+        """
+        if article["id"] in self.positions:
+            return None
+        position = self._grow()
+        self._vectors[position] = self._vector(tokenize(f"{article.get('title') or ''} {article.get('summary') or ''}"))
+        self._set_metadata(position, article)
+
+        scores = self._scores(np.array([position]))[0]
+        # The new article may displace the weakest neighbour of existing articles
+        score_list = scores.tolist()
+        displaced = []
+        for other, neighbours in enumerate(self.related[:position]):
+            score = score_list[other]
+            if score > 0 and (len(neighbours) < self.top_size or score > neighbours[-1][0]):
+                displaced.append((other, score))
+        return position, self._top(scores, exclude=position), displaced
+
+    def insert(self, article: Dict[str, Any], prepared: Optional[Prepared]) -> None:
+        """Make an article scored by prepare() visible to lookup()"""
+        article_id = article["id"]
+        self.removed.discard(article_id)
+        self.cards[article_id] = _card(article)
+        if prepared is None:
+            return
+        position, top, displaced = prepared
+        self.ids.append(article_id)
+        self.positions[article_id] = position
+        self.related.append(top)
+        for other, score in displaced:
+            neighbours = self.related[other]
+            neighbours.append((score, article_id))
+            neighbours.sort(key=lambda neighbour: neighbour[0], reverse=True)
+            del neighbours[self.top_size:]
+
+    def lookup(self, article_id: Any, limit: int) -> Optional[List[Dict[str, Any]]]:
+        position = self.positions.get(article_id)
+        if position is None or article_id in self.removed:
+            return None
+        related = []
+        for _, other_id in self.related[position]:
+            if other_id not in self.removed:
+                related.append(self.cards[other_id])
+                if len(related) == limit:
+                    break
+        return related
+
+class RelatedService:
+    """Precomputed related articles for article detail pages.
+
+    A full build loads the newest RELATED_MAX_ARTICLES published articles and
+    runs in the background (startup warm-up, every
+    RELATED_REBUILD_INTERVAL_SECONDS, or on first use). Articles published in
+    between are added incrementally; unpublished ones are hidden until the
+    next build.
+    """
+
+    def __init__(self, max_articles: int, max_terms: int, top_size: int):
+        self._max_articles = max_articles
+        self._max_terms = max_terms
+        self._top_size = top_size
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._index: Optional[RelatedIndex] = None
+        self._build_requested = False
+
+    @property
+    def ready(self) -> bool:
+        return self._index is not None
+
+    def rebuild(self) -> None:
+        """Load published articles and build a fresh index"""
+        with self._build_lock:
+            try:
+                response = supabase.table("articles")\
+                    .select(f"{CARD_COLUMNS}, article_categories(category_id)")\
+                    .eq("status", "published")\
+                    .order("created_at", desc=True)\
+                    .limit(self._max_articles)\
+                    .execute()
+                index = RelatedIndex(response.data or [], self._max_terms, self._top_size)
+                with self._lock:
+                    self._index = index
+            finally:
+                self._build_requested = False
+
+    def add_article(self, article_id: Any) -> None:
+        """Index an article that was just published"""
+        if self._index is None:
+            return
+        response = supabase.table("articles")\
+            .select(f"{CARD_COLUMNS}, status, article_categories(category_id)")\
+            .eq("id", article_id)\
+            .execute()
+        if not response.data or response.data[0].get("status") != "published":
+            return
+        article = response.data[0]
+        # Scoring runs outside _lock so related() is not held up; the build
+        # lock keeps it from overlapping another add or a rebuild
+        with self._build_lock:
+            index = self._index
+            if index is None:
+                return
+            prepared = index.prepare(article)
+            with self._lock:
+                index.insert(article, prepared)
+
+    def discard(self, article_id: Any) -> None:
+        """Stop recommending an article, e.g. when it is unpublished"""
+        with self._lock:
+            if self._index is not None:
+                self._index.removed.add(article_id)
+
+    def related(self, article_id: Any, limit: int = 5) -> Optional[List[Dict[str, Any]]]:
+        """Related published articles, best first; None until the index is built"""
+        index = self._index
+        if index is None:
+            return None
+        with self._lock:
+            return index.lookup(article_id, limit)
+
+    def request_build(self) -> bool:
+        """Claim the first build when the index is cold; True if the caller should start it"""
+        with self._lock:
+            if self._index is not None or self._build_requested:
+                return False
+            self._build_requested = True
+            return True
+
+# Create singleton instance
+related_service = RelatedService(
+    max_articles=settings.RELATED_MAX_ARTICLES,
+    max_terms=settings.RELATED_MAX_TERMS,
+    top_size=settings.RELATED_TOP_SIZE
+)
@@ -1,5 +1,8 @@
 from ..config.database import supabase
-from typing import List, Dict, Any
+from ..config.settings import settings
+from typing import List, Dict, Any, Optional
+import threading
+import time
 
 class RoleService:
     @staticmethod
@@ -9,4 +12,59 @@ class RoleService:
             response = supabase.table("roles").select("*").order("id").execute()
             return response.data
         except Exception as e:
-            raise e
\ No newline at end of file
+            raise e
+
+class RoleRegistry:
+    """Process-wide name <-> id cache of the roles table.
+
+    Loaded at startup and reloaded lazily once older than ROLE_REGISTRY_TTL_SECONDS.
+    A lookup miss forces a reload (rate limited) so newly added roles are picked up.
+    """
+
+    MISS_RELOAD_INTERVAL = 5.0
+
+    def __init__(self, ttl_seconds: float):
+        self._ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._ids_by_name: Dict[str, int] = {}
+        self._names_by_id: Dict[int, str] = {}
+        self._loaded_at = 0.0
+
+    def refresh(self) -> None:
+        """Reload roles from the database"""
+        roles = RoleService.get_all_roles() or []
+        ids_by_name = {role["name"]: role["id"] for role in roles}
+        names_by_id = {role["id"]: role["name"] for role in roles}
+        with self._lock:
+            self._ids_by_name = ids_by_name
+            self._names_by_id = names_by_id
+            self._loaded_at = time.monotonic()
+
+    def _ensure_fresh(self) -> None:
+        if time.monotonic() - self._loaded_at > self._ttl:
+            self.refresh()
+
+    def _reload_after_miss(self) -> bool:
+        if time.monotonic() - self._loaded_at < self.MISS_RELOAD_INTERVAL:
+            return False
+        self.refresh()
+        return True
+
+    def get_role_id(self, name: str) -> Optional[int]:
+        """Return the id of the role called `name`, or None if it does not exist"""
+        self._ensure_fresh()
+        role_id = self._ids_by_name.get(name)
+        if role_id is None and self._reload_after_miss():
+            role_id = self._ids_by_name.get(name)
+        return role_id
+
+    def get_role_name(self, role_id: int) -> Optional[str]:
+        """Return the name of the role with `role_id`, or None if it does not exist"""
+        self._ensure_fresh()
+        name = self._names_by_id.get(role_id)
+        if name is None and self._reload_after_miss():
+            name = self._names_by_id.get(role_id)
+        return name
+
+# Create singleton instance
+role_registry = RoleRegistry(ttl_seconds=settings.ROLE_REGISTRY_TTL_SECONDS)
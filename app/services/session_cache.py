@@ -0,0 +1,87 @@
+from ..config.settings import settings
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+import hashlib
+import threading
+import time
+
+class SessionCache:
+    """Short-lived, size-bounded cache used by get_current_user.
+
+    Holds verified access tokens (so repeated requests skip the GoTrue round
+    trip) and the profile + role row for each user. Entries expire after their
+    TTL, never outlive the token's own expiry, and are dropped explicitly when
+    a profile or role changes. Those drops only reach this process, so the
+    TTLs (seconds by default) bound how long other workers keep honoring a
+    logged-out token, a banned user or a revoked role.
+    """
+
+    def __init__(self, token_ttl: float, profile_ttl: float, max_entries: int):
+        self._token_ttl = token_ttl
+        self._profile_ttl = profile_ttl
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._users: "OrderedDict[str, tuple]" = OrderedDict()
+        self._profiles: "OrderedDict[str, tuple]" = OrderedDict()
+
+    @staticmethod
+    def _token_key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def _get(self, entries: OrderedDict, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del entries[key]
+                return None
+            entries.move_to_end(key)
+            return value
+
+    def _set(self, entries: OrderedDict, key: str, value: Any, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        with self._lock:
+            entries[key] = (value, time.monotonic() + ttl)
+            entries.move_to_end(key)
+            while len(entries) > self._max_entries:
+                entries.popitem(last=False)
+
+    def get_user(self, token: str):
+        """Return the cached auth user for a verified access token"""
+        return self._get(self._users, self._token_key(token))
+
+    def set_user(self, token: str, user, expires_at: Optional[int] = None) -> None:
+        """Remember that `token` belongs to `user`; expires_at is the token's unix expiry"""
+        ttl = self._token_ttl
+        if expires_at:
+            ttl = min(ttl, expires_at - time.time())
+        self._set(self._users, self._token_key(token), user, ttl)
+
+    def invalidate_token(self, token: str) -> None:
+        with self._lock:
+            self._users.pop(self._token_key(token), None)
+
+    def get_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """Return the cached profile row (with embedded role) for a user"""
+        return self._get(self._profiles, user_id)
+
+    def set_profile(self, user_id: str, profile: Dict[str, Any]) -> None:
+        self._set(self._profiles, user_id, profile, self._profile_ttl)
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop the profile and every cached token of a user"""
+        with self._lock:
+            self._profiles.pop(user_id, None)
+            stale = [key for key, (user, _) in self._users.items() if user.id == user_id]
+            for key in stale:
+                del self._users[key]
+
+# Create singleton instance
+session_cache = SessionCache(
+    token_ttl=settings.AUTH_TOKEN_CACHE_TTL_SECONDS,
+    profile_ttl=settings.PROFILE_CACHE_TTL_SECONDS,
+    max_entries=settings.SESSION_CACHE_MAX_ENTRIES
+)
@@ -0,0 +1,235 @@
+from ..config.settings import settings
+from .metrics_service import metrics
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import inspect
+import threading
+import time
+
+job_duration = metrics.histogram(
+    "background_job_duration_seconds",
+    "Run time of periodic and queued background jobs",
+    ("job", "kind", "outcome")
+)
+jobs_dropped = metrics.counter(
+    "background_jobs_dropped_total",
+    "Queued jobs rejected because the queue was full",
+    ("job",)
+)
+
+class PeriodicJob:
+    def __init__(self, name: str, func: Callable[[], Any], interval: float, run_on_shutdown: bool = False):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.run_on_shutdown = run_on_shutdown
+        self.last_run: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+class TaskRuntime:
+    """Runs periodic and queued background jobs inside the app's lifespan.
+
+    Jobs may be sync (run in the threadpool) or async. A failing job is
+    logged and counted but never stops its schedule or the queue workers.
+    On shutdown, periodic loops stop, jobs flagged run_on_shutdown run one
+    last time (for write-behind flushes), and the queue is drained; all of
+    that together gets at most drain_timeout seconds.
+    """
+
+    def __init__(self, workers: int, queue_size: int, drain_timeout: float):
+        self._workers = workers
+        self._queue_size = queue_size
+        self._drain_timeout = drain_timeout
+        self._periodic: Dict[str, PeriodicJob] = {}
+        self._periodic_tasks: List[asyncio.Task] = []
+        self._worker_tasks: List[asyncio.Task] = []
+        self._queue: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._running = False
+        self._lock = threading.Lock()
+
+        metrics.gauge(
+            "background_queue_depth",
+            "Queued background jobs waiting for a worker",
+            (),
+            lambda: {(): self.queue_depth()}
+        )
+
+    @property
+    def running(self) -> bool:
+        return self._running
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def register_periodic(self, name: str, func: Callable[[], Any], interval: float, run_on_shutdown: bool = False) -> None:
+        """Run func every interval seconds while the app is up (first run after one interval)"""
+        job = PeriodicJob(name, func, interval, run_on_shutdown)
+        self._periodic[name] = job
+        if self._running:
+            self._loop.call_soon_threadsafe(self._start_periodic, job)
+
+    def _start_periodic(self, job: PeriodicJob) -> None:
+        if not self._running:
+            return
+        self._periodic_tasks.append(asyncio.create_task(self._periodic_loop(job)))
+
+    def enqueue(self, name: str, func: Callable[..., Any], *args, **kwargs) -> bool:
+        """Queue func(*args, **kwargs) for a worker; safe to call from any thread.
+
+        Outside the lifespan (scripts, tests) a sync job runs inline, and an
+        async one too unless called from a running event loop. Returns
+        False if the job was dropped because the queue is full.
+        """
+        if not self._running:
+            self._run_inline(name, func, args, kwargs)
+            return True
+
+        if self._queue.qsize() >= self._queue_size:
+            jobs_dropped.inc(name)
+            print(f"Background queue full, dropped job {name}")
+            return False
+
+        item = (name, func, args, kwargs)
+        try:
+            on_loop = asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            on_loop = False
+        if on_loop:
+            self._put(item)
+        else:
+            self._loop.call_soon_threadsafe(self._put, item)
+        return True
+
+    def _put(self, item) -> None:
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            jobs_dropped.inc(item[0])
+
+    async def start(self) -> None:
+        with self._lock:
+            if self._running:
+                return
+            self._loop = asyncio.get_running_loop()
+            self._queue = asyncio.Queue(maxsize=self._queue_size)
+            self._stopping = asyncio.Event()
+            self._running = True
+        for job in list(self._periodic.values()):
+            self._start_periodic(job)
+        for _ in range(self._workers):
+            self._worker_tasks.append(asyncio.create_task(self._worker()))
+
+    async def stop(self) -> None:
+        if not self._running:
+            return
+        self._running = False
+        deadline = time.monotonic() + self._drain_timeout
+
+        def remaining() -> float:
+            return max(deadline - time.monotonic(), 0)
+
+        # Periodic loops exit at their next wait; a run in flight may finish within the deadline
+        self._stopping.set()
+        periodic_tasks, self._periodic_tasks = self._periodic_tasks, []
+        try:
+            await asyncio.wait_for(asyncio.gather(*periodic_tasks, return_exceptions=True), timeout=remaining())
+        except asyncio.TimeoutError:
+            print("Periodic jobs still running at the shutdown deadline were cancelled")
+
+        for job in list(self._periodic.values()):
+            if job.run_on_shutdown:
+                try:
+                    await asyncio.wait_for(self._run(job.name, "shutdown", job.func, (), {}), timeout=remaining())
+                except asyncio.TimeoutError:
+                    print(f"Shutdown run of {job.name} did not finish before the deadline")
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=remaining())
+        except asyncio.TimeoutError:
+            print(f"Background queue not drained at shutdown, {self.queue_depth()} jobs abandoned")
+
+        worker_tasks, self._worker_tasks = self._worker_tasks, []
+        for task in worker_tasks:
+            task.cancel()
+        await asyncio.gather(*worker_tasks, return_exceptions=True)
+
+    async def _periodic_loop(self, job: PeriodicJob) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=job.interval)
+                return
+            except asyncio.TimeoutError:
+                await self._run(job.name, "periodic", job.func, (), {}, job)
+
+    async def _worker(self) -> None:
+        while True:
+            name, func, args, kwargs = await self._queue.get()
+            try:
+                await self._run(name, "queued", func, args, kwargs)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, name: str, kind: str, func: Callable[..., Any], args, kwargs, job: Optional[PeriodicJob] = None) -> None:
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            if inspect.iscoroutinefunction(func):
+                await func(*args, **kwargs)
+            else:
+                await run_in_threadpool(func, *args, **kwargs)
+        except Exception as e:
+            outcome = "error"
+            print(f"Background job {name} failed: {str(e)}")
+            if job:
+                job.last_error = str(e)
+        finally:
+            job_duration.observe(time.perf_counter() - started, name, kind, outcome)
+            if job:
+                job.last_run = time.time()
+                if outcome == "ok":
+                    job.last_error = None
+
+    def _run_inline(self, name: str, func: Callable[..., Any], args, kwargs) -> None:
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            if inspect.iscoroutinefunction(func):
+                try:
+                    asyncio.get_running_loop()
+                except RuntimeError:
+                    asyncio.run(func(*args, **kwargs))
+                else:
+                    # Blocking this loop until the coroutine finishes is impossible
+                    raise RuntimeError("async jobs cannot run inline on a running event loop; start the task runtime")
+            else:
+                func(*args, **kwargs)
+        except Exception as e:
+            outcome = "error"
+            print(f"Background job {name} failed: {str(e)}")
+        finally:
+            job_duration.observe(time.perf_counter() - started, name, "inline", outcome)
+
+    def check_health(self) -> Dict[str, Any]:
+        """Readiness check: raises if the runtime is down or the queue is close to full"""
+        if not self._running:
+            raise Exception("Background task runtime not running")
+        depth = self.queue_depth()
+        if depth >= self._queue_size * 0.9:
+            raise Exception(f"Background queue nearly full ({depth}/{self._queue_size})")
+        return {
+            "queue_depth": depth,
+            "jobs": {
+                job.name: {"last_run": job.last_run, "last_error": job.last_error}
+                for job in self._periodic.values()
+            }
+        }
+
+# Create singleton instance
+task_runtime = TaskRuntime(
+    workers=settings.BACKGROUND_WORKERS,
+    queue_size=settings.BACKGROUND_QUEUE_SIZE,
+    drain_timeout=settings.BACKGROUND_DRAIN_TIMEOUT_SECONDS
+)
@@ -0,0 +1,158 @@
+from fastapi import Response
+from ..config.database import supabase
+from ..config.settings import settings
+from ..models.schemas import StandardResponse
+from ..middleware.compression import available_encodings, choose_encoding, compress
+from typing import Any, Dict, List, Optional
+import hashlib
+import threading
+import time
+
+class TaxonomySnapshot:
+    """Immutable copy of the channels and categories tables plus pre-rendered bodies"""
+
+    def __init__(self, version: int, channels: List[Dict[str, Any]], categories: List[Dict[str, Any]]):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.channels = channels
+        self.active_channels = sorted(
+            (channel for channel in channels if channel.get("is_active")),
+            key=lambda channel: channel.get("name") or ""
+        )
+        self.categories = categories
+        self.category_tree, self.descendants = self._build_category_tree(categories)
+        self.bodies = {
+            "channels": self._render({"channels": channels}, "Channels retrieved"),
+            "active_channels": self._render({"channels": self.active_channels}, "Active channels retrieved successfully"),
+            "categories": self._render({"categories": categories}, "Categories retrieved"),
+            "category_tree": self._render({"categories": self.category_tree}, "Category tree retrieved"),
+        }
+        # Derived from the content, so every worker (and every restart) agrees on it;
+        # weak because compressed and identity bodies share it
+        self.etags = {
+            key: f'W/"{hashlib.sha256(body).hexdigest()[:32]}"'
+            for key, body in self.bodies.items()
+        }
+        # Compressed once per snapshot instead of on every response
+        self.compressed_bodies = {
+            (key, encoding): compress(body, encoding)
+            for key, body in self.bodies.items()
+            if settings.COMPRESSION_ENABLED and len(body) >= settings.COMPRESSION_MINIMUM_SIZE
+            for encoding in available_encodings()
+        }
+
+    @staticmethod
+    def _build_category_tree(categories: List[Dict[str, Any]]):
+        """Nest categories under their parent_id and collect each one's descendant ids.
+
+        Categories whose parent is missing (or that sit on a parent_id cycle)
+        are treated as roots. descendants[id] always includes id itself.
+        """
+        nodes = {category["id"]: {**category, "children": []} for category in categories}
+        children_ids: Dict[Any, List[Any]] = {category_id: [] for category_id in nodes}
+        roots = []
+        for category_id, node in nodes.items():
+            parent_id = node.get("parent_id")
+            if parent_id in nodes and parent_id != category_id:
+                children_ids[parent_id].append(category_id)
+            else:
+                roots.append(category_id)
+
+        descendants: Dict[Any, frozenset] = {}
+        tree = []
+        visited = set()
+
+        def visit(category_id):
+            visited.add(category_id)
+            node = nodes[category_id]
+            ids = {category_id}
+            for child_id in children_ids[category_id]:
+                if child_id in visited:
+                    continue
+                node["children"].append(visit(child_id))
+                ids |= descendants[child_id]
+            descendants[category_id] = frozenset(ids)
+            return node
+
+        for category_id in roots:
+            tree.append(visit(category_id))
+        # Anything left over is part of a parent_id cycle; surface it as a root
+        for category_id in nodes:
+            if category_id not in visited:
+                tree.append(visit(category_id))
+        return tree, descendants
+
+    def category_with_descendants(self, category_id) -> List[Any]:
+        """Ids of a category and every category below it"""
+        return list(self.descendants.get(category_id, (category_id,)))
+
+    @staticmethod
+    def _render(data: dict, message: str) -> bytes:
+        return StandardResponse(success=True, data=data, message=message).model_dump_json().encode()
+
+class TaxonomyService:
+    """Versioned in-memory snapshot of channels and categories.
+
+    Public taxonomy endpoints serve the snapshot's pre-serialized bodies. The
+    snapshot reloads after TAXONOMY_CACHE_TTL_SECONDS, and channel/category
+    mutations in this process invalidate it immediately; other workers pick
+    changes up on their next reload.
+    """
+
+    def __init__(self, ttl_seconds: float):
+        self._ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._snapshot: Optional[TaxonomySnapshot] = None
+        self._version = 0
+
+    def _load(self) -> TaxonomySnapshot:
+        channels = supabase.table("channels").select("*").order("created_at", desc=True).execute()
+        categories = supabase.table("categories")\
+            .select("id, name, slug, description, parent_id, created_at, updated_at")\
+            .order("created_at", desc=True)\
+            .execute()
+        self._version += 1
+        self._snapshot = TaxonomySnapshot(self._version, channels.data or [], categories.data or [])
+        return self._snapshot
+
+    def _is_stale(self, snapshot: Optional[TaxonomySnapshot]) -> bool:
+        return snapshot is None or time.monotonic() - snapshot.loaded_at > self._ttl
+
+    def refresh(self) -> TaxonomySnapshot:
+        """Reload channels and categories and publish a new snapshot"""
+        with self._lock:
+            return self._load()
+
+    def invalidate(self) -> None:
+        """Force the next read to reload"""
+        with self._lock:
+            self._snapshot = None
+
+    def snapshot(self) -> TaxonomySnapshot:
+        snapshot = self._snapshot
+        if self._is_stale(snapshot):
+            with self._lock:
+                # Another caller may have reloaded while we waited for the lock
+                snapshot = self._snapshot
+                if self._is_stale(snapshot):
+                    snapshot = self._load()
+        return snapshot
+
+    def response(self, key: str, if_none_match: Optional[str] = None, accept_encoding: Optional[str] = None) -> Response:
+        """Return the pre-rendered (and, if accepted, precompressed) body for `key`, or 304 if the client copy is current"""
+        snapshot = self.snapshot()
+        etag = snapshot.etags[key]
+        headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+        # Weak comparison: W/"x" and "x" match
+        if if_none_match and etag.removeprefix("W/") in (tag.strip().removeprefix("W/") for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=headers)
+        encoding = choose_encoding(accept_encoding)
+        body = snapshot.compressed_bodies.get((key, encoding))
+        if body is None:
+            body = snapshot.bodies[key]
+        else:
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type="application/json", headers=headers)
+
+# Create singleton instance
+taxonomy_service = TaxonomyService(ttl_seconds=settings.TAXONOMY_CACHE_TTL_SECONDS)
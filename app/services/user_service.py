@@ -1,52 +1,84 @@
+from postgrest.exceptions import APIError
 from ..config.database import supabase, supabase_admin
+from .role_service import role_registry
+from .session_cache import session_cache
 
 class UserService:
+    @staticmethod
+    def get_auth_users(user_ids) -> dict:
+        """Auth fields (email, created_at, banned_until, is_super_admin) by user id, in one RPC call.
+
+        Reads only the given ids through get_auth_users
+        (migrations/add_get_auth_users.sql); without it the fields are omitted.
+        """
+        try:
+            ids = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+            if not ids:
+                return {}
+            try:
+                rows = supabase_admin.rpc("get_auth_users", {"user_ids": ids}).execute().data or []
+            except APIError as e:
+                if e.code != "PGRST202":
+                    raise
+                print("get_auth_users is not deployed (run migrations/add_get_auth_users.sql); auth fields omitted")
+                return {}
+            return {str(row["id"]): row for row in rows}
+        except Exception as e:
+            raise e
+
     @staticmethod
     def get_pending_authors():
         try:
             # Get users who have articles with 'pending_review' status
             # or users with author role that need approval
-            response = supabase.rpc('get_pending_authors').execute()
-
-            # Fallback: Use direct query if RPC doesn't exist
-            if hasattr(response, 'error') and response.error:
-                # Query users with pending articles or author role
-                pending_response = supabase.table("profiles").select(
-                    """
-                    user_id,
-                    display_name,
-                    avatar_url,
-                    roles(name, description)
-                    """
-                ).execute()
-
-                pending_users = []
-                for profile in pending_response.data or []:
-                    # Get user auth info
-                    try:
-                        user_response = supabase_admin.auth.admin.get_user_by_id(profile['user_id'])
-                        if user_response and user_response.user:
-                            profile['email'] = user_response.user.email
-                            profile['created_at'] = user_response.user.created_at
-                    except:
-                        profile['email'] = None
-                        profile['created_at'] = None
-
-                    # Check if user has pending articles
-                    articles_response = supabase.table("articles").select("id", "title", "status", "created_at").eq("user_id", profile['user_id']).eq("status", "pending_review").execute()
-
-                    if articles_response.data and len(articles_response.data) > 0:
-                        profile['pending_articles'] = articles_response.data
-                        profile['pending_reason'] = 'Has pending articles'
-                        pending_users.append(profile)
-                    elif profile.get('roles') and profile['roles'].get('name') == 'author':
-                        profile['pending_articles'] = []
-                        profile['pending_reason'] = 'Author role approval needed'
-                        pending_users.append(profile)
-
-                return pending_users
-
-            return response.data
+            try:
+                return supabase.rpc('get_pending_authors').execute().data
+            except APIError:
+                # Fallback: Use direct queries if the RPC is not deployed
+                pass
+
+            profiles_response = supabase.table("profiles").select(
+                """
+                user_id,
+                display_name,
+                avatar_url,
+                roles(name, description)
+                """
+            ).execute()
+
+            # One query for every pending article, grouped by author
+            articles_response = supabase.table("articles").select(
+                "id, title, status, created_at, user_id"
+            ).eq("status", "pending_review").execute()
+            pending_by_user = {}
+            for article in articles_response.data or []:
+                user_id = article.pop("user_id")
+                pending_by_user.setdefault(user_id, []).append(article)
+
+            pending_users = []
+            for profile in profiles_response.data or []:
+                pending_articles = pending_by_user.get(profile['user_id'], [])
+                if pending_articles:
+                    profile['pending_articles'] = pending_articles
+                    profile['pending_reason'] = 'Has pending articles'
+                    pending_users.append(profile)
+                elif profile.get('roles') and profile['roles'].get('name') == 'author':
+                    profile['pending_articles'] = []
+                    profile['pending_reason'] = 'Author role approval needed'
+                    pending_users.append(profile)
+
+            # Get user auth info
+            try:
+                auth_users = UserService.get_auth_users(profile['user_id'] for profile in pending_users)
+            except Exception as e:
+                print(f"Error fetching auth users: {str(e)}")
+                auth_users = {}
+            for profile in pending_users:
+                user = auth_users.get(profile['user_id'])
+                profile['email'] = user['email'] if user else None
+                profile['created_at'] = user['created_at'] if user else None
+
+            return pending_users
 
         except Exception as e:
             raise e
@@ -54,19 +86,17 @@ class UserService:
     @staticmethod
     def approve_author(user_id: str):
         try:
-            # Get author role ID from roles table
-            roles_response = supabase.table("roles").select("id").eq("name", "author").execute()
-            if not roles_response.data:
+            author_role_id = role_registry.get_role_id("author")
+            if author_role_id is None:
                 raise Exception("Author role not found")
 
-            author_role_id = roles_response.data[0]["id"]
-
             # Update user's profile to have author role
             response = supabase.table("profiles").update({"role_id": author_role_id}).eq("user_id", user_id).execute()
 
             if not response.data:
                 raise Exception("User not found or update failed")
 
+            session_cache.invalidate_user(user_id)
             return {"message": "Author approved successfully"}
         except Exception as e:
             raise e
@@ -74,19 +104,17 @@ class UserService:
     @staticmethod
     def update_user_role(user_id: str, role: str):
         try:
-            # Get role ID from roles table
-            roles_response = supabase.table("roles").select("id").eq("name", role).execute()
-            if not roles_response.data:
+            role_id = role_registry.get_role_id(role)
+            if role_id is None:
                 raise Exception(f"Role '{role}' not found")
 
-            role_id = roles_response.data[0]["id"]
-
             # Update user's profile to have the new role
             response = supabase.table("profiles").update({"role_id": role_id}).eq("user_id", user_id).execute()
 
             if not response.data:
                 raise Exception("User not found or update failed")
 
+            session_cache.invalidate_user(user_id)
             return {"message": f"User role updated to {role}"}
         except Exception as e:
             raise e
@@ -96,11 +124,9 @@ class UserService:
         try:
             # Build query with optional role filter
             if role_filter:
-                # First get role_id from roles table
-                role_response = supabase.table("roles").select("id").eq("name", role_filter).execute()
-                if not role_response.data:
+                role_id = role_registry.get_role_id(role_filter)
+                if role_id is None:
                     return []
-                role_id = role_response.data[0]["id"]
 
                 # Filter by role_id
                 response = supabase.table("profiles").select(
@@ -115,22 +141,20 @@ class UserService:
             profiles = response.data or []
 
             # Get user email and auth info using admin client
+            try:
+                auth_users = UserService.get_auth_users(profile['user_id'] for profile in profiles)
+            except Exception as e:
+                print(f"Error fetching auth users: {str(e)}")
+                auth_users = {}
+
             for profile in profiles:
-                try:
-                    user_response = supabase_admin.auth.admin.get_user_by_id(profile['user_id'])
-                    if user_response and hasattr(user_response, 'user') and user_response.user:
-                        user = user_response.user
-                        profile['email'] = user.email
-                        profile['created_at'] = user.created_at
-                        profile['banned_until'] = getattr(user, 'banned_until', None)
-                        profile['is_super_admin'] = getattr(user, 'is_super_admin', False)
-                    else:
-                        profile['email'] = None
-                        profile['created_at'] = None
-                        profile['banned_until'] = None
-                        profile['is_super_admin'] = False
-                except Exception as e:
-                    print(f"Error fetching user {profile['user_id']}: {str(e)}")
+                user = auth_users.get(profile['user_id'])
+                if user:
+                    profile['email'] = user['email']
+                    profile['created_at'] = user['created_at']
+                    profile['banned_until'] = user.get('banned_until')
+                    profile['is_super_admin'] = bool(user.get('is_super_admin'))
+                else:
                     profile['email'] = None
                     profile['created_at'] = None
                     profile['banned_until'] = None
@@ -148,6 +172,7 @@ class UserService:
                 user_id,
                 {'ban_duration': '876000h'}  # Ban for 100 years (100 * 365 * 24 hours)
             )
+            session_cache.invalidate_user(user_id)
 
             return {"message": "User banned successfully"}
         except Exception as e:
@@ -0,0 +1,60 @@
+-- Denormalized counters maintained by the API's write-behind flush
+-- (app/services/counter_service.py). Safe to run more than once.
+
+ALTER TABLE articles
+    ADD COLUMN IF NOT EXISTS comment_count INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS bookmark_count INTEGER NOT NULL DEFAULT 0;
+
+ALTER TABLE channels
+    ADD COLUMN IF NOT EXISTS follower_count INTEGER NOT NULL DEFAULT 0,
+    ADD COLUMN IF NOT EXISTS subscriber_count INTEGER NOT NULL DEFAULT 0;
+
+-- Backfill from the source tables
+UPDATE articles a SET
+    comment_count = (SELECT COUNT(*) FROM comments c WHERE c.article_id = a.id),
+    bookmark_count = (SELECT COUNT(*) FROM bookmarks b WHERE b.article_id = a.id);
+
+UPDATE channels ch SET
+    follower_count = (SELECT COUNT(*) FROM channel_followers f WHERE f.channel_id = ch.id),
+    subscriber_count = (SELECT COUNT(*) FROM channel_subscriptions s WHERE s.channel_id = ch.id);
+
+-- Flush ids already applied, so a batch retried after a lost response is not applied twice
+CREATE TABLE IF NOT EXISTS counter_flushes (
+    flush_id UUID PRIMARY KEY,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS counter_flushes_applied_at_idx ON counter_flushes (applied_at);
+
+-- Applies a batch of [{"table", "id", "column", "delta"}] in one call, once
+-- per flush_id. Only the counter columns above and articles.view_count (the
+-- ranking write-behind) can be touched; counters never go below zero.
+DROP FUNCTION IF EXISTS apply_counter_deltas(JSONB);
+CREATE OR REPLACE FUNCTION apply_counter_deltas(deltas JSONB, flush_id UUID)
+RETURNS VOID
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    d JSONB;
+BEGIN
+    INSERT INTO counter_flushes (flush_id) VALUES (apply_counter_deltas.flush_id) ON CONFLICT DO NOTHING;
+    IF NOT FOUND THEN
+        RETURN;
+    END IF;
+    DELETE FROM counter_flushes WHERE applied_at < now() - INTERVAL '1 day';
+
+    FOR d IN SELECT * FROM jsonb_array_elements(deltas) LOOP
+        IF d->>'table' = 'articles' AND d->>'column' IN ('comment_count', 'bookmark_count', 'view_count') THEN
+            EXECUTE format('UPDATE articles SET %1$I = GREATEST(%1$I + $1, 0) WHERE id = $2::uuid', d->>'column')
+                USING (d->>'delta')::INTEGER, d->>'id';
+        ELSIF d->>'table' = 'channels' AND d->>'column' IN ('follower_count', 'subscriber_count') THEN
+            EXECUTE format('UPDATE channels SET %1$I = GREATEST(%1$I + $1, 0) WHERE id = $2::bigint', d->>'column')
+                USING (d->>'delta')::INTEGER, d->>'id';
+        END IF;
+    END LOOP;
+END;
+$$;
+
+REVOKE ALL ON FUNCTION apply_counter_deltas(JSONB, UUID) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION apply_counter_deltas(JSONB, UUID) TO service_role;
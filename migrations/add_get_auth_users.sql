@@ -0,0 +1,18 @@
+-- Auth fields for just the users being listed, so admin listings
+-- (app/services/user_service.py) never page through every auth user.
+-- Safe to run more than once.
+
+CREATE OR REPLACE FUNCTION get_auth_users(user_ids UUID[])
+RETURNS TABLE (id UUID, email TEXT, created_at TIMESTAMPTZ, banned_until TIMESTAMPTZ, is_super_admin BOOLEAN)
+LANGUAGE sql
+STABLE
+SECURITY DEFINER
+SET search_path = public
+AS $$
+    SELECT u.id, u.email::TEXT, u.created_at, u.banned_until, COALESCE(u.is_super_admin, FALSE)
+    FROM auth.users u
+    WHERE u.id = ANY(user_ids);
+$$;
+
+REVOKE ALL ON FUNCTION get_auth_users(UUID[]) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION get_auth_users(UUID[]) TO service_role;
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+End-to-end load benchmark against the in-process Supabase fake.
+
+Drives the real FastAPI app (all middleware, services and the shared HTTP
+client) through httpx's ASGI transport, with FakeSupabase standing in for
+PostgREST/GoTrue/Storage, and reports p50/p99 latency and throughput per
+endpoint. Injected upstream latency makes the numbers resemble a deployed
+worker; the same seed and settings give comparable runs before and after
+a change.
+
+Usage:
+    python tests/bench_load.py [--requests 200] [--concurrency 10]
+        [--latency-ms 5] [--jitter 0.2] [--only articles] [--json out.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+os.environ.setdefault("SUPABASE_URL", "https://fake.supabase.co")
+os.environ.setdefault("SUPABASE_KEY", "fake-anon-key")
+os.environ.setdefault("WARMUP_ON_STARTUP", "false")
+# Every simulated user shares one client address and account; limits would reject most of the run
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("COMMENT_RATE_PER_MINUTE", "0")
+
+import httpx
+
+from fake_supabase import FakeSupabase, seed
+
+class Scenario:
+    def __init__(self, name: str, method: str, path: Callable[[Dict[str, Any], random.Random], str],
+                 role: Optional[str] = None, body: Optional[Callable[[random.Random], dict]] = None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.role = role
+        self.body = body
+
+def _published(data, rng):
+    return rng.choice(data["published_article_ids"])
+
+SCENARIOS = [
+    Scenario("GET /articles", "GET", lambda d, r: "/api/v1/articles/?limit=20"),
+    Scenario("GET /articles?category", "GET", lambda d, r: f"/api/v1/articles/?limit=20&category={d['categories'][0]['id']}"),
+    Scenario("GET /articles/search", "GET", lambda d, r: "/api/v1/articles/search?q=article%201"),
+    Scenario("GET /articles/{id}", "GET", lambda d, r: f"/api/v1/articles/{_published(d, r)}"),
+    Scenario("GET /articles/trending", "GET", lambda d, r: f"/api/v1/articles/trending?channel_id={d['channels'][0]['id']}"),
+    Scenario("GET /articles/{id}/comments", "GET", lambda d, r: f"/api/v1/articles/{_published(d, r)}/comments"),
+    Scenario("GET /categories/tree", "GET", lambda d, r: "/api/v1/categories/tree"),
+    Scenario("GET /channels/public/list", "GET", lambda d, r: "/api/v1/channels/public/list"),
+    Scenario("GET /auth/me", "GET", lambda d, r: "/api/v1/auth/me", role="reader"),
+    Scenario("GET /users/me/bookmarks", "GET", lambda d, r: "/api/v1/users/me/bookmarks", role="reader"),
+    Scenario("GET /channels/followed", "GET", lambda d, r: "/api/v1/channels/followed", role="reader"),
+    Scenario("GET /articles/admin/all", "GET", lambda d, r: "/api/v1/articles/admin/all?limit=20", role="admin"),
+    Scenario("POST /articles/{id}/comments", "POST", lambda d, r: f"/api/v1/articles/{_published(d, r)}/comments",
+             role="reader", body=lambda r: {"content": f"Benchmark comment {r.random()}"}),
+]
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = max(int(round(fraction * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, data: Dict[str, Any],
+                       tokens: Dict[str, str], requests: int, concurrency: int, rng: random.Random) -> Dict[str, Any]:
+    headers = {"Authorization": f"Bearer {tokens[scenario.role]}"} if scenario.role else {}
+    latencies: List[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def one():
+        nonlocal errors
+        started = time.perf_counter()
+        response = await client.request(
+            scenario.method,
+            scenario.path(data, rng),
+            headers=headers,
+            json=scenario.body(rng) if scenario.body else None
+        )
+        latencies.append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            errors += 1
+
+    async def worker():
+        for _ in remaining:
+            await one()
+
+    for _ in range(min(5, requests)):
+        await one()
+    latencies.clear()
+    errors = 0
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "endpoint": scenario.name,
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "throughput_rps": round(requests / elapsed, 1),
+    }
+
+async def main_async(args) -> List[Dict[str, Any]]:
+    from app.main import app
+
+    fake = FakeSupabase(latency=args.latency_ms / 1000, jitter=args.jitter, seed=args.seed)
+    fake.install()
+    data = seed(fake, articles=args.articles)
+    rng = random.Random(args.seed)
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            tokens = {}
+            for role in ("reader", "author", "admin"):
+                response = await client.post("/api/v1/auth/login", json={
+                    "email": f"{role}@example.com", "password": data["password"]
+                })
+                tokens[role] = response.json()["data"]["access_token"]
+
+            for scenario in SCENARIOS:
+                if args.only and args.only not in scenario.name:
+                    continue
+                fake.reset_calls()
+                result = await run_scenario(client, scenario, data, tokens, args.requests, args.concurrency, rng)
+                result["upstream_calls_per_request"] = round(sum(fake.calls.values()) / (args.requests + min(5, args.requests)), 2)
+                results.append(result)
+    fake.uninstall()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=10, help="concurrent clients")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="injected latency per upstream call")
+    parser.add_argument("--jitter", type=float, default=0.2, help="latency jitter as a fraction")
+    parser.add_argument("--articles", type=int, default=200, help="seeded articles")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", help="run endpoints whose name contains this text")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(main_async(args))
+
+    print(f"{args.requests} requests/endpoint, concurrency {args.concurrency}, "
+          f"upstream latency {args.latency_ms} ms ±{args.jitter:.0%}")
+    print(f"{'endpoint':<32} {'p50 ms':>9} {'p99 ms':>9} {'req/s':>9} {'calls/req':>10} {'errors':>7}")
+    for result in results:
+        print(f"{result['endpoint']:<32} {result['p50_ms']:>9} {result['p99_ms']:>9} "
+              f"{result['throughput_rps']:>9} {result['upstream_calls_per_request']:>10} {result['errors']:>7}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark: a 50-article feed with full content.
+
+Serves the same StandardResponse through FastAPI's default path
+(jsonable_encoder + json.dumps) and through FastJSONRoute/FastJSONResponse,
+checks both produce the same JSON, and reports throughput for each. Runs
+in-process; no server or network needed.
+
+Usage:
+    python tests/bench_serialization.py [requests]
+"""
+
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from app.models.schemas import StandardResponse
+from app.controllers.responses import FastJSONResponse, FastJSONRoute
+
+PARAGRAPH = "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor. "
+
+def build_feed(count: int = 50) -> StandardResponse:
+    articles = [
+        {
+            "id": str(uuid.uuid4()),
+            "title": f"Article {i}",
+            "summary": PARAGRAPH * 3,
+            "content": PARAGRAPH * 120,
+            "image_url": f"https://cdn.example.com/{i}.jpg",
+            "status": "published",
+            "view_count": i * 17,
+            "user_id": str(uuid.uuid4()),
+            "channel_id": 1,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "channels": {"id": 1, "name": "VnExpress", "url": "https://vnexpress.net", "is_active": True},
+            "article_categories": [{"article_id": str(uuid.uuid4()), "category_id": 3}],
+        }
+        for i in range(count)
+    ]
+    return StandardResponse(
+        success=True,
+        data={"articles": articles, "pagination": {"page": 1, "limit": count, "total": 500}},
+        message="Articles retrieved"
+    )
+
+def build_app(feed: StandardResponse, fast: bool) -> FastAPI:
+    if fast:
+        app = FastAPI(default_response_class=FastJSONResponse)
+        router = APIRouter(route_class=FastJSONRoute)
+    else:
+        app = FastAPI()
+        router = APIRouter()
+
+    @router.get("/feed")
+    async def get_feed():
+        return feed
+
+    app.include_router(router)
+    return app
+
+def measure(client: TestClient, requests: int) -> float:
+    client.get("/feed")
+    started = time.perf_counter()
+    for _ in range(requests):
+        client.get("/feed")
+    return requests / (time.perf_counter() - started)
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    feed = build_feed()
+    default_client = TestClient(build_app(feed, fast=False))
+    fast_client = TestClient(build_app(feed, fast=True))
+
+    default_body = default_client.get("/feed").content
+    fast_body = fast_client.get("/feed").content
+    assert json.loads(default_body) == json.loads(fast_body), "serialized payloads differ"
+
+    default_rps = measure(default_client, requests)
+    fast_rps = measure(fast_client, requests)
+    print(f"payload: {len(fast_body) / 1024:.0f} KiB, {requests} requests each")
+    print(f"default (jsonable_encoder + json): {default_rps:.0f} req/s")
+    print(f"FastJSONRoute (orjson):            {fast_rps:.0f} req/s")
+    print(f"speedup: {fast_rps / default_rps:.2f}x")
+
+if __name__ == "__main__":
+    main()
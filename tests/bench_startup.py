@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark.
+
+Measures, in fresh interpreters, how long `import app.main` takes and how
+long the first use of the Supabase client costs afterwards (which is where
+lazy initialization moves that work). No network calls are made.
+
+Usage:
+    python tests/bench_startup.py [runs]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from app.config.database import supabase
+supabase.table("articles")
+first_use = time.perf_counter()
+print(imported - start, first_use - imported)
+"""
+
+def run_once() -> tuple:
+    env = dict(os.environ)
+    env.setdefault("SUPABASE_URL", "https://example.supabase.co")
+    env.setdefault("SUPABASE_KEY", "bench-key")
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout.split()
+    return float(output[-2]), float(output[-1])
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    results = [run_once() for _ in range(runs)]
+    imports = [r[0] * 1000 for r in results]
+    first_uses = [r[1] * 1000 for r in results]
+    print(f"runs: {runs}")
+    print(f"import app.main: median {statistics.median(imports):.0f} ms, max {max(imports):.0f} ms")
+    print(f"first client use: median {statistics.median(first_uses):.0f} ms, max {max(first_uses):.0f} ms")
+
+if __name__ == "__main__":
+    main()
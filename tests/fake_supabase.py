@@ -0,0 +1,821 @@
+"""
+In-process stand-in for the Supabase APIs the services use.
+
+FakeSupabase implements the parts of PostgREST (/rest/v1), GoTrue
+(/auth/v1) and Storage (/storage/v1) this app talks to, on top of plain
+in-memory tables, and plugs into the shared HTTP client as an httpx
+transport. Every service, controller and middleware therefore runs
+unchanged, including the instrumented transport and the metrics.
+
+Supported PostgREST surface: select with columns, aliases and embedded
+resources (many-to-one and one-to-many, `!inner`), filters (eq, neq, gt,
+gte, lt, lte, like, ilike, in, is, not.*, or), filters on embedded
+resources, order, limit/offset, count=exact, single objects, insert /
+upsert (on_conflict, merge or ignore duplicates), update, delete, unique
+constraints and RPC functions registered in Python.
+
+Usage:
+    fake = FakeSupabase(latency=0.005)
+    fake.install()           # route the app's Supabase traffic here
+    seed(fake)               # roles, channels, categories, users, articles
+    ...
+    fake.uninstall()
+"""
+
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import base64
+import json
+import random
+import re
+import threading
+import time
+import uuid
+
+import httpx
+
+# (table, column) -> (referenced table, referenced column)
+FOREIGN_KEYS = {
+    ("articles", "channel_id"): ("channels", "id"),
+    ("article_categories", "article_id"): ("articles", "id"),
+    ("article_categories", "category_id"): ("categories", "id"),
+    ("bookmarks", "article_id"): ("articles", "id"),
+    ("comments", "article_id"): ("articles", "id"),
+    ("channel_followers", "channel_id"): ("channels", "id"),
+    ("channel_subscriptions", "channel_id"): ("channels", "id"),
+    ("profiles", "role_id"): ("roles", "id"),
+    ("profiles", "channel_id"): ("channels", "id"),
+    ("categories", "parent_id"): ("categories", "id"),
+}
+
+UNIQUE_CONSTRAINTS = {
+    "roles": [("name",)],
+    "profiles": [("user_id",)],
+    "articles": [("slug",)],
+    "article_categories": [("article_id", "category_id")],
+    "bookmarks": [("user_id", "article_id")],
+    "channel_followers": [("user_id", "channel_id")],
+    "channel_subscriptions": [("user_id", "channel_id")],
+    "users_devices": [("fcm_token",)],
+}
+
+# Tables whose generated id is a uuid; every other table gets a serial id
+UUID_TABLES = {"articles", "comments"}
+
+# Tables without a surrogate id column
+LINK_TABLES = {"article_categories", "channel_followers", "channel_subscriptions"}
+
+COLUMN_DEFAULTS = {
+    "articles": {"status": "pending_review", "view_count": 0, "published_at": None,
+                 "comment_count": 0, "bookmark_count": 0},
+    "channels": {"is_active": True, "follower_count": 0, "subscriber_count": 0},
+}
+
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+class FakeSupabase:
+    """In-memory PostgREST/GoTrue/Storage served through an httpx transport.
+
+    `latency` (seconds) is added to every call, or per upstream through
+    `latency_by_upstream` ({"rest": ..., "auth": ..., "storage": ...});
+    `jitter` spreads it uniformly by that fraction.
+    """
+
+    def __init__(self, latency: float = 0.0, latency_by_upstream: Optional[Dict[str, float]] = None,
+                 jitter: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.latency_by_upstream = latency_by_upstream or {}
+        self.jitter = jitter
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.functions: Dict[str, Callable[["FakeSupabase", Dict[str, Any]], Any]] = {
+            "get_pending_authors": pending_authors_rpc,
+            "apply_counter_deltas": counter_deltas_rpc,
+            "get_auth_users": auth_users_rpc,
+        }
+        self.users: Dict[str, Dict[str, Any]] = {}
+        self.passwords: Dict[str, str] = {}
+        self.refresh_tokens: Dict[str, str] = {}
+        self.objects: Dict[str, bytes] = {}
+        self.calls: Counter = Counter()
+        self._serials: Counter = Counter()
+        self._clock = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self._previous_transport = None
+
+    # Wiring
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def install(self) -> None:
+        """Send the app's shared HTTP client to this fake (keeps the metrics instrumentation)"""
+        from app.config.http import http_client
+        instrumented = http_client._transport
+        self._previous_transport = instrumented.transport
+        instrumented.transport = self.transport()
+
+    def uninstall(self) -> None:
+        from app.config.http import http_client
+        if self._previous_transport is not None:
+            http_client._transport.transport = self._previous_transport
+            self._previous_transport = None
+
+    def reset_calls(self) -> None:
+        self.calls.clear()
+
+    # Data helpers
+
+    def now(self) -> str:
+        # Strictly increasing timestamps keep "order by created_at" deterministic
+        with self._lock:
+            self._clock += timedelta(milliseconds=1)
+            return self._clock.isoformat()
+
+    def table(self, name: str) -> List[Dict[str, Any]]:
+        return self.tables.setdefault(name, [])
+
+    def insert(self, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert one row directly, applying defaults and unique constraints"""
+        with self._lock:
+            return self._insert_rows(table, [row])[0]
+
+    def add_user(self, email: str, password: str, role: str = "reader",
+                 display_name: Optional[str] = None, **profile: Any) -> Dict[str, Any]:
+        """Create a GoTrue user and its profile row"""
+        with self._lock:
+            user_id = str(uuid.uuid4())
+            created_at = self.now()
+            self.users[user_id] = {
+                "id": user_id,
+                "aud": "authenticated",
+                "role": "authenticated",
+                "email": email,
+                "email_confirmed_at": created_at,
+                "app_metadata": {"provider": "email", "providers": ["email"]},
+                "user_metadata": {"display_name": display_name} if display_name else {},
+                "created_at": created_at,
+                "updated_at": created_at,
+            }
+            self.passwords[email] = password
+            role_id = next((r["id"] for r in self.table("roles") if r["name"] == role), None)
+            self.insert("profiles", {
+                "user_id": user_id,
+                "role_id": role_id,
+                "display_name": display_name,
+                "avatar_url": None,
+                **profile,
+            })
+            return self.users[user_id]
+
+    # Transport entry point
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        upstream = path.split("/")[1] if path.count("/") > 1 else ""
+        self._sleep(upstream)
+        with self._lock:
+            self.calls[f"{request.method} {self._call_target(path)}"] += 1
+            try:
+                if upstream == "rest":
+                    return self._handle_rest(request)
+                if upstream == "auth":
+                    return self._handle_auth(request)
+                if upstream == "storage":
+                    return self._handle_storage(request)
+                return _error(404, "PGRST000", f"No fake for {path}")
+            except FakeError as e:
+                return _error(e.status, e.code, e.message)
+
+    @staticmethod
+    def _call_target(path: str) -> str:
+        parts = path.strip("/").split("/")
+        if parts[:2] == ["rest", "v1"]:
+            return "/".join(parts[2:4]) if len(parts) > 3 and parts[2] == "rpc" else (parts[2] if len(parts) > 2 else "")
+        if parts[:2] == ["auth", "v1"]:
+            return "auth/" + ("admin/users" if parts[2:4] == ["admin", "users"] else "/".join(parts[2:3]))
+        return "/".join(parts[:3])
+
+    def _sleep(self, upstream: str) -> None:
+        latency = self.latency_by_upstream.get(upstream, self.latency)
+        if latency > 0:
+            if self.jitter:
+                latency *= 1 + self._random.uniform(-self.jitter, self.jitter)
+            time.sleep(max(latency, 0))
+
+    # PostgREST
+
+    def _handle_rest(self, request: httpx.Request) -> httpx.Response:
+        parts = request.url.path.strip("/").split("/")[2:]
+        if not parts:
+            raise FakeError(404, "PGRST000", "Missing table")
+        if parts[0] == "rpc":
+            return self._handle_rpc(parts[1], request)
+
+        table = parts[0]
+        params = list(request.url.params.multi_items())
+        prefer = _parse_prefer(request.headers.get("prefer", ""))
+        single = "vnd.pgrst.object" in request.headers.get("accept", "")
+        select = _param(params, "select") or "*"
+
+        if request.method in ("GET", "HEAD"):
+            rows = self._select(table, params)
+            total = len(rows)
+            offset = int(_param(params, "offset") or 0)
+            limit = _param(params, "limit")
+            rows = rows[offset:offset + int(limit)] if limit is not None else rows[offset:]
+            rendered = self._render_rows(table, rows, select, params)
+            return self._respond(request, rendered, single, prefer, total=total, offset=offset)
+
+        if request.method == "POST":
+            body = json.loads(request.content or b"null")
+            rows = body if isinstance(body, list) else [body]
+            on_conflict = _param(params, "on_conflict")
+            resolution = prefer.get("resolution")
+            written = self._upsert_rows(table, rows, on_conflict, resolution) if resolution else self._insert_rows(table, rows)
+            rendered = self._render_rows(table, written, select, params)
+            return self._respond(request, rendered, single, prefer, status=201)
+
+        if request.method == "PATCH":
+            changes = json.loads(request.content or b"{}")
+            updated = []
+            for row in self._select(table, params):
+                row.update(self._resolve_values(changes))
+                updated.append(row)
+            rendered = self._render_rows(table, updated, select, params)
+            return self._respond(request, rendered, single, prefer)
+
+        if request.method == "DELETE":
+            doomed = self._select(table, params)
+            doomed_ids = {id(row) for row in doomed}
+            self.tables[table] = [row for row in self.table(table) if id(row) not in doomed_ids]
+            rendered = self._render_rows(table, doomed, select, params)
+            return self._respond(request, rendered, single, prefer)
+
+        raise FakeError(405, "PGRST000", f"Unsupported method {request.method}")
+
+    def _respond(self, request: httpx.Request, rows: List[Dict[str, Any]], single: bool,
+                 prefer: Dict[str, str], status: int = 200, total: Optional[int] = None,
+                 offset: int = 0) -> httpx.Response:
+        headers = {"content-type": "application/json; charset=utf-8"}
+        count = total if prefer.get("count") == "exact" and total is not None else "*"
+        headers["content-range"] = f"{offset}-{offset + len(rows) - 1}/{count}" if rows else f"*/{count}"
+
+        if request.method in ("POST", "PATCH", "DELETE") and prefer.get("return") != "representation":
+            return httpx.Response(204 if status == 200 else status, headers=headers)
+        if request.method == "HEAD":
+            return httpx.Response(status, headers=headers)
+        if single:
+            if len(rows) != 1:
+                raise FakeError(406, "PGRST116", "JSON object requested, multiple (or no) rows returned",
+                                f"The result contains {len(rows)} rows")
+            return httpx.Response(status, headers=headers, content=_dumps(rows[0]))
+        return httpx.Response(status, headers=headers, content=_dumps(rows))
+
+    def _handle_rpc(self, name: str, request: httpx.Request) -> httpx.Response:
+        function = self.functions.get(name)
+        if function is None:
+            raise FakeError(404, "PGRST202", f"Could not find the function public.{name}")
+        args = json.loads(request.content or b"{}") if request.method == "POST" else dict(request.url.params)
+        return httpx.Response(200, headers={"content-type": "application/json"}, content=_dumps(function(self, args)))
+
+    def _select(self, table: str, params: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        filters = [(key, value) for key, value in params if key not in RESERVED_PARAMS and "." not in key]
+        rows = [row for row in self.table(table) if all(_matches(row, key, value) for key, value in filters)]
+        order = _param(params, "order")
+        if order:
+            rows = _sort(rows, order)
+        return rows
+
+    def _render_rows(self, table: str, rows: List[Dict[str, Any]], select: str,
+                     params: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        nodes = _parse_select(select)
+        embed_filters: Dict[str, List[Tuple[str, str]]] = {}
+        for key, value in params:
+            if "." in key and key not in RESERVED_PARAMS:
+                path, column = key.rsplit(".", 1)
+                if column in ("order", "limit", "offset"):
+                    continue
+                embed_filters.setdefault(path, []).append((column, value))
+        rendered = []
+        for row in rows:
+            out = self._render(table, row, nodes, embed_filters, "")
+            if out is not None:
+                rendered.append(out)
+        return rendered
+
+    def _render(self, table: str, row: Dict[str, Any], nodes: List[dict],
+                embed_filters: Dict[str, List[Tuple[str, str]]], prefix: str) -> Optional[Dict[str, Any]]:
+        out: Dict[str, Any] = {}
+        for node in nodes:
+            if node["kind"] == "column":
+                if node["name"] == "*":
+                    out.update(row)
+                else:
+                    out[node["alias"] or node["name"]] = row.get(node["name"])
+                continue
+
+            alias = node["alias"] or node["table"]
+            path = f"{prefix}{alias}"
+            many, related = self._related(table, row, node["table"])
+            filters = embed_filters.get(path, [])
+            related = [r for r in related if all(_matches(r, key, value) for key, value in filters)]
+            children = []
+            for related_row in related:
+                child = self._render(node["table"], related_row, node["children"], embed_filters, f"{path}.")
+                if child is not None:
+                    children.append(child)
+            if node["inner"] and not children:
+                return None
+            out[alias] = children if many else (children[0] if children else None)
+        return out
+
+    def _related(self, table: str, row: Dict[str, Any], target: str) -> Tuple[bool, List[Dict[str, Any]]]:
+        # many-to-one: this row holds the foreign key
+        for (source, column), (referenced, key) in FOREIGN_KEYS.items():
+            if source == table and referenced == target:
+                value = row.get(column)
+                return False, [r for r in self.table(target) if value is not None and r.get(key) == value]
+        # one-to-many: the target rows point at this row
+        for (source, column), (referenced, key) in FOREIGN_KEYS.items():
+            if source == target and referenced == table:
+                value = row.get(key)
+                return True, [r for r in self.table(target) if r.get(column) == value]
+        raise FakeError(400, "PGRST200", f"Could not find a relationship between '{table}' and '{target}'")
+
+    def _insert_rows(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        prepared = [self._with_defaults(table, row) for row in rows]
+        existing = self.table(table)
+        for index, row in enumerate(prepared):
+            for columns in UNIQUE_CONSTRAINTS.get(table, []):
+                key = tuple(row.get(column) for column in columns)
+                if None in key:
+                    continue
+                others = existing + prepared[:index]
+                if any(tuple(other.get(column) for column in columns) == key for other in others):
+                    raise FakeError(409, "23505", f'duplicate key value violates unique constraint "{table}_{"_".join(columns)}_key"')
+        existing.extend(prepared)
+        return prepared
+
+    def _upsert_rows(self, table: str, rows: List[Dict[str, Any]], on_conflict: Optional[str],
+                     resolution: str) -> List[Dict[str, Any]]:
+        columns = tuple(on_conflict.split(",")) if on_conflict else ("id",)
+        written = []
+        for row in rows:
+            key = tuple(row.get(column) for column in columns)
+            match = next((r for r in self.table(table) if tuple(r.get(column) for column in columns) == key), None)
+            if match is None:
+                written.extend(self._insert_rows(table, [row]))
+            elif resolution == "merge-duplicates":
+                match.update(self._resolve_values(row))
+                written.append(match)
+        return written
+
+    def _with_defaults(self, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        prepared = dict(COLUMN_DEFAULTS.get(table, {}))
+        if table not in LINK_TABLES and "id" not in row:
+            if table in UUID_TABLES:
+                prepared["id"] = str(uuid.uuid4())
+            else:
+                self._serials[table] += 1
+                prepared["id"] = self._serials[table]
+        elif "id" in row and isinstance(row["id"], int):
+            self._serials[table] = max(self._serials[table], row["id"])
+        prepared["created_at"] = self.now()
+        prepared.update(self._resolve_values(row))
+        return prepared
+
+    def _resolve_values(self, values: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: self.now() if value == "now()" else value for key, value in values.items()}
+
+    # GoTrue
+
+    def _handle_auth(self, request: httpx.Request) -> httpx.Response:
+        parts = request.url.path.strip("/").split("/")[2:]
+        endpoint = parts[0] if parts else ""
+        body = json.loads(request.content or b"{}") if request.content else {}
+
+        if endpoint == "health":
+            return _json(200, {"version": "fake", "name": "GoTrue"})
+
+        if endpoint == "token":
+            grant_type = request.url.params.get("grant_type")
+            if grant_type == "password":
+                user = self._user_by_email(body.get("email"))
+                if user is None or self.passwords.get(user["email"]) != body.get("password"):
+                    return _auth_error(400, "invalid_credentials", "Invalid login credentials")
+                return _json(200, self._session(user))
+            if grant_type == "refresh_token":
+                user_id = self.refresh_tokens.pop(body.get("refresh_token"), None)
+                if user_id is None:
+                    return _auth_error(400, "refresh_token_not_found", "Invalid Refresh Token")
+                return _json(200, self._session(self.users[user_id]))
+            return _auth_error(400, "unsupported_grant_type", f"Unsupported grant type {grant_type}")
+
+        if endpoint == "signup":
+            if self._user_by_email(body.get("email")):
+                return _auth_error(422, "user_already_exists", "User already registered")
+            data = (body.get("data") or {})
+            user = self.add_user(body["email"], body.get("password", ""), display_name=data.get("display_name"))
+            return _json(200, self._session(user))
+
+        if endpoint == "user":
+            user = self._user_from_header(request)
+            if user is None:
+                return _auth_error(401, "bad_jwt", "invalid JWT")
+            if request.method == "PUT":
+                user["user_metadata"].update(body.get("data") or {})
+                user["updated_at"] = self.now()
+            return _json(200, user)
+
+        if endpoint == "logout":
+            return httpx.Response(204)
+
+        if endpoint == "invite":
+            user = self._user_by_email(body.get("email")) or self.add_user(body["email"], "")
+            user["user_metadata"].update(body.get("data") or {})
+            return _json(200, user)
+
+        if endpoint == "admin" and parts[1:] == ["users"] and request.method == "GET":
+            page = int(request.url.params.get("page") or 1)
+            per_page = int(request.url.params.get("per_page") or 50)
+            users = list(self.users.values())[(page - 1) * per_page:page * per_page]
+            return _json(200, {"users": users, "aud": "authenticated"})
+
+        if endpoint == "admin" and parts[1:2] == ["users"] and len(parts) > 2:
+            user = self.users.get(parts[2])
+            if user is None:
+                return _auth_error(404, "user_not_found", "User not found")
+            if request.method == "PUT":
+                if "password" in body:
+                    self.passwords[user["email"]] = body["password"]
+                for key in ("user_metadata", "app_metadata"):
+                    if key in body:
+                        user[key].update(body[key])
+                if "ban_duration" in body:
+                    user["banned_until"] = None if body["ban_duration"] == "none" else "2999-01-01T00:00:00Z"
+            return _json(200, user)
+
+        return _auth_error(404, "not_found", f"No fake for auth endpoint {endpoint}")
+
+    def _user_by_email(self, email: Optional[str]) -> Optional[Dict[str, Any]]:
+        return next((user for user in self.users.values() if user["email"] == email), None)
+
+    def _user_from_header(self, request: httpx.Request) -> Optional[Dict[str, Any]]:
+        token = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+        try:
+            payload = json.loads(_b64decode(token.split(".")[1]))
+        except Exception:
+            return None
+        if payload.get("exp", 0) < time.time():
+            return None
+        return self.users.get(payload.get("sub"))
+
+    def _session(self, user: Dict[str, Any]) -> Dict[str, Any]:
+        expires_in = 3600
+        expires_at = int(time.time()) + expires_in
+        refresh_token = uuid.uuid4().hex
+        self.refresh_tokens[refresh_token] = user["id"]
+        return {
+            "access_token": _jwt({
+                "sub": user["id"], "email": user["email"], "aud": "authenticated",
+                "role": "authenticated", "exp": expires_at, "session_id": uuid.uuid4().hex,
+            }),
+            "token_type": "bearer",
+            "expires_in": expires_in,
+            "expires_at": expires_at,
+            "refresh_token": refresh_token,
+            "user": user,
+        }
+
+    # Storage
+
+    def _handle_storage(self, request: httpx.Request) -> httpx.Response:
+        parts = request.url.path.strip("/").split("/")[2:]
+        if parts[:1] == ["object"] and request.method in ("POST", "PUT"):
+            key = "/".join(parts[1:])
+            self.objects[key] = request.content
+            return _json(200, {"Key": key, "Id": str(uuid.uuid4())})
+        if parts[:2] == ["object", "public"] and request.method == "GET":
+            key = "/".join(parts[2:])
+            if key not in self.objects:
+                return _json(404, {"statusCode": "404", "error": "not_found", "message": "Object not found"})
+            return httpx.Response(200, content=self.objects[key])
+        return _json(404, {"statusCode": "404", "error": "not_found", "message": "No fake for storage endpoint"})
+
+class FakeError(Exception):
+    def __init__(self, status: int, code: str, message: str, details: Optional[str] = None):
+        super().__init__(message)
+        self.status = status
+        self.code = code
+        self.message = message
+        self.details = details
+
+def pending_authors_rpc(fake: FakeSupabase, args: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Authors, and users with articles waiting for review"""
+    roles = {role["id"]: role for role in fake.table("roles")}
+    pending_by_user: Dict[str, List[Dict[str, Any]]] = {}
+    for article in fake.table("articles"):
+        if article.get("status") == "pending_review":
+            pending_by_user.setdefault(article.get("user_id"), []).append(
+                {key: article.get(key) for key in ("id", "title", "status", "created_at")}
+            )
+    result = []
+    for profile in fake.table("profiles"):
+        role = roles.get(profile.get("role_id"), {})
+        pending = pending_by_user.get(profile["user_id"], [])
+        if pending or role.get("name") == "author":
+            user = fake.users.get(profile["user_id"], {})
+            result.append({
+                "user_id": profile["user_id"],
+                "display_name": profile.get("display_name"),
+                "avatar_url": profile.get("avatar_url"),
+                "email": user.get("email"),
+                "created_at": user.get("created_at"),
+                "roles": {"name": role.get("name"), "description": role.get("description")},
+                "pending_articles": pending,
+                "pending_reason": "Has pending articles" if pending else "Author role approval needed",
+            })
+    return result
+
+def auth_users_rpc(fake: FakeSupabase, args: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """migrations/add_get_auth_users.sql: auth fields for the given ids"""
+    return [
+        {
+            "id": user_id,
+            "email": user.get("email"),
+            "created_at": user.get("created_at"),
+            "banned_until": user.get("banned_until"),
+            "is_super_admin": bool(user.get("is_super_admin")),
+        }
+        for user_id, user in fake.users.items() if user_id in set(args["user_ids"])
+    ]
+
+def counter_deltas_rpc(fake: FakeSupabase, args: Dict[str, Any]) -> None:
+    """migrations/add_denormalized_counters.sql: add each delta to its counter, never below zero, once per flush_id"""
+    flushes = fake.table("counter_flushes")
+    if any(row["flush_id"] == args["flush_id"] for row in flushes):
+        return None
+    flushes.append({"flush_id": args["flush_id"]})
+    allowed = {"articles": {"comment_count", "bookmark_count", "view_count"}, "channels": {"follower_count", "subscriber_count"}}
+    for delta in args["deltas"]:
+        if delta["column"] not in allowed.get(delta["table"], ()):
+            continue
+        for row in fake.table(delta["table"]):
+            if str(row["id"]) == str(delta["id"]):
+                row[delta["column"]] = max((row.get(delta["column"]) or 0) + delta["delta"], 0)
+    return None
+
+# PostgREST syntax
+
+def _param(params: List[Tuple[str, str]], name: str) -> Optional[str]:
+    return next((value for key, value in params if key == name), None)
+
+def _parse_prefer(header: str) -> Dict[str, str]:
+    prefer = {}
+    for part in header.split(","):
+        key, _, value = part.strip().partition("=")
+        if key:
+            prefer[key] = value
+    return prefer
+
+def _split_top_level(text: str) -> List[str]:
+    parts, depth, quoted, current = [], 0, False, []
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and char == "," and depth == 0:
+            parts.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    if current:
+        parts.append("".join(current))
+    return [part.strip() for part in parts if part.strip()]
+
+def _parse_select(select: str) -> List[dict]:
+    nodes = []
+    for item in _split_top_level(re.sub(r"\s+", "", select)):
+        alias = None
+        if ":" in item.split("(")[0]:
+            alias, item = item.split(":", 1)
+        if "(" in item:
+            head, inner = item.split("(", 1)
+            table, _, hint = head.partition("!")
+            nodes.append({
+                "kind": "embed",
+                "alias": alias,
+                "table": table,
+                "inner": hint == "inner",
+                "children": _parse_select(inner[:-1]),
+            })
+        else:
+            nodes.append({"kind": "column", "name": item.split("::")[0], "alias": alias})
+    return nodes
+
+def _coerce(value: str, sample: Any) -> Any:
+    if isinstance(sample, bool):
+        return value.lower() == "true"
+    if isinstance(sample, int):
+        try:
+            return int(value)
+        except ValueError:
+            return value
+    if isinstance(sample, float):
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return value
+
+def _parse_list(value: str) -> List[str]:
+    items = _split_top_level(value.strip()[1:-1])
+    return [item[1:-1] if item.startswith('"') and item.endswith('"') else item for item in items]
+
+def _like(pattern: str, value: Any, flags: int = 0) -> bool:
+    if value is None:
+        return False
+    regex = "".join(
+        ".*" if char in "%*" else "." if char == "_" else re.escape(char)
+        for char in pattern
+    )
+    return re.fullmatch(regex, str(value), flags | re.DOTALL) is not None
+
+def _apply_operator(row_value: Any, operator: str, argument: str) -> bool:
+    if operator == "is":
+        expected = {"null": None, "true": True, "false": False}.get(argument.lower(), argument)
+        return row_value is expected if expected is None or isinstance(expected, bool) else row_value == expected
+    if operator == "in":
+        return row_value in [_coerce(item, row_value) for item in _parse_list(argument)]
+    if operator == "like":
+        return _like(argument, row_value)
+    if operator == "ilike":
+        return _like(argument, row_value, re.IGNORECASE)
+    if row_value is None:
+        return False
+    target = _coerce(argument, row_value)
+    if operator == "eq":
+        return row_value == target
+    if operator == "neq":
+        return row_value != target
+    try:
+        if operator == "gt":
+            return row_value > target
+        if operator == "gte":
+            return row_value >= target
+        if operator == "lt":
+            return row_value < target
+        if operator == "lte":
+            return row_value <= target
+    except TypeError:
+        return False
+    if operator == "cs":
+        return set(_parse_list(argument.replace("{", "(").replace("}", ")"))) <= set(map(str, row_value))
+    raise FakeError(400, "PGRST100", f"Unsupported operator {operator}")
+
+def _matches(row: Dict[str, Any], key: str, value: str) -> bool:
+    if key in ("or", "and"):
+        conditions = []
+        for condition in _split_top_level(value.strip()[1:-1]):
+            if condition.startswith(("or(", "and(")):
+                nested_key, nested = condition.split("(", 1)
+                conditions.append(_matches(row, nested_key, "(" + nested))
+            else:
+                column, expression = condition.split(".", 1)
+                conditions.append(_matches(row, column, expression))
+        return any(conditions) if key == "or" else all(conditions)
+
+    negate = value.startswith("not.")
+    if negate:
+        value = value[4:]
+    operator, _, argument = value.partition(".")
+    result = _apply_operator(row.get(key), operator, argument)
+    return not result if negate else result
+
+def _sort(rows: List[Dict[str, Any]], order: str) -> List[Dict[str, Any]]:
+    rows = list(rows)
+    for term in reversed(order.split(",")):
+        column, *modifiers = term.split(".")
+        descending = "desc" in modifiers
+        nulls_first = "nullsfirst" in modifiers or (descending and "nullslast" not in modifiers)
+        present = [row for row in rows if row.get(column) is not None]
+        missing = [row for row in rows if row.get(column) is None]
+        present.sort(key=lambda row: row[column], reverse=descending)
+        rows = missing + present if nulls_first else present + missing
+    return rows
+
+# Encoding
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, default=str).encode()
+
+def _json(status: int, value: Any) -> httpx.Response:
+    return httpx.Response(status, headers={"content-type": "application/json"}, content=_dumps(value))
+
+def _error(status: int, code: str, message: str, details: Optional[str] = None) -> httpx.Response:
+    return _json(status, {"code": code, "details": details, "hint": None, "message": message})
+
+def _auth_error(status: int, code: str, message: str) -> httpx.Response:
+    return _json(status, {"code": status, "error_code": code, "msg": message})
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+def _jwt(payload: Dict[str, Any]) -> str:
+    header = _b64encode(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+    body = _b64encode(json.dumps(payload).encode())
+    return f"{header}.{body}.{_b64encode(b'fake-signature')}"
+
+# Seed data
+
+PARAGRAPH = (
+    "<p>Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua. Ut enim ad minim veniam.</p>"
+)
+
+def seed(fake: FakeSupabase, articles: int = 200, comments_per_article: int = 5,
+         readers: int = 20, content_paragraphs: int = 40) -> Dict[str, Any]:
+    """Populate a realistic dataset; returns ids and credentials for the scenarios.
+
+    Accounts: admin@example.com, author@example.com, reader@example.com
+    (password "password123") plus `readers` more readers.
+    """
+    for role_id, name in ((1, "admin"), (2, "author"), (3, "reader")):
+        fake.insert("roles", {"id": role_id, "name": name, "description": f"{name.title()} role"})
+
+    channels = [
+        fake.insert("channels", {"name": name, "slug": name.lower(), "url": f"https://{name.lower()}.example.com",
+                                 "logo_url": None, "rss_url": None, "is_active": True})
+        for name in ("VnExpress", "Tuoi Tre", "Thanh Nien", "Dan Tri", "Zing")
+    ]
+
+    categories = []
+    for name in ("News", "Business", "Sports", "Technology", "Entertainment"):
+        parent = fake.insert("categories", {"name": name, "slug": name.lower(), "description": None, "parent_id": None})
+        categories.append(parent)
+        for sub in ("Local", "World"):
+            categories.append(fake.insert("categories", {
+                "name": f"{name} {sub}", "slug": f"{name.lower()}-{sub.lower()}",
+                "description": None, "parent_id": parent["id"],
+            }))
+
+    password = "password123"
+    admin = fake.add_user("admin@example.com", password, role="admin", display_name="Admin")
+    author = fake.add_user("author@example.com", password, role="author", display_name="Author",
+                           channel_id=channels[0]["id"])
+    reader = fake.add_user("reader@example.com", password, role="reader", display_name="Reader")
+    others = [
+        fake.add_user(f"reader{i}@example.com", password, role="reader", display_name=f"Reader {i}")
+        for i in range(readers)
+    ]
+    commenters = [reader] + others
+
+    content = PARAGRAPH * content_paragraphs
+    article_ids = []
+    for i in range(articles):
+        article = fake.insert("articles", {
+            "title": f"Article {i}",
+            "slug": f"article-{i}",
+            "summary": PARAGRAPH,
+            "content": content,
+            "channel_id": channels[i % len(channels)]["id"],
+            "user_id": author["id"],
+            "status": "published" if i % 10 else "pending_review",
+            "view_count": i,
+            "hero_image_url": f"https://cdn.example.com/{i}.jpg",
+            "source_url": None,
+            "language": "vi",
+        })
+        article_ids.append(article["id"])
+        fake.insert("article_categories", {"article_id": article["id"], "category_id": categories[i % len(categories)]["id"]})
+        for j in range(comments_per_article):
+            fake.insert("comments", {
+                "article_id": article["id"],
+                "user_id": commenters[(i + j) % len(commenters)]["id"],
+                "body": f"Comment {j} on article {i}",
+            })
+
+    for index, article_id in enumerate(article_ids[:20]):
+        fake.insert("bookmarks", {"user_id": reader["id"], "article_id": article_id})
+    fake.insert("channel_subscriptions", {"user_id": reader["id"], "channel_id": channels[0]["id"]})
+    fake.insert("channel_followers", {"user_id": reader["id"], "channel_id": channels[1]["id"]})
+
+    published = [a["id"] for a in fake.table("articles") if a["status"] == "published"]
+    return {
+        "password": password,
+        "admin": admin,
+        "author": author,
+        "reader": reader,
+        "channels": channels,
+        "categories": categories,
+        "article_ids": article_ids,
+        "published_article_ids": published,
+    }
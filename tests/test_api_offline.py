@@ -0,0 +1,782 @@
+"""
+API tests that run the real app against the in-process Supabase fake.
+
+No server, network or Supabase project needed:
+    python -m pytest tests/test_api_offline.py
+"""
+
+import os
+
+os.environ.setdefault("SUPABASE_URL", "https://fake.supabase.co")
+os.environ.setdefault("SUPABASE_KEY", "fake-anon-key")
+os.environ.setdefault("WARMUP_ON_STARTUP", "false")
+# Any route exceeding its upstream call budget responds 500 and fails its test
+os.environ.setdefault("UPSTREAM_CALL_BUDGET_MODE", "raise")
+os.environ.setdefault("UPSTREAM_CALLS_HEADER_ENABLED", "true")
+# Every test signs in from the same client address
+os.environ.setdefault("RATE_LIMITS", '{"POST /api/v1/auth/login": null}')
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from fake_supabase import FakeError, FakeSupabase, seed
+
+@pytest.fixture(scope="module")
+def fake():
+    fake = FakeSupabase()
+    fake.install()
+    fake.data = seed(fake, articles=30, readers=3)
+    yield fake
+    fake.uninstall()
+
+@pytest.fixture(scope="module")
+def client(fake):
+    from app.main import app
+    with TestClient(app) as client:
+        yield client
+
+def login(client, role):
+    response = client.post("/api/v1/auth/login", json={"email": f"{role}@example.com", "password": "password123"})
+    assert response.status_code == 200
+    assert response.json()["data"]["user"]["role"] == role
+    return {"Authorization": f"Bearer {response.json()['data']['access_token']}"}
+
+def test_login_rejects_bad_password(client, fake):
+    response = client.post("/api/v1/auth/login", json={"email": "reader@example.com", "password": "wrong"})
+    assert response.status_code == 401
+
+def test_login_signs_in_off_the_event_loop(client, fake, monkeypatch):
+    import asyncio
+    from app.services.auth_service import AuthService
+    sign_in = AuthService.login
+    on_loop = []
+
+    def recording(user_data):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return sign_in(user_data)
+
+    monkeypatch.setattr(AuthService, "login", staticmethod(recording))
+    login(client, "reader")
+    assert on_loop == [False]
+
+def test_me_returns_profile_role(client, fake):
+    response = client.get("/api/v1/auth/me", headers=login(client, "author"))
+    assert response.status_code == 200
+    assert response.json()["data"]["user"]["role"] == "author"
+
+def test_articles_list_only_published_newest_first(client, fake):
+    response = client.get("/api/v1/articles/?limit=5")
+    articles = response.json()["data"]["articles"]
+    assert response.status_code == 200
+    assert len(articles) == 5
+    assert all(article["status"] == "published" for article in articles)
+    assert [a["created_at"] for a in articles] == sorted((a["created_at"] for a in articles), reverse=True)
+    assert articles[0]["channels"]["name"]
+
+def test_category_filter_includes_descendants(client, fake):
+    parent = fake.data["categories"][0]
+    family = {c["id"] for c in fake.data["categories"] if c["id"] == parent["id"] or c["parent_id"] == parent["id"]}
+    articles = client.get(f"/api/v1/articles/?limit=50&category={parent['id']}").json()["data"]["articles"]
+    assert articles
+    assert all(article["article_categories"][0]["category_id"] in family for article in articles)
+    assert {article["article_categories"][0]["category_id"] for article in articles} != {parent["id"]}
+
+def test_get_article_and_missing_article(client, fake):
+    article_id = fake.data["published_article_ids"][0]
+    response = client.get(f"/api/v1/articles/{article_id}")
+    assert response.status_code == 200
+    assert response.json()["data"]["article"]["id"] == article_id
+    assert client.get("/api/v1/articles/does-not-exist").status_code == 404
+
+def test_comments_round_trip(client, fake):
+    article_id = fake.data["published_article_ids"][1]
+    headers = login(client, "reader")
+    response = client.post(f"/api/v1/articles/{article_id}/comments", json={"content": "Nice"}, headers=headers)
+    assert response.status_code == 200
+    comments = client.get(f"/api/v1/articles/{article_id}/comments").json()["data"]["comments"]
+    assert comments[0]["body"] == "Nice"
+    assert comments[0]["profile"]["display_name"] == "Reader"
+
+def test_status_transition_requires_admin(client, fake):
+    pending_id = fake.data["article_ids"][0]
+    assert client.put(f"/api/v1/articles/{pending_id}/status?status=published", headers=login(client, "reader")).status_code == 403
+    response = client.put(f"/api/v1/articles/{pending_id}/status?status=published", headers=login(client, "admin"))
+    assert response.status_code == 200
+    assert response.json()["data"]["article"]["status"] == "published"
+
+def test_status_transitions_follow_the_table(client, fake, monkeypatch):
+    headers = login(client, "admin")
+    article = next(a for a in fake.table("articles") if a["status"] == "pending_review" and a["id"] != fake.data["article_ids"][0])
+    published = next(a for a in fake.table("articles") if a["status"] == "published")
+    for row in (article, published):
+        for column in ("status", "updated_at", "published_at"):
+            monkeypatch.setitem(row, column, row.get(column))
+
+    # Allowed: one conditional update, no follow-up read
+    fake.reset_calls()
+    response = client.put(f"/api/v1/articles/{article['id']}/status?status=approved", headers=headers)
+    assert response.status_code == 200 and response.json()["message"] == "Article status updated to approved"
+    assert article["status"] == "approved"
+    assert fake.calls["PATCH articles"] == 1 and fake.calls["GET articles"] == 0
+
+    # Same status: a no-op, reported as such
+    response = client.put(f"/api/v1/articles/{article['id']}/status?status=approved", headers=headers)
+    assert response.status_code == 200 and response.json()["message"] == "Article status already approved"
+
+    # Not in the table: published articles go back to draft or are rejected, never approved
+    response = client.put(f"/api/v1/articles/{published['id']}/status?status=approved", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Cannot change article status from 'published' to 'approved'"
+    assert published["status"] == "published"
+
+    unknown = client.put("/api/v1/articles/00000000-0000-0000-0000-000000000000/status?status=draft", headers=headers)
+    assert unknown.status_code == 404
+    invalid = client.put(f"/api/v1/articles/{article['id']}/status?status=archived", headers=headers)
+    assert invalid.status_code == 400 and article["status"] == "approved"
+
+def test_taxonomy_endpoints(client, fake, monkeypatch):
+    tree = client.get("/api/v1/categories/tree").json()["data"]["categories"]
+    assert len(tree) == 5
+    assert all(len(node["children"]) == 2 for node in tree)
+    response = client.get("/api/v1/channels/public/list")
+    channels = response.json()["data"]["channels"]
+    assert len(channels) == len(fake.data["channels"])
+
+    # The ETag follows the content, not a per-process reload counter
+    from app.services.taxonomy_service import taxonomy_service
+    etag = response.headers["etag"]
+    taxonomy_service.refresh()
+    assert client.get("/api/v1/channels/public/list", headers={"If-None-Match": etag}).status_code == 304
+    channel = fake.data["channels"][0]
+    monkeypatch.setitem(channel, "name", channel["name"] + " renamed")
+    taxonomy_service.refresh()
+    changed = client.get("/api/v1/channels/public/list", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["etag"] != etag
+    taxonomy_service.invalidate()
+
+def test_compression_negotiates_encoding_and_passes_through(client, fake):
+    import asyncio, brotli, gzip
+    from starlette.responses import Response
+    from app.middleware.compression import CompressionMiddleware
+    precompressed = gzip.compress(b"y" * 500)
+    responses = {
+        "/below": Response(b"x" * 99, media_type="application/json"),
+        "/at": Response(b"x" * 100, media_type="application/json"),
+        "/image": Response(b"x" * 500, media_type="image/png"),
+        "/encoded": Response(precompressed, media_type="application/json", headers={"Content-Encoding": "gzip"}),
+    }
+
+    async def inner(scope, receive, send):
+        await responses[scope["path"]](scope, receive, send)
+
+    middleware = CompressionMiddleware(inner, minimum_size=100, content_types=["application/json"])
+
+    def call(path, accept="br, gzip", method="GET"):
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": b"", "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "method": method, "path": path, "headers": [(b"accept-encoding", accept.encode())]}
+        asyncio.run(middleware(scope, receive, send))
+        headers = [(name.decode(), value.decode()) for name, value in messages[0]["headers"]]
+        return dict(headers), [name for name, _ in headers], b"".join(m.get("body", b"") for m in messages[1:])
+
+    headers, names, body = call("/below")
+    assert "content-encoding" not in headers and body == b"x" * 99
+    assert headers["vary"] == "Accept-Encoding" and headers["content-length"] == "99"
+    assert names.count("content-length") == 1
+
+    headers, names, body = call("/at")
+    assert headers["content-encoding"] == "br" and brotli.decompress(body) == b"x" * 100
+    assert headers["content-length"] == str(len(body)) and names.count("content-length") == 1
+    assert headers["vary"] == "Accept-Encoding"
+
+    headers, _, body = call("/at", accept="br;q=0, gzip")
+    assert headers["content-encoding"] == "gzip" and gzip.decompress(body) == b"x" * 100
+    headers, _, body = call("/at", accept="br;q=0")
+    assert "content-encoding" not in headers and body == b"x" * 100
+
+    headers, _, body = call("/image")
+    assert "content-encoding" not in headers and body == b"x" * 500
+    headers, names, body = call("/encoded")
+    assert names.count("content-encoding") == 1 and headers["content-encoding"] == "gzip" and body == precompressed
+    headers, _, _ = call("/at", method="HEAD")
+    assert "content-encoding" not in headers
+
+    # Taxonomy bodies are compressed once per snapshot and sent as is
+    from app.services.taxonomy_service import taxonomy_service
+    with client.stream("GET", "/api/v1/categories/tree", headers={"Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["vary"] == "Accept-Encoding"
+    assert raw == taxonomy_service.snapshot().compressed_bodies[("category_tree", "gzip")]
+
+def test_readiness_reports_failed_checks_and_caches_results(client, fake, monkeypatch):
+    from app.services.health_service import health_service
+    monkeypatch.setattr(health_service, "_checks", {})
+    monkeypatch.setattr(health_service, "_max_age", 60)
+    runs = {"database": 0, "push": 0}
+    failing = set()
+
+    def check(name):
+        def run():
+            runs[name] += 1
+            if name in failing:
+                raise RuntimeError(f"{name} is down")
+            return {"detail": name}
+        return run
+
+    health_service.register("database", check("database"))
+    health_service.register("push", check("push"), critical=False)
+    assert client.get("/health/live").json()["status"] == "healthy" and runs == {"database": 0, "push": 0}
+
+    response = client.get("/health/ready")
+    assert response.status_code == 200 and response.json()["status"] == "ok"
+    # Probes within the interval reuse the cached results
+    failing.add("database")
+    assert client.get("/health/ready").json()["status"] == "ok"
+    assert runs == {"database": 1, "push": 1}
+
+    monkeypatch.setattr(health_service, "_max_age", 0)
+    response = client.get("/health/ready")
+    assert response.status_code == 503 and response.json()["status"] == "unavailable"
+    database = response.json()["checks"]["database"]
+    assert (database["status"], database["critical"], database["error"]) == ("fail", True, "database is down")
+
+    failing.clear()
+    failing.add("push")
+    response = client.get("/health/ready")
+    assert response.status_code == 200 and response.json()["status"] == "degraded"
+    assert response.json()["checks"]["push"]["status"] == "fail"
+    assert response.json()["checks"]["database"]["status"] == "ok"
+
+def test_admin_channel_list(client, fake):
+    response = client.get("/api/v1/channels/admin/list", headers=login(client, "admin"))
+    assert response.status_code == 200
+    assert len(response.json()["data"]["channels"]) == len(fake.data["channels"])
+
+def test_upstream_calls_header(client, fake):
+    response = client.get("/api/v1/articles/?limit=5")
+    assert response.headers["x-upstream-calls"] == "total=1, postgrest=1"
+
+def test_metrics_exposition_and_timing_headers(client, fake, monkeypatch):
+    import re
+    from app.config.settings import settings
+    from app.services.metrics_service import request_duration
+    from app.services.query_budget import budget_exceeded
+    monkeypatch.setattr(settings, "SERVER_TIMING_ENABLED", True)
+    served = request_duration.count("GET", "/api/v1/articles/", "200")
+
+    response = client.get("/api/v1/articles/?limit=5")
+    assert re.fullmatch(r"postgrest;dur=\d+\.\d, total;dur=\d+\.\d", response.headers["server-timing"])
+    assert response.headers["x-upstream-calls"] == "total=1, postgrest=1"
+    assert request_duration.count("GET", "/api/v1/articles/", "200") == served + 1
+
+    route = "/api/v1/articles/{article_id}"
+    overruns = budget_exceeded.value("GET", route)
+    monkeypatch.setattr(settings, "UPSTREAM_CALL_BUDGETS", {f"GET {route}": 0})
+    assert client.get(f"/api/v1/articles/{fake.data['published_article_ids'][0]}").status_code == 500
+    assert budget_exceeded.value("GET", route) == overruns + 1
+
+    exposition = client.get("/metrics")
+    assert exposition.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = exposition.text
+    assert "# TYPE http_request_duration_seconds histogram" in text
+    assert 'http_request_duration_seconds_bucket{method="GET",route="/api/v1/articles/",status="200",le="+Inf"}' in text
+    assert f'upstream_call_budget_exceeded_total{{method="GET",route="{route}"}} {overruns + 1}' in text
+    sample = re.compile(r'[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_][a-zA-Z0-9_]*="([^"\\]|\\.)*",?)*\})? [-+0-9.eE]+(Inf|NaN)?')
+    for line in text.splitlines():
+        assert line.startswith(("# HELP ", "# TYPE ")) or sample.fullmatch(line), line
+
+def test_all_profiles_reads_only_the_listed_auth_users(client, fake):
+    fake.reset_calls()
+    response = client.get("/api/v1/users/admin/all-profiles", headers=login(client, "admin"))
+    assert response.status_code == 200
+    profiles = response.json()["data"]["profiles"]
+    assert all(profile["email"] for profile in profiles)
+    assert fake.calls["POST rpc/get_auth_users"] == 1
+    assert fake.calls["GET auth/admin/users"] == 0
+
+def test_budget_overrun_fails_the_request(client, fake, monkeypatch):
+    from app.config.settings import settings
+    monkeypatch.setattr(settings, "UPSTREAM_CALL_BUDGETS", {"GET /api/v1/articles/{article_id}": 0})
+    response = client.get(f"/api/v1/articles/{fake.data['published_article_ids'][0]}")
+    assert response.status_code == 500
+    assert "budget 0" in response.json()["detail"]
+
+def test_feed_pages_through_followed_and_subscribed_channels(client, fake):
+    headers = login(client, "reader")
+    followed = {fake.data["channels"][0]["id"], fake.data["channels"][1]["id"]}
+    expected = [
+        article["id"] for article in sorted(fake.table("articles"), key=lambda a: a["created_at"], reverse=True)
+        if article["status"] == "published" and article["channel_id"] in followed
+    ]
+
+    seen, cursor = [], None
+    while True:
+        response = client.get("/api/v1/feed/", params={"limit": 4, **({"cursor": cursor} if cursor else {})}, headers=headers)
+        assert response.status_code == 200
+        seen += [article["id"] for article in response.json()["data"]["articles"]]
+        cursor = response.json()["data"]["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == expected
+
+    assert client.get("/api/v1/feed/", params={"cursor": "bogus"}, headers=headers).status_code == 400
+
+def test_feed_reflects_new_follow(client, fake):
+    headers = login(client, "reader")
+    channel_id = fake.data["channels"][2]["id"]
+    before = client.get("/api/v1/feed/?limit=50", headers=headers).json()["data"]["articles"]
+    assert all(article["channel_id"] != channel_id for article in before)
+
+    assert client.post(f"/api/v1/channels/{channel_id}/follow", headers=headers).status_code == 200
+    after = client.get("/api/v1/feed/?limit=50", headers=headers).json()["data"]["articles"]
+    assert any(article["channel_id"] == channel_id for article in after)
+    client.delete(f"/api/v1/channels/{channel_id}/follow", headers=headers)
+
+def test_trending_ranks_buffered_views_and_writes_view_count_behind(client, fake, monkeypatch):
+    from app.services.counter_service import counter_service
+    from app.services.ranking_service import ranking_service, RankingService
+    # A cold service answers from memory (empty) and never loads inline
+    fake.reset_calls()
+    cold = RankingService(6, 100, 10)
+    assert cold.top() == [] and not fake.calls
+    # A rebuild queued by discard() before the first load does not make it ready
+    cold.rebuild()
+    assert not cold.ready and cold.top() == []
+    # A failed first load lets the next cold request claim another
+    assert cold.request_reload() and not cold.request_reload()
+    monkeypatch.setattr(counter_service, "overlay", lambda table, rows: 1 / 0)
+    with pytest.raises(ZeroDivisionError):
+        cold.reload()
+    monkeypatch.undo()
+    assert cold.request_reload()
+    if not ranking_service.ready:
+        ranking_service.reload()
+    most_read = client.get("/api/v1/articles/trending?sort=most_read&limit=3").json()["data"]["articles"]
+    published = [a for a in fake.table("articles") if a["status"] == "published"]
+    assert [a["id"] for a in most_read] == [a["id"] for a in sorted(published, key=lambda a: a["view_count"], reverse=True)[:3]]
+
+    article = min(published, key=lambda a: a["view_count"])
+    views_before = article["view_count"]
+    for _ in range(40):
+        assert client.get(f"/api/v1/articles/{article['id']}").status_code == 200
+    assert article["view_count"] == views_before
+
+    ranking_service.flush()
+    fake.reset_calls()
+    counter_service.flush()
+    assert fake.calls["POST rpc/apply_counter_deltas"] == 1
+    assert article["view_count"] == views_before + 40
+    trending = client.get("/api/v1/articles/trending").json()["data"]["articles"]
+    assert trending[0]["id"] == article["id"]
+
+    channel = client.get(f"/api/v1/articles/trending?channel_id={article['channel_id']}").json()["data"]["articles"]
+    assert channel[0]["id"] == article["id"]
+    assert all(a["channel_id"] == article["channel_id"] for a in channel)
+    assert client.get("/api/v1/articles/trending?channel_id=1&category_id=1").status_code == 400
+
+    # Views for counters beyond COUNTER_MAX_PENDING are dropped rather than buffered without bound
+    monkeypatch.setattr(counter_service, "_max_pending", 0)
+    client.get(f"/api/v1/articles/{article['id']}")
+    ranking_service.flush()
+    counter_service.flush()
+    assert article["view_count"] == views_before + 40
+
+def test_related_block_prefers_shared_category_and_terms(client, fake):
+    from app.services.related_service import related_service
+    article_id = fake.data["published_article_ids"][3]
+    assert "related" not in client.get(f"/api/v1/articles/{article_id}").json()["data"]
+
+    related_service.rebuild()
+    data = client.get(f"/api/v1/articles/{article_id}?related=3").json()["data"]
+    article = data["article"]
+    assert 0 < len(data["related"]) <= 3
+    assert article_id not in [a["id"] for a in data["related"]]
+    category_of = {link["article_id"]: link["category_id"] for link in fake.table("article_categories")}
+    assert category_of[data["related"][0]["id"]] == article["article_categories"][0]["category_id"]
+
+def test_related_index_adds_articles_without_blocking_readers(client, fake, monkeypatch):
+    import threading
+    from app.services.related_service import related_service
+    related_service.rebuild()
+    index = related_service._index
+    article_id = fake.data["published_article_ids"][3]
+    source = next(a for a in fake.table("articles") if a["id"] == article_id)
+    category_id = next(link["category_id"] for link in fake.table("article_categories") if link["article_id"] == article_id)
+    copies = []
+    for i in range(2):
+        copy = fake.insert("articles", {
+            **{column: value for column, value in source.items() if column not in ("id", "created_at")},
+            "slug": f"{source['slug']}-copy-{i}"
+        })
+        fake.insert("article_categories", {"article_id": copy["id"], "category_id": category_id})
+        copies.append(copy["id"])
+
+    # Scoring a new article happens outside the lock readers take
+    scoring, release = threading.Event(), threading.Event()
+    scores = index._scores
+
+    def slow_scores(rows):
+        scoring.set()
+        release.wait(5)
+        return scores(rows)
+
+    monkeypatch.setattr(index, "_scores", slow_scores)
+    writer = threading.Thread(target=related_service.add_article, args=(copies[0],))
+    writer.start()
+    try:
+        assert scoring.wait(5)
+        assert copies[0] not in [a["id"] for a in related_service.related(article_id)]
+    finally:
+        release.set()
+        writer.join(5)
+    monkeypatch.undo()
+    assert copies[0] in [a["id"] for a in related_service.related(article_id)]
+    assert article_id in [a["id"] for a in related_service.related(copies[0])]
+
+    # The arrays grow by doubling, not by one row per article
+    vectors = index._vectors
+    related_service.add_article(copies[1])
+    assert index._vectors is vectors and index.vectors.shape[0] == len(index.ids)
+    assert set(copies) <= {a["id"] for a in related_service.related(article_id)}
+
+    for table, column in (("article_categories", "article_id"), ("articles", "id")):
+        fake.tables[table] = [row for row in fake.table(table) if row[column] not in copies]
+    related_service.rebuild()
+
+def test_batch_preserves_order_and_reports_missing(client, fake):
+    published = fake.data["published_article_ids"]
+    pending = next(a["id"] for a in fake.table("articles") if a["status"] != "published")
+    unknown = "00000000-0000-0000-0000-000000000000"
+    requested = [published[5], unknown, published[1], pending, "not-a-uuid", published[5]]
+    views = {a["id"]: a["view_count"] for a in fake.table("articles")}
+
+    response = client.get("/api/v1/articles/batch", params={"ids": ",".join(requested)})
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert [a["id"] for a in data["articles"]] == [published[5], published[1]]
+    assert data["missing"] == [unknown, pending, "not-a-uuid"]
+    assert {a["id"]: a["view_count"] for a in fake.table("articles")} == views
+    assert client.get("/api/v1/articles/batch", params={"ids": ",".join([unknown] * 101)}).status_code == 200
+    too_many = [f"00000000-0000-0000-0000-{i:012d}" for i in range(101)]
+    assert client.get("/api/v1/articles/batch", params={"ids": ",".join(too_many)}).status_code == 400
+
+def test_bookmarks_paginate_and_annotate(client, fake):
+    headers = login(client, "reader")
+    bookmarked = {b["article_id"] for b in fake.table("bookmarks") if b["user_id"] == fake.data["reader"]["id"]}
+
+    first = client.get("/api/v1/users/me/bookmarks?limit=15", headers=headers).json()["data"]["bookmarks"]
+    second = client.get("/api/v1/users/me/bookmarks?limit=15&page=2", headers=headers).json()["data"]["bookmarks"]
+    assert len(first) == 15 and {b["article_id"] for b in first + second} == bookmarked
+    assert "content" not in first[0]["articles"] and first[0]["articles"]["title"]
+    assert first[0]["id"] and first[0]["user_id"] == fake.data["reader"]["id"]
+
+    article_id = next(i for i in fake.data["published_article_ids"] if i not in bookmarked)
+    ids = f"{article_id},{first[0]['article_id']}"
+    check = client.get(f"/api/v1/users/me/bookmarks/check?ids={ids}", headers=headers).json()["data"]["bookmarked"]
+    assert check == {article_id: False, first[0]["article_id"]: True}
+
+    assert client.post(f"/api/v1/articles/{article_id}/bookmark", headers=headers).status_code == 200
+    fake.reset_calls()
+    detail = client.get(f"/api/v1/articles/{article_id}", headers=headers).json()["data"]["article"]
+    assert detail["is_bookmarked"] is True
+    assert fake.calls["GET bookmarks"] == 0
+    client.delete(f"/api/v1/articles/{article_id}/bookmark", headers=headers)
+
+    articles = client.get("/api/v1/articles/?limit=30", headers=headers).json()["data"]["articles"]
+    assert {a["id"] for a in articles if a["is_bookmarked"]} == bookmarked & {a["id"] for a in articles}
+    assert "is_bookmarked" not in client.get("/api/v1/articles/?limit=3").json()["data"]["articles"][0]
+
+def test_repeated_writes_are_idempotent(client, fake):
+    headers = login(client, "reader")
+    article_id = fake.data["published_article_ids"][-1]
+    channel_id = fake.data["channels"][2]["id"]
+
+    for _ in range(2):
+        assert client.post(f"/api/v1/articles/{article_id}/bookmark", headers=headers).status_code == 200
+        assert client.post(f"/api/v1/categories/channels/{channel_id}/subscribe", headers=headers).status_code == 200
+    fake.reset_calls()
+    follows = [client.post(f"/api/v1/channels/{channel_id}/follow", headers=headers) for _ in range(2)]
+    assert [r.json()["message"] for r in follows] == ["Channel followed successfully", "Already following this channel"]
+    assert fake.calls["POST channel_followers"] == 2 and fake.calls["GET channel_followers"] == 0
+
+    client.delete(f"/api/v1/articles/{article_id}/bookmark", headers=headers)
+    client.delete(f"/api/v1/categories/channels/{channel_id}/subscribe", headers=headers)
+    client.delete(f"/api/v1/channels/{channel_id}/follow", headers=headers)
+
+def test_idempotency_key_replays_the_first_response(client, fake):
+    from app.services.comment_service import comment_ingestor
+    headers = {**login(client, "reader"), "Idempotency-Key": "comment-1"}
+    article_id = fake.data["published_article_ids"][2]
+    first = client.post(f"/api/v1/articles/{article_id}/comments", json={"content": "Only once"}, headers=headers)
+    again = client.post(f"/api/v1/articles/{article_id}/comments", json={"content": "Only once"}, headers=headers)
+    assert first.status_code == again.status_code == 200
+    assert again.headers["idempotent-replayed"] == "true" and again.json() == first.json()
+    comment_ingestor.flush()
+    assert sum(c["body"] == "Only once" for c in fake.table("comments")) == 1
+
+    reused = client.post(f"/api/v1/articles/{article_id}/comments", json={"content": "Different"}, headers=headers)
+    assert reused.status_code == 422
+
+def test_idempotency_key_is_released_after_a_rate_limit(client, fake, monkeypatch):
+    from app.services.comment_service import comment_limiter
+    from app.services.rate_limit_service import MemoryBucketBackend
+    monkeypatch.setattr(comment_limiter, "_backend", MemoryBucketBackend(100))
+    monkeypatch.setattr(comment_limiter, "burst", 1)
+    headers = login(client, "reader")
+    article_id = fake.data["published_article_ids"][3]
+    url = f"/api/v1/articles/{article_id}/comments"
+    assert client.post(url, json={"content": "First"}, headers={**headers, "Idempotency-Key": "limited-1"}).status_code == 200
+
+    retry_headers = {**headers, "Idempotency-Key": "limited-2"}
+    assert client.post(url, json={"content": "Second"}, headers=retry_headers).status_code == 429
+    monkeypatch.setattr(comment_limiter, "_backend", MemoryBucketBackend(100))
+    retried = client.post(url, json={"content": "Second"}, headers=retry_headers)
+    assert retried.status_code == 200 and "idempotent-replayed" not in retried.headers
+
+    too_large = client.post(url, json={"content": "x" * 70000}, headers={**headers, "Idempotency-Key": "large"})
+    assert too_large.status_code == 413
+
+def test_counters_are_buffered_then_flushed(client, fake, monkeypatch):
+    from app.services.counter_service import counter_service
+    headers = login(client, "reader")
+    article_id = fake.data["published_article_ids"][-2]
+    channel = fake.data["channels"][3]
+    article = next(a for a in fake.table("articles") if a["id"] == article_id)
+
+    client.post(f"/api/v1/articles/{article_id}/bookmark", headers=headers)
+    client.post(f"/api/v1/articles/{article_id}/bookmark", headers=headers)
+    client.post(f"/api/v1/articles/{article_id}/comments", json={"content": "Counted"}, headers=headers)
+    client.post(f"/api/v1/channels/{channel['id']}/follow", headers=headers)
+    assert article["bookmark_count"] == 0 and article["comment_count"] == 0
+
+    detail = client.get(f"/api/v1/articles/{article_id}").json()["data"]["article"]
+    assert (detail["bookmark_count"], detail["comment_count"]) == (1, 1)
+
+    fake.reset_calls()
+    counter_service.flush()
+    assert fake.calls["POST rpc/apply_counter_deltas"] == 1
+    assert (article["bookmark_count"], article["comment_count"], channel["follower_count"]) == (1, 1, 1)
+
+    # A batch whose response is lost is retried under the same flush id and applied once
+    from fake_supabase import counter_deltas_rpc
+    def lost_response(fake, args):
+        counter_deltas_rpc(fake, args)
+        raise httpx.ReadTimeout("response lost")
+    monkeypatch.setitem(fake.functions, "apply_counter_deltas", lost_response)
+    client.delete(f"/api/v1/articles/{article_id}/bookmark", headers=headers)
+    counter_service.flush()
+    assert article["bookmark_count"] == 0
+    monkeypatch.setitem(fake.functions, "apply_counter_deltas", counter_deltas_rpc)
+    counter_service.flush()
+    assert article["bookmark_count"] == 0
+
+    # So is a batch that committed before the statement timed out
+    def timed_out(fake, args):
+        counter_deltas_rpc(fake, args)
+        raise FakeError(500, "57014", "canceling statement due to statement timeout")
+    monkeypatch.setitem(fake.functions, "apply_counter_deltas", timed_out)
+    client.post(f"/api/v1/articles/{article_id}/bookmark", headers=headers)
+    counter_service.flush()
+    assert article["bookmark_count"] == 1
+    monkeypatch.setitem(fake.functions, "apply_counter_deltas", counter_deltas_rpc)
+    counter_service.flush()
+    assert article["bookmark_count"] == 1
+
+    # Without the RPC deltas stay pending rather than racing read-then-update writes
+    monkeypatch.delitem(fake.functions, "apply_counter_deltas")
+    client.delete(f"/api/v1/channels/{channel['id']}/follow", headers=headers)
+    counter_service.flush()
+    assert channel["follower_count"] == 1
+    monkeypatch.setitem(fake.functions, "apply_counter_deltas", counter_deltas_rpc)
+    counter_service.flush()
+    assert channel["follower_count"] == 0
+
+def test_comment_events_reach_subscribers_and_slow_ones_are_reset(client, fake, monkeypatch):
+    import asyncio
+    from app.services.event_service import event_broker, ConnectionLimitExceeded
+    headers = login(client, "reader")
+    article_id = fake.data["published_article_ids"][4]
+    topic = f"article:{article_id}:comments"
+
+    async def scenario():
+        subscription = event_broker.subscribe(topic, "test")
+        frames = event_broker.stream(subscription)
+        assert (await frames.__anext__()).startswith(b"retry:")
+        response = await asyncio.to_thread(
+            client.post, f"/api/v1/articles/{article_id}/comments", json={"content": "Live"}, headers=headers
+        )
+        assert response.status_code == 200
+        frame = await asyncio.wait_for(frames.__anext__(), timeout=5)
+        assert b"event: comment" in frame and b'"body":"Live"' in frame
+
+        monkeypatch.setattr(event_broker, "_max_per_client", 1)
+        with pytest.raises(ConnectionLimitExceeded):
+            event_broker.subscribe(topic, "test")
+
+        for i in range(event_broker._queue_size + 5):
+            event_broker.publish(topic, "comment", {"n": i})
+        remaining = [frame async for frame in frames]
+        assert remaining[-1].startswith(b"event: reset")
+        assert event_broker.connections == 0
+
+        # A client gone before the body starts still releases its subscription
+        from app.controllers.events.event_controller import open_stream
+        response = open_stream(topic, "gone")
+        assert event_broker.connections == 1
+
+        async def receive():
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            raise OSError("client went away")
+
+        with pytest.raises(Exception):
+            await response({"type": "http", "method": "GET", "path": "/", "headers": []}, receive, send)
+        assert event_broker.connections == 0
+
+    asyncio.run(scenario())
+
+def test_comments_are_written_behind_in_batches_and_rate_limited(client, fake, monkeypatch):
+    from app.services.comment_service import comment_ingestor, comment_limiter
+    from app.services.rate_limit_service import MemoryBucketBackend
+    monkeypatch.setattr(comment_limiter, "_backend", MemoryBucketBackend(100))
+    monkeypatch.setattr(comment_limiter, "burst", 4)
+    headers = login(client, "reader")
+    article_id = fake.data["published_article_ids"][5]
+    comment_ingestor.flush()
+
+    missing = client.post("/api/v1/articles/00000000-0000-0000-0000-000000000000/comments", json={"content": "x"}, headers=headers)
+    assert missing.status_code == 400
+
+    fake.reset_calls()
+    ids = []
+    for i in range(3):
+        response = client.post(f"/api/v1/articles/{article_id}/comments", json={"content": f"Batched {i}"}, headers=headers)
+        assert response.status_code == 200
+        ids.append(response.json()["data"]["comment"]["id"])
+    assert fake.calls["POST comments"] == 0
+    listed = client.get(f"/api/v1/articles/{article_id}/comments").json()["data"]["comments"]
+    assert [c["id"] for c in listed[:3]] == ids[::-1]
+
+    limited = client.post(f"/api/v1/articles/{article_id}/comments", json={"content": "Too many"}, headers=headers)
+    assert limited.status_code == 429
+    assert int(limited.headers["retry-after"]) >= 1
+
+    comment_ingestor.flush()
+    assert fake.calls["POST comments"] == 1
+    assert set(ids) <= {c["id"] for c in fake.table("comments")}
+    listed = client.get(f"/api/v1/articles/{article_id}/comments").json()["data"]["comments"]
+    assert sorted(c["id"] for c in listed if c["id"] in ids) == sorted(ids)
+
+    # A row the database rejects is dropped and announced to live viewers
+    from app.services.event_service import event_broker
+    monkeypatch.setattr(comment_limiter, "rate", 0)
+    published = []
+    monkeypatch.setattr(event_broker, "publish", lambda topic, event, data: published.append((topic, event, data)))
+    kept = client.post(f"/api/v1/articles/{article_id}/comments", json={"content": "Kept"}, headers=headers).json()["data"]
+    rejected = client.post(f"/api/v1/articles/{article_id}/comments", json={"content": "Rejected"}, headers=headers).json()["data"]
+    assert rejected["persisted"] is False
+    insert_rows = fake._insert_rows
+
+    def reject_one(table, rows):
+        if any(row.get("body") == "Rejected" for row in rows):
+            raise FakeError(409, "23503", "violates foreign key constraint")
+        return insert_rows(table, rows)
+
+    monkeypatch.setattr(fake, "_insert_rows", reject_one)
+    comment_ingestor.flush()
+    stored = {c["id"] for c in fake.table("comments")}
+    assert kept["comment"]["id"] in stored and rejected["comment"]["id"] not in stored
+    assert (f"article:{article_id}:comments", "comment_removed",
+            {"id": rejected["comment"]["id"], "article_id": article_id}) in published
+    assert comment_ingestor.pending_for(article_id) == []
+
+def test_route_rate_limits_and_load_shedding(client, fake, monkeypatch):
+    from app.config.settings import settings
+    from app.middleware.rate_limit import in_flight
+    from app.services import rate_limit_service
+    monkeypatch.setattr(rate_limit_service, "rate_limit_backend", rate_limit_service.MemoryBucketBackend(100))
+    burst = int(rate_limit_service.ROUTE_RATE_LIMITS["GET /api/v1/articles/search"]["ip"][1])
+
+    statuses = [client.get("/api/v1/articles/search?q=article").status_code for _ in range(burst + 1)]
+    assert statuses == [200] * burst + [429]
+    limited = client.get("/api/v1/articles/search?q=article")
+    assert int(limited.headers["retry-after"]) >= 1
+    assert client.get("/api/v1/categories/").status_code == 200
+
+    # Behind one proxy, only the entry it appended identifies the client; spoofed ones are ignored
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_HOPS", 1)
+    statuses = [
+        client.get("/api/v1/articles/search?q=a", headers={"X-Forwarded-For": f"10.0.0.{i}, 203.0.113.9"}).status_code
+        for i in range(burst + 1)
+    ]
+    assert statuses[-1] == 429
+    assert client.get("/api/v1/articles/search?q=a", headers={"X-Forwarded-For": "203.0.113.10"}).status_code == 200
+
+    # A network backend is called from the threadpool, not on the event loop
+    import asyncio, threading
+    class BlockingBackend(rate_limit_service.MemoryBucketBackend):
+        blocking = True
+        def take(self, *args):
+            assert threading.current_thread() is not threading.main_thread()
+            return super().take(*args)
+    limiter = rate_limit_service.TokenBucketLimiter("blocking", rate=1, burst=1, backend=BlockingBackend(10))
+    asyncio.run(limiter.check_async("key"))
+    with pytest.raises(rate_limit_service.RateLimitExceeded):
+        asyncio.run(limiter.check_async("key"))
+
+    monkeypatch.setattr(settings, "LOAD_SHED_MAX_IN_FLIGHT", 1)
+    assert in_flight.try_enter(1)
+    try:
+        shed = client.get("/api/v1/categories/")
+        assert shed.status_code == 503 and shed.headers["retry-after"] == str(settings.LOAD_SHED_RETRY_AFTER_SECONDS)
+        assert client.get("/health/live").status_code == 200
+    finally:
+        in_flight.leave()
+    assert client.get("/api/v1/categories/").status_code == 200
+
+    text = client.get("/metrics").text
+    assert 'rate_limited_total{limiter="GET /api/v1/articles/search ip"}' in text
+    assert "load_shed_total 1" in text
+
+def test_task_runtime_shutdown_respects_the_drain_deadline():
+    import asyncio, time
+    from app.services.task_service import TaskRuntime
+    runs = []
+
+    async def async_job():
+        runs.append("async")
+
+    def slow_flush():
+        time.sleep(0.3)
+        runs.append("flush")
+
+    # Outside the lifespan, async jobs run inline too
+    TaskRuntime(1, 10, 1).enqueue("inline", async_job)
+    assert runs == ["async"]
+
+    async def scenario():
+        runtime = TaskRuntime(workers=2, queue_size=10, drain_timeout=0.1)
+        await runtime.start()
+        # Registered after start: its loop must not be mistaken for a worker
+        runtime.register_periodic("late", async_job, 0.01)
+        runtime.register_periodic("flush", slow_flush, 60, run_on_shutdown=True)
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        await runtime.stop()
+        return time.monotonic() - started
+
+    assert asyncio.run(scenario()) < 0.25
+    assert runs.count("async") > 1